@@ -1,76 +1,87 @@
 import re
-import time
 import json
 import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 import requests
 import urllib3
 
+import async_lookup
+import deadline
+import http_pool
+import json_decode
+import lookup_common
+import metrics
+from code_classifier import classify
+from lookup_common import HEADERS, STORES
+from product_summary import (
+    build_summary,
+    cached_summary,
+    degraded,
+    is_degraded,
+    money_cop,
+    normalize_spec_key,
+    spec_index,
+    summary_fields,
+    summary_record,
+)
+from response_memo import ResponseMemo
+
 try:
     import pip_system_certs 
 except ModuleNotFoundError:
     pip_system_certs = None
 
 
-HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-        "(KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
-    ),
-    "Accept": "application/json,text/html;q=0.9,*/*;q=0.8",
-    "Accept-Language": "es-CO,es;q=0.9,en;q=0.8",
-}
-
-STORES = {
-    "metro": {"type": "vtex", "base": "https://www.tiendasmetro.co"},
-    "olimpica": {"type": "vtex", "base": "https://www.olimpica.com"},
-    "exito": {"type": "exito", "base": "https://www.exito.com"},
-}
-
-TIMEOUT = 30
-RETRIES = 2
-BACKOFF = 1.2
+# Tiendas, caches, indices y configuracion de busqueda: lookup_common.py;
+# armado del resumen: product_summary.py
+ANSWER_DEADLINE = 5.0  # segundos por respuesta (answer/answer_full); las tiendas van en paralelo
+BATCH_CHUNK_SIZE = 50  # filtros fq por request en summarize_many
+BATCH_WORKERS = 4
+VTEX_MAX_PAGE = 50  # VTEX no devuelve mas de 50 productos por busqueda
+# Precio rapido: simulacion de carrito (sin descripciones, imagenes ni specs)
+SIMULATION_PATH = "/api/checkout/pub/orderForms/simulation"
+SIMULATION_SELLER = "1"
+SIMULATION_COUNTRY = "COL"
+SIMULATION_CHUNK = 50  # items por POST
+QUOTE_FIELDS = (
+    "tienda", "sku_consultado", "sku", "nombre", "precio", "precio_lista", "PriceValidUntil",
+)
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 
 # GET CENTRAL
 def http_get(url: str) -> requests.Response:
-    last_err = None
+    # Sesion keep-alive por tienda y limitador adaptativo por host (http_pool /
+    # rate_limit). Si falla el SSL reintenta sin verificar, como siempre.
+    # La misma URL pedida a la vez por varios hilos sale una sola vez.
+    return lookup_common.http_get(url, ssl_fallback=True)
+
+
+def http_post(url: str, payload: dict) -> requests.Response:
+    # Mismo camino que http_get (sesion, limitador, reintentos) pero POST JSON.
+    return http_pool.fetch(
+        url,
+        headers=HEADERS,
+        timeout=lookup_common.TIMEOUT,
+        retries=lookup_common.RETRIES,
+        backoff=lookup_common.BACKOFF,
+        ssl_fallback=True,
+        payload=payload,
+    )
 
-    for attempt in range(RETRIES + 1):
-        try:
-            return requests.get(
-                url,
-                headers=HEADERS,
-                timeout=TIMEOUT,
-            )
-        except requests.exceptions.SSLError as e:
-            last_err = e
-            try:
-                return requests.get(
-                    url,
-                    headers=HEADERS,
-                    timeout=TIMEOUT,
-                    verify=False,
-                )
-            except Exception as e2:
-                last_err = e2
-                if attempt < RETRIES:
-                    time.sleep(BACKOFF * (attempt + 1))
-        except Exception as e:
-            last_err = e
-            if attempt < RETRIES:
-                time.sleep(BACKOFF * (attempt + 1))
 
-    raise last_err
+def get_json(url: str, memo=None, match=None, keep_first=False):
+    """
+    GET + json() una sola vez -> (status_code, data), ver
+    lookup_common.get_json.
+    """
+    return lookup_common.get_json(url, memo, match, keep_first, get=http_get)
 
 
-# Precios
-def money_cop(v):
-    try:
-        return f"$ {float(v):,.0f}".replace(",", ".")
-    except Exception:
-        return str(v)
+# Las busquedas son las de async_lookup.AsyncLookup, con este http_get; las
+# funciones de abajo solo las corren en su event loop de fondo.
+ENGINE = async_lookup.AsyncLookup(http_get=http_get)
 
 
 def pretty(obj) -> str:
@@ -109,471 +120,365 @@ def wants_full_info(question: str) -> bool:
 
 
 # VTEX para metro y olÃƒÂ­mpica, y parte de ÃƒÂ©xito (EAN -> itemId -> getProductBySku)
-def extract_vtex(product: dict, code: str):
+def get_price_vtex(base: str, code: str, speculative=None, memo=None, local_first=None):
     """
-    Devuelve (price, list_price, name) si algÃƒÂºn item coincide por itemId o ean
+    (price, list_price, name) por skuId -> EAN -> ft, o None. Ver
+    AsyncLookup.get_price_vtex (orden, modo especulativo, caches, local_first).
     """
-    name = product.get("productName", "Producto")
-    for item in product.get("items", []):
-        if str(item.get("itemId", "")) == str(code) or str(item.get("ean", "")) == str(code):
-            offer = item["sellers"][0]["commertialOffer"]
-            return offer.get("Price"), offer.get("ListPrice"), name
-    return None
-
-
-def get_price_vtex(base: str, code: str):
-    """
-    1) skuId: fq=skuId:<code>
-    2) EAN:  fq=alternateIds_Ean:<code>
-    3) fallback: ft=<code> y valida itemId/ean
-    """
-    # 1) skuId
-    url1 = f"{base}/api/catalog_system/pub/products/search/?fq=skuId:{code}"
-    r1 = http_get(url1)
-    if r1.status_code == 200 and r1.json():
-        res = extract_vtex(r1.json()[0], code)
-        if res and res[0] is not None:
-            return res
-
-    # 2) EAN
-    url2 = f"{base}/api/catalog_system/pub/products/search/?fq=alternateIds_Ean:{code}"
-    r2 = http_get(url2)
-    if r2.status_code == 200 and r2.json():
-        res = extract_vtex(r2.json()[0], code)
-        if res and res[0] is not None:
-            return res
-
-    # 3) fallback ft
-    url3 = f"{base}/api/catalog_system/pub/products/search/?ft={code}"
-    r3 = http_get(url3)
-    if r3.status_code == 200:
-        for p in r3.json():
-            res = extract_vtex(p, code)
-            if res and res[0] is not None:
-                return res
-
-    return None
+    return async_lookup.run_blocking(ENGINE.get_price_vtex(base, code, speculative, memo, local_first))
 
 
 #InformaciÃ³n completa del producto (no solo precio) desde VTEX o Ãƒâ€°xito
-def get_product_vtex(base: str, code: str):
-    # 1) skuId directo
-    url1 = f"{base}/api/catalog_system/pub/products/search/?fq=skuId:{code}"
-    r1 = http_get(url1)
-    if r1.status_code == 200 and r1.json():
-        return r1.json()[0]
-
-    # 2) EAN
-    url2 = f"{base}/api/catalog_system/pub/products/search/?fq=alternateIds_Ean:{code}"
-    r2 = http_get(url2)
-    if r2.status_code == 200 and r2.json():
-        return r2.json()[0]
-
-    # 3) fallback: bÃºsqueda por texto ft
-    url3 = f"{base}/api/catalog_system/pub/products/search/?ft={code}"
-    r3 = http_get(url3)
-    if r3.status_code == 200 and r3.json():
-        # intenta encontrar uno que matchee exacto por itemId/ean
-        for p in r3.json():
-            for item in p.get("items", []):
-                if str(item.get("itemId", "")) == str(code) or str(item.get("ean", "")) == str(code):
-                    return p
-        # si no matchea exacto, devuelve el primero como fallback
-        return r3.json()[0]
-
-    return None
+def get_product_vtex(base: str, code: str, speculative=None, memo=None):
+    return async_lookup.run_blocking(ENGINE.get_product_vtex(base, code, speculative, memo))
 
 
 # InformaciÃƒÂ³n completa del producto de Ãƒâ€°XITO (EAN -> itemId -> endpoint getProductBySku)
-def get_price_exito_by_skuid(skuid: str):
+def get_price_exito_by_skuid(skuid: str, memo=None):
     """
     Endpoint de Ãƒâ€°xito por skuId interno (itemId).
     """
-    url = f"https://www.exito.com/api/product/getProductBySku?skuid={skuid}"
-    r = http_get(url)
-
-    if r.status_code >= 400:
-        return None
-
-    data = r.json()
-    if not data:
-        return None
-
-    p = data[0]
-    name = p.get("productName", "Producto")
-
-    try:
-        offer = p["items"][0]["sellers"][0]["commertialOffer"]
-        price = offer.get("Price")
-        list_price = offer.get("ListPrice")
-        if price is None:
-            return None
-        return price, list_price, name
-    except Exception:
-        return None
+    return async_lookup.run_blocking(ENGINE.get_price_exito_by_skuid(skuid, memo))
 
 
-def get_exito_itemid_from_ean(ean: str):
+def get_exito_itemid_from_ean(ean: str, memo=None):
     """
     Busca en el catÃƒÂ¡logo VTEX de Ãƒâ€°xito por EAN y devuelve el itemId (skuid interno).
     """
-    base = "https://www.exito.com"
-    url = f"{base}/api/catalog_system/pub/products/search/?fq=alternateIds_Ean:{ean}"
-    r = http_get(url)
-    if r.status_code != 200:
-        return None
-
-    data = r.json()
-    if not data:
-        return None
+    return async_lookup.run_blocking(ENGINE.get_exito_itemid_from_ean(ean, memo))
 
-    p = data[0]
-    for item in p.get("items", []):
-        if str(item.get("ean", "")).strip() == str(ean).strip():
-            return str(item.get("itemId"))
 
-    # fallback: si no matchea exacto, intenta el primero
-    if p.get("items"):
-        return str(p["items"][0].get("itemId"))
-
-    return None
-
-
-def get_price_exito(code: str):
+def get_price_exito(code: str, memo=None):
     """
     - Si code parece EAN (13+ dÃƒÂ­gitos): EAN -> itemId -> getProductBySku
     - Si code es skuId: intenta directo
     """
-    # intenta directo por si el usuario pasÃƒÂ³ skuid
-    direct = get_price_exito_by_skuid(code)
-    if direct:
-        return direct
-
-    # si no, asume EAN y convierte
-    itemid = get_exito_itemid_from_ean(code)
-    if not itemid:
-        return None
-
-    return get_price_exito_by_skuid(itemid)
+    return async_lookup.run_blocking(ENGINE.get_price_exito(code, memo))
 
 
-def get_product_exito(code: str):
+def get_product_exito(code: str, memo=None):
     """
     Devuelve un dict con informaciÃƒÂ³n "completa" desde:
     - VTEX (si el code era EAN o se puede encontrar)
     - Endpoint de Ãƒâ€°xito getProductBySku (por itemId/skuid)
     """
-    vtex_product = None
-    skuid = None
-
-    # 1) intentar encontrar por EAN (VTEX) y obtener itemId
-    itemid = get_exito_itemid_from_ean(code)
-    if itemid:
-        skuid = itemid
-        # producto VTEX completo (por EAN)
-        url_vtex = f"https://www.exito.com/api/catalog_system/pub/products/search/?fq=alternateIds_Ean:{code}"
-        rv = http_get(url_vtex)
-        if rv.status_code == 200 and rv.json():
-            vtex_product = rv.json()[0]
-    else:
-        # si no se encontrÃƒÂ³ itemid, asumimos que code ya es skuid
-        skuid = code
-        # (opcional) intentar traer VTEX por skuId
-        url_vtex2 = f"https://www.exito.com/api/catalog_system/pub/products/search/?fq=skuId:{code}"
-        rv2 = http_get(url_vtex2)
-        if rv2.status_code == 200 and rv2.json():
-            vtex_product = rv2.json()[0]
-
-    # 2) endpoint de Ãƒâ€°xito por skuid
-    exito_sku = None
-    url_sku = f"https://www.exito.com/api/product/getProductBySku?skuid={skuid}"
-    rs = http_get(url_sku)
-    if rs.status_code == 200:
-        exito_sku = rs.json()
+    return async_lookup.run_blocking(ENGINE.get_product_exito(code, memo))
 
-    return {"skuid": skuid, "vtex_product": vtex_product, "exito_sku": exito_sku}
 
+def summarize_store_product(store: str, code: str, memo=None, fields=None, local_first=None):
+    """
+    Devuelve una vista corta y consistente del producto para una tienda.
+    `memo` (ResponseMemo) comparte respuestas ya pedidas en la misma pregunta.
+    `fields` limita las claves calculadas (ej. QUOTE_FIELDS); None = todas.
+    Los productos resueltos quedan en PRODUCT_CACHE hasta CACHE_TTL o su
+    PriceValidUntil, lo que llegue primero; los "no encontrado" quedan en
+    NEGATIVE_CACHE (los errores de transporte no se cachean). Llamadas
+    simultaneas por el mismo (store, code) comparten una sola busqueda.
+    Con local_first (o LOCAL_FIRST) responde desde el catalogo local si la
+    copia esta fresca (local_product).
+    """
+    return async_lookup.run_blocking(ENGINE.summarize_store_product(store, code, memo, fields, local_first))
 
-# Funciones para extraer info consistente del producto (nombre, precio, imagen) intentando matchear item por itemId o EAN, y con fallback al primer item si no hay match exacto.
 
-def extract_item_and_offer(product: dict, code: str):
+def resolve_store_product(store: str, code: str, memo=None):
     """
-    Intenta encontrar el item por itemId/ean y su oferta.
-    Si no coincide exacto, usa el primer item disponible.
+    Documento del producto en la tienda -> (producto VTEX, itemId o None,
+    respuesta getProductBySku o None), o None si no aparece.
     """
-    items = product.get("items", []) if product else []
-    if not items:
-        return None, None
-
-    selected = None
-    for item in items:
-        if str(item.get("itemId", "")) == str(code) or str(item.get("ean", "")) == str(code):
-            selected = item
-            break
+    return async_lookup.run_blocking(ENGINE.resolve_store_product(store, code, memo))
 
-    if selected is None:
-        selected = items[0]
 
-    offer = None
-    sellers = selected.get("sellers", [])
-    if sellers and sellers[0].get("commertialOffer"):
-        offer = sellers[0]["commertialOffer"]
-
-    return selected, offer
+def summarize_stores(stores, code: str, memo=None, fields=None, partial=False):
+    """
+    Consulta varias tiendas a la vez (AsyncLookup.summarize_stores).
+    Devuelve [(store, data)] en el mismo orden de `stores`.
+    Con partial=True una tienda que falla (plazo, circuito abierto, red)
+    queda como degraded(...) en vez de tumbar todo el resultado.
+    """
+    return async_lookup.run_blocking(ENGINE.summarize_stores(stores, code, memo, fields, partial))
 
 
-def normalize_spec_key(text: str) -> str:
-    if text is None:
-        return ""
-    normalized = unicodedata.normalize("NFKD", str(text).lower())
-    normalized = "".join(ch for ch in normalized if not unicodedata.combining(ch))
-    return " ".join(normalized.split())
+def search_many(base: str, field: str, values, memo=None):
+    """
+    Una sola busqueda VTEX con varios filtros del mismo campo
+    (fq=skuId:1&fq=skuId:2...), que VTEX combina como OR.
+    Devuelve la lista de productos ([] si la tienda no respondio 200).
+    """
+    values = list(values)
+    query = "&".join(f"fq={field}:{v}" for v in values)
+    url = (
+        f"{base}/api/catalog_system/pub/products/search/?{query}"
+        f"&_from=0&_to={len(values) - 1}"
+    )
+    status, data = get_json(url, memo)
+    return data if status == 200 and data else []
 
 
-def resolve_spec_value(product: dict, spec_name: str):
+def summarize_many(pairs, chunk_size=None, fallback: bool = True, fields=None, records=False, partial=False):
     """
-    Busca el valor de una especificacion tolerando cambios de mayusculas/tildes.
+    Resuelve muchos (tienda, codigo) de una vez. Agrupa los codigos por
+    tienda en busquedas con `chunk_size` filtros fq (skuId o EAN segun el
+    tipo de codigo) y solo los que no aparecen se resuelven uno a uno con
+    summarize_store_product (cascada completa con ft).
+
+    Devuelve {(store, code): resumen o None}, con el mismo formato de
+    summarize_store_product (y la misma proyeccion `fields`) y en el orden
+    de `pairs`. Con records=True devuelve ProductSummary (records.py) en vez
+    de dicts, para tener muchos en memoria; esos no pasan por PRODUCT_CACHE.
+    Si el fallback individual de un codigo falla, con partial=True ese
+    queda como degraded(...) y los demas siguen; si no, se propaga el error.
     """
-    if spec_name in product:
-        return product.get(spec_name)
+    fields = summary_fields(fields)
+    size = max(1, min(chunk_size or BATCH_CHUNK_SIZE, VTEX_MAX_PAGE))
+    keys = list(dict.fromkeys((store, str(code)) for store, code in pairs))
+    results = {}
+    pending = []
+    for key in keys:
+        cached = None if records else cached_summary(key[0], key[1], fields)
+        if cached is not None:
+            results[key] = cached
+        elif lookup_common.NEGATIVE_CACHE.get(("summary",) + key):
+            results[key] = None
+        else:
+            pending.append(key)
+
+    memo = ResponseMemo()
+    found = {}  # (store, code) -> (producto, itemId)
+
+    def run_pass(field, wanted):
+        # wanted: [(store, code, valor a buscar en `field`)]
+        jobs = []
+        for store in dict.fromkeys(w[0] for w in wanted):
+            values = list(dict.fromkeys(v for s, _, v in wanted if s == store))
+            for i in range(0, len(values), size):
+                jobs.append((store, values[i:i + size]))
+
+        def run_job(job):
+            store, values = job
+            try:
+                return store, search_many(STORES[store]["base"], field, values, memo)
+            except requests.exceptions.RequestException:
+                return store, []  # esos codigos caen al fallback individual
+
+        by_store = {}
+        with ThreadPoolExecutor(max_workers=BATCH_WORKERS) as pool:
+            for store, products in pool.map(run_job, jobs):
+                index = by_store.setdefault(store, {})
+                for product in products:
+                    for item in product.get("items", []) or []:
+                        item_id = str(item.get("itemId", ""))
+                        ean = str(item.get("ean") or "").strip()
+                        for value in (item_id, ean):
+                            if value:
+                                index.setdefault(value, (product, item_id))
+
+        missed = []
+        for store, code, value in wanted:
+            hit = by_store.get(store, {}).get(value)
+            if hit:
+                found[(store, code)] = hit
+            else:
+                missed.append((store, code))
+        return missed
+
+    # 1) cada codigo por su camino mas probable (itemId conocido, EAN o skuId)
+    by_sku, by_ean = [], []
+    for store, code in pending:
+        known_item = lookup_common.ID_INDEX.item_for_ean(store, code)
+        if known_item:
+            by_sku.append((store, code, known_item))
+        elif classify(code) == "ean":
+            by_ean.append((store, code, code))
+        else:
+            by_sku.append((store, code, code))
+    missed_sku = run_pass("skuId", by_sku) if by_sku else []
+    missed_ean = run_pass("alternateIds_Ean", by_ean) if by_ean else []
+
+    # 2) los que no aparecieron, por el otro campo
+    retry_ean = [(s, c, c) for s, c in missed_sku]
+    retry_sku = [(s, c, c) for s, c in missed_ean]
+    missed = run_pass("alternateIds_Ean", retry_ean) if retry_ean else []
+    missed += run_pass("skuId", retry_sku) if retry_sku else []
+
+    for (store, code), (product, item_id) in found.items():
+        if records:
+            results[(store, code)] = summary_record(store, code, product, skuid=item_id)
+            continue
+        summary = build_summary(store, code, product, skuid=item_id, fields=fields)
+        cache_key = ("summary", store, code) if fields is None else ("summary", store, code, fields)
+        lookup_common.PRODUCT_CACHE.put(cache_key, summary, valid_until=summary.get("PriceValidUntil"))
+        results[(store, code)] = summary
+
+    # 3) fallback individual solo para los que no aparecieron
+    def resolve_one(key):
+        if not records:
+            return summarize_store_product(key[0], key[1], memo, fields)
+        found = resolve_store_product(key[0], key[1], memo)
+        if found is None:
+            return None
+        product, skuid, exito_sku = found
+        return summary_record(key[0], key[1], product, skuid=skuid, exito_sku=exito_sku)
+
+    def one(key):
+        try:
+            return resolve_one(key)
+        except requests.exceptions.RequestException as e:
+            if not partial:
+                raise
+            return degraded(key[0], key[1], e)
+
+    if fallback and missed:
+        with ThreadPoolExecutor(max_workers=BATCH_WORKERS) as pool:
+            summaries = pool.map(one, missed)
+            for key, summary in zip(missed, summaries):
+                results[key] = summary
+    else:
+        for key in missed:
+            results[key] = None
 
-    target = normalize_spec_key(spec_name)
-    for key, value in product.items():
-        if normalize_spec_key(key) == target:
-            return value
-    return None
+    return {key: results.get(key) for key in keys}
 
 
-def sanitize_items(items):
+# Precio rapido (simulacion de carrito VTEX)
+def simulate_prices(base: str, item_ids):
     """
-    Normaliza items al formato solicitado y evita campos extra (ej. metodos de pago).
+    Precios de varios itemId en un solo POST de simulacion de carrito.
+    Devuelve {itemId: (Price, ListPrice, PriceValidUntil)} en pesos (VTEX
+    responde en centavos). Los items sin precio no aparecen.
     """
-    cleaned = []
-    for product_item in items or []:
-        images_clean = []
-        for img in product_item.get("images", []) or []:
-            images_clean.append(
-                {
-                    "imageUrl": img.get("imageUrl"),
-                    "imageLastModified": img.get("imageLastModified"),
-                }
-            )
+    item_ids = list(dict.fromkeys(str(i) for i in item_ids))
+    if not item_ids:
+        return {}
+    payload = {
+        "items": [{"id": i, "quantity": 1, "seller": SIMULATION_SELLER} for i in item_ids],
+        "country": SIMULATION_COUNTRY,
+    }
+    url = f"{base}{SIMULATION_PATH}"
+    r = lookup_common.URL_FLIGHTS.do((url, tuple(item_ids)), http_post, url, payload)
+    if r.status_code != 200:
+        return {}
+
+    prices = {}
+    for item in (json_decode.response_json(r) or {}).get("items", []) or []:
+        item_id = str(item.get("id") or "")
+        selling = item.get("sellingPrice", item.get("price"))
+        if not item_id or item_id in prices or not selling:
+            continue
+        list_price = item.get("listPrice") or item.get("price") or selling
+        prices[item_id] = (selling / 100, list_price / 100, item.get("priceValidUntil"))
+    return prices
 
-        sellers_clean = []
-        for seller in product_item.get("sellers", []) or []:
-            offer = seller.get("commertialOffer") or {}
-            sellers_clean.append(
-                {
-                    "sellerId": seller.get("sellerId"),
-                    "sellerName": seller.get("sellerName"),
-                    "addToCartLink": seller.get("addToCartLink"),
-                    "sellerDefault": seller.get("sellerDefault"),
-                    "commertialOffer": {
-                        "BuyTogether": offer.get("BuyTogether"),
-                        "Price": offer.get("Price"),
-                        "ListPrice": offer.get("ListPrice"),
-                        "PriceWithoutDiscount": offer.get("PriceWithoutDiscount"),
-                        "FullSellingPrice": offer.get("FullSellingPrice"),
-                        "PriceValidUntil": offer.get("PriceValidUntil"),
-                        "AvailableQuantity": offer.get("AvailableQuantity"),
-                        "IsAvailable": offer.get("IsAvailable"),
-                        "Tax": offer.get("Tax"),
-                    },
-                }
-            )
 
-        cleaned.append(
-            {
-                "isKit": product_item.get("isKit"),
-                "images": images_clean,
-                "sellers": sellers_clean,
-                "Videos": product_item.get("Videos", []),
-                "estimatedDateArrival": product_item.get("estimatedDateArrival"),
-            }
-        )
-    return cleaned
+def quote_view(summary):
+    """
+    Lo que necesita answer() de un resumen: nombre y precios (QUOTE_FIELDS).
+    """
+    if summary is None:
+        return None
+    return {k: summary.get(k) for k in QUOTE_FIELDS}
 
 
-def summarize_store_product(store: str, code: str):
+def quote_many(pairs, partial=False):
     """
-    Devuelve una vista corta y consistente del producto para una tienda.
+    Solo nombre y precio para muchos (tienda, codigo). En tiendas VTEX, si
+    ID_INDEX ya conoce el itemId y el nombre, el precio sale de la
+    simulacion de carrito (un POST por tienda y SIMULATION_CHUNK items);
+    lo demas (Éxito, codigos nuevos, items sin precio) va por
+    summarize_store_product, que de paso alimenta el indice.
+
+    Devuelve {(store, code): {QUOTE_FIELDS} o None} en el orden de `pairs`;
+    con partial=True las tiendas que fallan quedan como degraded(...).
     """
-    if store == "exito":
-        data = get_product_exito(code)
-        if not data["vtex_product"] and not data["exito_sku"]:
-            return None
+    keys = list(dict.fromkeys((store, str(code)) for store, code in pairs))
+    results = {}
+    pending = {}  # store -> [(code, itemId, nombre)]
+    missed = []
+    for key in keys:
+        store, code = key
+        cached = lookup_common.PRODUCT_CACHE.get(("quote",) + key) or cached_summary(store, code, QUOTE_FIELDS)
+        if cached is not None:
+            results[key] = quote_view(cached)
+            continue
+        if lookup_common.NEGATIVE_CACHE.get(("summary",) + key):
+            results[key] = None
+            continue
 
-        product = data["vtex_product"] or {}
-        skuid = data.get("skuid", code)
+        item_id = None
+        if STORES[store]["type"] == "vtex":
+            item_id = code if lookup_common.ID_INDEX.is_item(store, code) else lookup_common.ID_INDEX.item_for_ean(store, code)
+        name = lookup_common.ID_INDEX.name_for_item(store, item_id) if item_id else None
+        if name:
+            pending.setdefault(store, []).append((code, item_id, name))
+        else:
+            missed.append(key)
 
-        item, offer = extract_item_and_offer(product, skuid)
+    jobs = []
+    for store, wanted in pending.items():
+        for i in range(0, len(wanted), SIMULATION_CHUNK):
+            jobs.append((store, wanted[i:i + SIMULATION_CHUNK]))
 
-        # Fallback de precio desde getProductBySku cuando no llega por VTEX.
-        if offer is None and data.get("exito_sku"):
-            try:
-                offer = data["exito_sku"][0]["items"][0]["sellers"][0]["commertialOffer"]
-            except Exception:
-                offer = None
-
-        price = offer.get("Price") if offer else None
-        list_price = offer.get("ListPrice") if offer else None
-        price_without_discount = offer.get("PriceWithoutDiscount") if offer else None
-        full_selling_price = offer.get("FullSellingPrice") if offer else None
-        price_valid_until = offer.get("PriceValidUntil") if offer else None
-
-        name = product.get("productName")
-        if not name and data.get("exito_sku"):
-            name = data["exito_sku"][0].get("productName")
-
-        ean = item.get("ean") if item else None
-        sku = item.get("itemId") if item else skuid
-        image = None
-        if item and item.get("images"):
-            image = item["images"][0].get("imageUrl")
-        elif data.get("exito_sku"):
+    def run_job(job):
+        store, wanted = job
+        try:
+            return simulate_prices(STORES[store]["base"], [w[1] for w in wanted])
+        except requests.exceptions.RequestException:
+            return {}  # esos codigos caen al catalogo
+
+    if jobs:
+        with ThreadPoolExecutor(max_workers=BATCH_WORKERS) as pool:
+            for (store, wanted), prices in zip(jobs, pool.map(deadline.bound(run_job), jobs)):
+                for code, item_id, name in wanted:
+                    if item_id not in prices:
+                        missed.append((store, code))
+                        continue
+                    price, list_price, valid_until = prices[item_id]
+                    quote = {
+                        "tienda": store,
+                        "sku_consultado": code,
+                        "sku": item_id,
+                        "nombre": name,
+                        "precio": money_cop(price),
+                        "precio_lista": money_cop(list_price),
+                        "PriceValidUntil": valid_until,
+                    }
+                    lookup_common.PRODUCT_CACHE.put(("quote", store, code), quote, valid_until=valid_until)
+                    results[(store, code)] = quote
+
+    if missed:
+        memo = ResponseMemo()
+
+        def one(key):
             try:
-                image = data["exito_sku"][0]["items"][0]["images"][0]["imageUrl"]
-            except Exception:
-                image = None
-
-        descuento = None
-        ahorro = None
-        if (
-            isinstance(price, (int, float))
-            and isinstance(list_price, (int, float))
-            and list_price > price
-            and list_price > 0
-        ):
-            pct = round((1 - (price / list_price)) * 100)
-            descuento = f"{pct}%"
-            ahorro = money_cop(list_price - price)
-
-        items_min = sanitize_items(product.get("items", []))
-
-        specifications_map = {}
-        for spec_name in product.get("allSpecifications", []) or []:
-            specifications_map[spec_name] = resolve_spec_value(product, spec_name)
-
-        return {
-            "tienda": store,
-            "sku_consultado": code,
-            "id": str(product.get("productId")) if product.get("productId") else None,
-            "sku": str(sku) if sku else None,
-            "ean": str(ean) if ean else None,
-            "productId": str(product.get("productId")) if product.get("productId") else None,
-            "productName": name or "Producto",
-            "brand": product.get("brand"),
-            "productTitle": product.get("productTitle"),
-            "metaTagDescription": product.get("metaTagDescription"),
-            "releaseDate": product.get("releaseDate"),
-            "categories": product.get("categories"),
-            "Maximum_units_to_sell": product.get("Maximum_units_to_sell"),
-            "allSpecifications": product.get("allSpecifications"),
-            "specifications_map": specifications_map,
-            "items": items_min,
-            "nombre": name or "Producto",
-            "descripcion": product.get("metaTagDescription"),
-            "categoria": product.get("categories")[0] if product.get("categories") else None,
-            "marca": product.get("brand"),
-            "precio": money_cop(price) if price is not None else None,
-            "precio_lista": money_cop(list_price) if list_price is not None else None,
-            "descuento": descuento,
-            "ahorro": ahorro,
-            "price": money_cop(price) if price is not None else None,
-            "last_price": money_cop(list_price) if list_price is not None else None,
-            "PriceWithoutDiscount": (
-                money_cop(price_without_discount) if price_without_discount is not None else None
-            ),
-            "FullSellingPrice": (
-                money_cop(full_selling_price) if full_selling_price is not None else None
-            ),
-            "PriceValidUntil": price_valid_until,
-            "link": product.get("link"),
-            "link_imagen": image,
-        }
-
-    product = get_product_vtex(STORES[store]["base"], code)
-    if not product:
-        return None
+                return quote_view(summarize_store_product(key[0], key[1], memo, QUOTE_FIELDS))
+            except requests.exceptions.RequestException as e:
+                if not partial:
+                    raise
+                return degraded(key[0], key[1], e)
 
-    item, offer = extract_item_and_offer(product, code)
-    price = offer.get("Price") if offer else None
-    list_price = offer.get("ListPrice") if offer else None
-    price_without_discount = offer.get("PriceWithoutDiscount") if offer else None
-    full_selling_price = offer.get("FullSellingPrice") if offer else None
-    price_valid_until = offer.get("PriceValidUntil") if offer else None
-
-    ean = item.get("ean") if item else None
-    sku = item.get("itemId") if item else code
-    image = None
-    if item and item.get("images"):
-        image = item["images"][0].get("imageUrl")
-
-    descuento = None
-    ahorro = None
-    if (
-        isinstance(price, (int, float))
-        and isinstance(list_price, (int, float))
-        and list_price > price
-        and list_price > 0
-    ):
-        pct = round((1 - (price / list_price)) * 100)
-        descuento = f"{pct}%"
-        ahorro = money_cop(list_price - price)
-
-    items_min = sanitize_items(product.get("items", []))
-
-    specifications_map = {}
-    for spec_name in product.get("allSpecifications", []) or []:
-        specifications_map[spec_name] = resolve_spec_value(product, spec_name)
-
-    return {
-        "tienda": store,
-        "sku_consultado": code,
-        "id": str(product.get("productId")) if product.get("productId") else None,
-        "sku": str(sku) if sku else None,
-        "ean": str(ean) if ean else None,
-        "productId": str(product.get("productId")) if product.get("productId") else None,
-        "productName": product.get("productName", "Producto"),
-        "brand": product.get("brand"),
-        "productTitle": product.get("productTitle"),
-        "metaTagDescription": product.get("metaTagDescription"),
-        "releaseDate": product.get("releaseDate"),
-        "categories": product.get("categories"),
-        "Maximum_units_to_sell": product.get("Maximum_units_to_sell"),
-        "allSpecifications": product.get("allSpecifications"),
-        "specifications_map": specifications_map,
-        "items": items_min,
-        "nombre": product.get("productName", "Producto"),
-        "descripcion": product.get("metaTagDescription"),
-        "categoria": product.get("categories")[0] if product.get("categories") else None,
-        "marca": product.get("brand"),
-        "precio": money_cop(price) if price is not None else None,
-        "precio_lista": money_cop(list_price) if list_price is not None else None,
-        "descuento": descuento,
-        "ahorro": ahorro,
-        "price": money_cop(price) if price is not None else None,
-        "last_price": money_cop(list_price) if list_price is not None else None,
-        "PriceWithoutDiscount": (
-            money_cop(price_without_discount) if price_without_discount is not None else None
-        ),
-        "FullSellingPrice": (
-            money_cop(full_selling_price) if full_selling_price is not None else None
-        ),
-        "PriceValidUntil": price_valid_until,
-        "link": product.get("link"),
-        "link_imagen": image,
-    }
+        workers = max(1, min(BATCH_WORKERS, len(missed)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for key, quote in zip(missed, pool.map(deadline.bound(one), missed)):
+                results[key] = quote
+
+    return {key: results.get(key) for key in keys}
 
 
 # Formato de respuesta final al usuario
+@metrics.timed("answer_seconds", kind="answer")
 def answer(q: str):
     store, code = parse_question(q)
     stores_to_query = [store] if store else list(STORES.keys())
 
+    # solo nombre y precios: simulacion de carrito si ya se conoce el item;
+    # las tiendas que no alcanzan ANSWER_DEADLINE quedan como parciales
+    with deadline.within(ANSWER_DEADLINE):
+        quotes = quote_many(((s, code) for s in stores_to_query), partial=True)
     lines = []
     for current_store in stores_to_query:
-        data = summarize_store_product(current_store, code)
+        data = quotes[(current_store, code)]
+        if is_degraded(data):
+            lines.append(f"{current_store.title()} | Sin datos ({data['motivo']}); resultado parcial")
+            continue
         if not data:
             lines.append(f"{current_store.title()} | No encontre informacion para {code}")
             continue
@@ -594,6 +499,7 @@ def answer(q: str):
     return "\n".join(lines)
 
 
+@metrics.timed("answer_seconds", kind="answer_full")
 def answer_full(q: str):
     """
     Devuelve informacion completa en formato natural y legible por tienda.
@@ -642,10 +548,15 @@ def answer_full(q: str):
                 lines.append("")
         return lines
 
-    def get_spec(specs: dict, *keys):
+    def get_spec(specs: dict, index: dict, *keys):
+        # exacto primero; despues sin tildes/mayusculas/mojibake (spec_index)
         for key in keys:
             if key in specs and specs.get(key) is not None:
                 return specs.get(key)
+        for key in keys:
+            value = index.get(normalize_spec_key(key))
+            if value is not None:
+                return value
         return None
 
     store, code = parse_question(q)
@@ -653,11 +564,25 @@ def answer_full(q: str):
 
     blocks = []
     found_any = False
+    partial = False
 
-    for current_store in stores_to_query:
-        data = summarize_store_product(current_store, code)
-        if data:
+    with deadline.within(ANSWER_DEADLINE):
+        results = summarize_stores(stores_to_query, code, partial=True)
+
+    for current_store, data in results:
+        if is_degraded(data):
+            blocks.append(
+                "\n".join(
+                    [
+                        f"Tienda: {current_store.title()}",
+                        f"Sin datos ({data['motivo']}); resultado parcial.",
+                    ]
+                )
+            )
+            partial = True
+        elif data:
             specs = data.get("specifications_map") or {}
+            index = spec_index(specs, skip_none=True)
             lines = [
                 f"Tienda: {current_store.title()}",
                 f"Producto: {format_value(data.get('productName') or data.get('nombre'))}",
@@ -669,14 +594,14 @@ def answer_full(q: str):
                 f"Categorias: {format_value(data.get('categories') or [])}",
                 f"Link: {format_value(data.get('link'))}",
                 f"Maximo de unidades: {format_value(data.get('Maximum_units_to_sell') or [])}",
-                f"Tipo de Producto: {format_value(get_spec(specs, 'Tipo de Producto', 'Tipo de producto'))}",
-                f"Marca (especificacion): {format_value(get_spec(specs, 'Marca', 'brand', 'Brand'))}",
-                f"EAN: {format_value(get_spec(specs, 'EAN', 'Ean', 'ean'))}",
-                f"Vendido por: {format_value(get_spec(specs, 'Vendido por', 'Vendido Por'))}",
-                f"CARACTERISTICAS: {format_value(get_spec(specs, 'CARACTERÍSTICAS', 'CARACTERÃSTICAS'))}",
-                f"Tamano: {format_value(get_spec(specs, 'Tamaño', 'TamaÃ±o'))}",
+                f"Tipo de Producto: {format_value(get_spec(specs, index, 'Tipo de Producto', 'Tipo de producto'))}",
+                f"Marca (especificacion): {format_value(get_spec(specs, index, 'Marca', 'brand', 'Brand'))}",
+                f"EAN: {format_value(get_spec(specs, index, 'EAN', 'Ean', 'ean'))}",
+                f"Vendido por: {format_value(get_spec(specs, index, 'Vendido por', 'Vendido Por'))}",
+                f"CARACTERISTICAS: {format_value(get_spec(specs, index, 'CARACTERÍSTICAS', 'CARACTERÃSTICAS'))}",
+                f"Tamano: {format_value(get_spec(specs, index, 'Tamaño', 'TamaÃ±o'))}",
                 f"Unidad de Medida: {format_value(specs.get('Unidad de Medida'))}",
-                f"Numero de Piezas: {format_value(get_spec(specs, 'Número de Piezas', 'NÃºmero de Piezas'))}",
+                f"Numero de Piezas: {format_value(get_spec(specs, index, 'Número de Piezas', 'NÃºmero de Piezas'))}",
                 f"Ump del Empaque 1 (Out): {format_value(specs.get('Ump del Empaque 1 (Out)'))}",
                 f"Prime: {format_value(specs.get('Prime'))}",
                 f"Factor Neto PUM: {format_value(specs.get('Factor Neto PUM'))}",
@@ -695,7 +620,7 @@ def answer_full(q: str):
                 )
             )
 
-    if not found_any:
+    if not found_any and not partial:
         return f"No encontre info para {code} en ninguna tienda."
 
     return "\n\n" + ("\n\n" + ("-" * 60) + "\n\n").join(blocks)
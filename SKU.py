@@ -1,30 +1,494 @@
-import requests
+import json
+import os
+import queue
+import sys
+import threading
 import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
 
-BASE = "https://www.tiendasmetro.co"
+import http_pool
+import json_decode
+import lookup_common
+from lookup_common import STORES, store_for_base
+from records import Product
+
+# El crawl alimenta lookup_common.ID_INDEX (EAN -> itemId -> productId) y la
+# copia local lookup_common.CATALOG (busquedas sin red con LOCAL_FIRST).
+BASE = STORES["metro"]["base"]
 HEADERS = {"User-Agent": "Mozilla/5.0"}
 
-def extraer_todos(page_size=50, pausa=0.2):
-    todos = []
-    inicio = 0
+MAX_FROM = 2500  # VTEX no pagina mas alla de este _from
+NIVELES_ARBOL = 3
+PRECIO_MAX = 100_000_000  # COP; rango inicial para partir por precio
+MAX_DIVISIONES = 24  # profundidad maxima al partir por precio
+CRAWL_WORKERS = 4
+# Si las categorias hoja no alcanzan el total que reporta la tienda, se
+# recorre ademas la particion "resto" (catalogo sin filtro, partido por precio)
+RESTO = True
+PARTICION_RESTO = "(resto)"
+
+
+def _pausa(segundos):
+    # El ritmo lo pone el limitador por host (rate_limit); `pausa` queda solo
+    # como freno extra opcional.
+    if segundos:
+        time.sleep(segundos)
+
 
-    while True:
-        fin = inicio + page_size - 1
-        url = f"{BASE}/api/catalog_system/pub/products/search/?_from={inicio}&_to={fin}"
-        r = requests.get(url, headers=HEADERS, timeout=30)
-        r.raise_for_status()
-        data = r.json()
+def _pagina(base, inicio, fin, fq=()):
+    """
+    Una pagina de busqueda -> (productos, total que reporta VTEX o None).
+    """
+    filtros = "".join(f"&fq={quote(f, safe=':/[]')}" for f in fq)
+    url = f"{base}/api/catalog_system/pub/products/search/?_from={inicio}&_to={fin}{filtros}"
+    r = http_pool.fetch(url, headers=HEADERS, timeout=30)
+    r.raise_for_status()
+    # header "resources: 0-49/1234" trae el total de la busqueda
+    total = None
+    recursos = r.headers.get("resources", "")
+    if "/" in recursos:
+        try:
+            total = int(recursos.rsplit("/", 1)[1])
+        except ValueError:
+            total = None
+    return json_decode.response_json(r), total
+
+
+def iter_paginas(page_size=50, pausa=0, inicio=0, base=None, fq=()):
+    """
+    Pagina el catalogo desde `inicio` y entrega (inicio, productos) por pagina.
+    `fq` restringe la busqueda (ej. ["C:/1/2/"]) para crawls por particion.
+    VTEX no pagina mas alla de MAX_FROM: si la busqueda tiene mas productos
+    avisa (warning) en vez de cortar callado; para el catalogo completo usar
+    crawl_tienda.
+    """
+    base = base or BASE
+    total = None
+    while inicio < MAX_FROM:
+        fin = min(inicio + page_size, MAX_FROM) - 1
+        data, total_pagina = _pagina(base, inicio, fin, fq)
+        total = total if total_pagina is None else total_pagina
 
         if not data:
             break
 
-        todos.extend(data)
+        lookup_common.ID_INDEX.learn_products(store_for_base(base), data)
+        yield inicio, data
         inicio += page_size
-        time.sleep(pausa)
+        _pausa(pausa)
+    else:
+        if total is None or total > MAX_FROM:
+            cantidad = total if total is not None else f"mas de {MAX_FROM}"
+            warnings.warn(
+                f"La busqueda tiene {cantidad} productos y VTEX corta en _from={MAX_FROM}; usar crawl_tienda",
+                stacklevel=2,
+            )
+
+
+def _clave(product_id):
+    # ids numericos como int: el set de vistos ocupa mucho menos que con str
+    text = str(product_id)
+    return int(text) if text.isdigit() else text
+
+
+def iter_productos(page_size=50, pausa=0, inicio=0, vistos=None):
+    """
+    Entrega productos a medida que llegan las paginas, sin repetir productId.
+    """
+    vistos = set() if vistos is None else vistos
+    for _, data in iter_paginas(page_size, pausa, inicio):
+        for p in data:
+            if not p.get("productId"):
+                continue
+            clave = _clave(p["productId"])
+            if clave in vistos:
+                continue
+            vistos.add(clave)
+            yield p
+
+
+def extraer_todos(page_size=50, pausa=0, store="metro", workers=CRAWL_WORKERS):
+    """
+    Catalogo completo de `store` con el crawl por particiones (crawl_tienda),
+    sin el techo de MAX_FROM. Si aun asi faltan productos contra el total
+    que reporta la tienda, crawl_tienda avisa con un warning.
+    """
+    return crawl_tienda(store, workers, page_size, pausa)[0]
+
+
+def _leer_checkpoint(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _guardar_checkpoint(path, estado):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(estado, f)
+    os.replace(tmp, path)
+
+
+def _cargar_vistos(path):
+    """
+    Reconstruye los productId ya exportados y corta una ultima linea a medias.
+    """
+    vistos = set()
+    if not os.path.exists(path):
+        return vistos
+
+    valido = 0
+    with open(path, "rb") as f:
+        for linea in f:
+            if not linea.endswith(b"\n"):
+                break
+            try:
+                vistos.add(_clave(json.loads(linea)["productId"]))
+            except (ValueError, KeyError):
+                break
+            valido += len(linea)
+    with open(path, "r+b") as f:
+        f.truncate(valido)
+    return vistos
+
+
+def exportar_ndjson(path, checkpoint=None, page_size=50, pausa=0, store="metro", workers=CRAWL_WORKERS):
+    """
+    Exporta el catalogo de `store` a NDJSON (un producto por linea) con el
+    crawl por particiones (iter_particiones), asi que no se corta en
+    MAX_FROM. Cada pagina se escribe apenas llega y en `checkpoint` queda
+    por donde iba cada particion (su cursor: pedazo de precio y _from) y
+    cuales terminaron sin truncar: si se cae, volver a llamar sigue desde
+    ahi. Devuelve cuantos productos hay en el archivo.
+    La exportacion queda "completo" solo si ninguna particion quedo truncada
+    y no faltan productos contra el total de la tienda; si no, avisa
+    (warning) y la siguiente llamada reintenta lo pendiente. Una exportacion
+    completa hay que borrarla (checkpoint) para volver a empezar.
+    """
+    checkpoint = checkpoint or path + ".ckpt"
+    estado = _leer_checkpoint(checkpoint)
+    if estado and estado.get("completo"):
+        return estado.get("exportados", 0)
+
+    # un checkpoint viejo (por _from) no trae particiones: se rehacen todas
+    # y los productos ya escritos se saltan por productId
+    hechas = set((estado or {}).get("particiones", []))
+    cursores = dict((estado or {}).get("cursores", {}))
+    vistos = _cargar_vistos(path) if estado else set()
+    base = STORES[store]["base"]
+    total = total_reportado(base)
+    particiones = particiones_tienda(base)
+    pendientes = [fq for fq in particiones if fq not in hechas]
+
+    def guardar(completo=False, faltantes=None):
+        _guardar_checkpoint(
+            checkpoint,
+            {
+                "particiones": sorted(hechas),
+                "cursores": cursores,
+                "exportados": len(vistos),
+                "total_reportado": total,
+                "faltantes": faltantes,
+                "completo": completo,
+            },
+        )
+
+    def escribir(out, eventos):
+        for fq, cursor, productos, reportes in eventos:
+            if cursor is None:
+                # una particion truncada no queda hecha y se rehace entera
+                cursores.pop(fq, None)
+                if not any(r["truncado"] for r in reportes):
+                    hechas.add(fq)
+                guardar()
+                continue
+            for p in productos:
+                if not p.get("productId"):
+                    continue
+                clave = _clave(p["productId"])
+                if clave in vistos:
+                    continue
+                vistos.add(clave)
+                out.write(json.dumps(p, ensure_ascii=False) + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+            cursores[fq] = cursor
+            guardar()
+
+    with open(path, "a" if estado else "w", encoding="utf-8") as out:
+        escribir(out, iter_particiones(base, pendientes, workers, page_size, pausa, dict(cursores)))
+        if falta_resto(particiones, total, len(vistos)) and PARTICION_RESTO not in hechas:
+            escribir(out, iter_particiones(base, [PARTICION_RESTO], 1, page_size, pausa, dict(cursores)))
+
+    faltantes = None if total is None else max(0, total - len(vistos))
+    completo = all(fq in hechas for fq in particiones) and not faltantes
+    guardar(completo, faltantes)
+    if not completo:
+        warnings.warn(
+            f"{store}: exportacion incompleta ({len(vistos)} de {total} productos, "
+            f"{len(particiones) - len(hechas & set(particiones))} particiones pendientes); "
+            "volver a correr para reintentar",
+            stacklevel=2,
+        )
+    return len(vistos)
+
+
+# Crawl completo por particiones (categorias y rangos de precio)
+def arbol_categorias(base, niveles=NIVELES_ARBOL):
+    url = f"{base}/api/catalog_system/pub/category/tree/{niveles}"
+    r = http_pool.fetch(url, headers=HEADERS, timeout=30)
+    r.raise_for_status()
+    return json_decode.response_json(r) or []
+
+
+def particiones_categorias(arbol, prefijo="/"):
+    """
+    Hojas del arbol como filtros fq=C:/1/2/3/ (misma forma que `categories`).
+    """
+    for nodo in arbol:
+        ruta = f"{prefijo}{nodo['id']}/"
+        hijos = nodo.get("children") or []
+        if hijos:
+            yield from particiones_categorias(hijos, ruta)
+        else:
+            yield f"C:{ruta}"
+
+
+def particiones_tienda(base):
+    """
+    Particiones de una tienda: las categorias hoja o, si el arbol viene
+    vacio, una sola particion sin filtro ("").
+    """
+    return list(particiones_categorias(arbol_categorias(base))) or [""]
+
+
+def _iter_pedazo(base, fq, page_size, pausa, rango=None, inicio=0, profundidad=0):
+    """
+    Pagina un pedazo de particion (`fq` mas el rango de precio) desde
+    `inicio` y entrega cada pagina apenas llega: ([rango, siguiente _from],
+    productos, []). Si llega al techo de MAX_FROM lo parte por rango de
+    precio (fq=P:[a TO b]) hasta que cada pedazo quepa, recorriendo las
+    mitades de menor a mayor precio. Las mitades comparten el precio del
+    medio ([a TO m] y [m TO b]): los precios VTEX tienen decimales y con
+    [m+1 TO b] se perderia todo lo que cae entre m y m+1; lo repetido en el
+    borde se descarta por productId. Al terminar cada pedazo que no se
+    partio entrega (None, [], [reporte]).
+    """
+    filtros = list(fq)
+    if rango:
+        filtros.append(f"P:[{rango[0]} TO {rango[1]}]")
+
+    encontrados = 0
+    paginas = 0
+    total = None
+    while inicio < MAX_FROM:
+        fin = min(inicio + page_size, MAX_FROM) - 1
+        data, total_pagina = _pagina(base, inicio, fin, filtros)
+        total = total if total_pagina is None else total_pagina
+        if not data:
+            break
+        lookup_common.ID_INDEX.learn_products(store_for_base(base), data)
+        encontrados += len(data)
+        paginas += 1
+        inicio += page_size
+        yield [rango, inicio], data, []
+        _pausa(pausa)
+
+    truncado = inicio >= MAX_FROM and (total is None or total > MAX_FROM)
+    mitades = None
+    if truncado and profundidad < MAX_DIVISIONES:
+        lo, hi = rango or (0, PRECIO_MAX)
+        if hi - lo > 1:
+            medio = (lo + hi) // 2
+            mitades = ((lo, medio), (medio, hi))
+            # si ninguna mitad achica el total, la tienda ignora fq=P y
+            # partir mas no sirve
+            totales = [_pagina(base, 0, 0, list(fq) + [f"P:[{a} TO {b}]"])[1] for a, b in mitades]
+            if total is not None and all(t == total for t in totales):
+                mitades = None
+            else:
+                mitades = [m for m, t in zip(mitades, totales) if t != 0]
+
+    if mitades:
+        for sub in mitades:
+            yield from _iter_pedazo(base, fq, page_size, pausa, sub, 0, profundidad + 1)
+        return
+
+    reporte = {
+        "particion": " & ".join(filtros) or "(todo)",
+        "paginas": paginas,
+        "productos": encontrados,
+        "total_reportado": total,
+        "truncado": truncado,
+    }
+    yield None, [], [reporte]
+
+
+def iter_particion(base, fq, page_size=50, pausa=0, cursor=None):
+    """
+    Paginas de una particion a medida que llegan: (cursor, productos, [])
+    por pagina y, al final, (None, [], reportes de cobertura). `fq` es el
+    filtro de la particion ("" = sin filtro, PARTICION_RESTO = la particion
+    resto). `cursor` es el de la ultima pagina guardada: como los pedazos
+    se recorren de menor a mayor precio, retomar es seguir ese pedazo desde
+    su _from y despues todo lo que cuesta mas que su tope.
+    """
+    filtros = [fq] if fq and fq != PARTICION_RESTO else []
+    rango, inicio = cursor or (None, 0)
+    pedazos = [(rango, inicio)]
+    if rango and rango[1] < PRECIO_MAX:
+        pedazos.append(((rango[1], PRECIO_MAX), 0))
+
+    reportes = []
+    for sub, desde in pedazos:
+        for siguiente, productos, reporte in _iter_pedazo(base, filtros, page_size, pausa, sub, desde):
+            if siguiente is None:
+                reportes.extend(reporte)
+            else:
+                yield siguiente, productos, []
+    if fq == PARTICION_RESTO:
+        for r in reportes:
+            r["particion"] = PARTICION_RESTO if r["particion"] == "(todo)" else f"{PARTICION_RESTO} & {r['particion']}"
+    yield None, [], reportes
+
+
+def total_reportado(base, fq=()):
+    """
+    Total de productos que reporta VTEX para una busqueda (header resources),
+    o None si no lo manda.
+    """
+    return _pagina(base, 0, 0, fq)[1]
+
+
+def iter_particiones(base, particiones, workers=CRAWL_WORKERS, page_size=50, pausa=0, cursores=None):
+    """
+    iter_particion de cada fq de `particiones` con `workers` hilos, entregando
+    las paginas a medida que llegan: (fq, cursor, productos, []) por pagina
+    y (fq, None, [], reportes) cuando una particion termina. Nunca hay mas
+    de `workers` particiones en vuelo y los hilos esperan si el consumidor
+    no da abasto (cola acotada), asi que la memoria no crece con la tienda.
+    `cursores` ({fq: cursor}) retoma particiones que quedaron a medias.
+    """
+    cursores = cursores or {}
+    workers = max(1, workers)
+    eventos = queue.Queue(maxsize=2 * workers)
+    parar = threading.Event()
+
+    def poner(evento):
+        while not parar.is_set():
+            try:
+                eventos.put(evento, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def correr(fq):
+        try:
+            for cursor, productos, reportes in iter_particion(base, fq, page_size, pausa, cursores.get(fq)):
+                if not poner((fq, cursor, productos, reportes)):
+                    return
+        finally:
+            # fin del hilo (termino o fallo): libera el lugar en vuelo
+            poner((fq, None, None, None))
+
+    pendientes = iter(particiones)
+    en_vuelo = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+
+        def lanzar():
+            for fq in pendientes:
+                en_vuelo[fq] = pool.submit(correr, fq)
+                return
+
+        try:
+            for _ in range(workers):
+                lanzar()
+            while en_vuelo:
+                fq, cursor, productos, reportes = eventos.get()
+                if productos is None:
+                    en_vuelo.pop(fq).result()  # relanza el error del hilo
+                    lanzar()
+                    continue
+                yield fq, cursor, productos, reportes
+        finally:
+            parar.set()
+
+
+def falta_resto(particiones, total, encontrados):
+    # solo si se partio por categorias y no alcanzaron el total de la tienda
+    return RESTO and particiones != [""] and total is not None and encontrados < total
+
+
+def crawl_tienda(store, workers=CRAWL_WORKERS, page_size=50, pausa=0, compact=False):
+    """
+    Crawl completo de una tienda de STORES, partiendo el catalogo por
+    categorias hoja (y por precio si una categoria pasa de MAX_FROM) y
+    recorriendo las particiones en paralelo con `workers` hilos. Si las
+    hojas no alcanzan el total que reporta la tienda, recorre tambien la
+    particion "resto" (PARTICION_RESTO).
+    Devuelve (productos sin repetir, reporte de cobertura por particion,
+    faltantes): faltantes = total de la tienda - productos encontrados (None
+    si la tienda no reporta total); si faltan, avisa con un warning.
+    Con compact=True los productos quedan como records.Product (precios en
+    centavos, sin el JSON crudo); product.to_dict() vuelve al formato VTEX.
+    """
+    base = STORES[store]["base"]
+    total = total_reportado(base)
+    particiones = particiones_tienda(base)
+
+    vistos = set()
+    productos = []
+    cobertura = []
+
+    def agregar(encontrados, reportes):
+        for p in encontrados:
+            if not p.get("productId"):
+                continue
+            clave = _clave(p["productId"])
+            if clave not in vistos:
+                vistos.add(clave)
+                productos.append(Product.from_vtex(p) if compact else p)
+        cobertura.extend(reportes)
+
+    for _, _, encontrados, reportes in iter_particiones(base, particiones, workers, page_size, pausa):
+        agregar(encontrados, reportes)
+    if falta_resto(particiones, total, len(vistos)):
+        for _, _, encontrados, reportes in iter_particiones(base, [PARTICION_RESTO], 1, page_size, pausa):
+            agregar(encontrados, reportes)
+
+    faltantes = None if total is None else max(0, total - len(vistos))
+    if faltantes:
+        warnings.warn(f"{store}: faltan {faltantes} productos contra el total de la tienda", stacklevel=2)
+    return productos, cobertura, faltantes
+
+
+def crawl_todas(workers=CRAWL_WORKERS, page_size=50, pausa=0, compact=False):
+    """
+    crawl_tienda para cada tienda de STORES -> {store: (productos, cobertura, faltantes)}.
+    """
+    return {store: crawl_tienda(store, workers, page_size, pausa, compact) for store in STORES}
 
-    # deduplicar por productId
-    unicos = {p.get("productId"): p for p in todos if p.get("productId")}
-    return list(unicos.values())
 
-productos = extraer_todos()
-print("Total productos:", len(productos))
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--particiones":
+        # python SKU.py --particiones  -> crawl por categorias de todas las tiendas,
+        # guardado en catalogo.sqlite
+        for store, (productos, cobertura, faltantes) in crawl_todas(compact=True).items():
+            lookup_common.CATALOG.save_products(store, productos)
+            truncadas = sum(1 for c in cobertura if c["truncado"])
+            print(
+                f"{store}: {len(productos)} productos, {len(cobertura)} particiones, {truncadas} truncadas, "
+                f"{'?' if faltantes is None else faltantes} faltantes"
+            )
+    elif len(sys.argv) > 1:
+        # python SKU.py catalogo.ndjson  -> exporta por streaming, reanudable
+        total = exportar_ndjson(sys.argv[1])
+        print("Total productos:", total)
+    else:
+        productos = extraer_todos()
+        print("Total productos:", len(productos))
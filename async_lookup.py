@@ -0,0 +1,652 @@
+import asyncio
+import socket
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import certifi
+import requests
+
+import circuit_breaker
+import deadline
+import http_pool
+import json_decode
+import lookup_common
+import metrics
+import rate_limit
+from cascade import run_named_cascade
+from code_classifier import classify
+from product_cache import product_valid_until
+from product_summary import build_summary, cached_summary, degraded, summary_fields
+from response_memo import STATUS_CONCLUYENTES, ResponseMemo
+
+try:
+    import aiohttp
+except ModuleNotFoundError:
+    aiohttp = None
+
+# Motor de busquedas: la unica implementacion de las cascadas (precio,
+# producto, Éxito y resumen). Las funciones de BusquedaSKU.py y
+# BusquedaSKU-Informacion.py son envoltorios que corren estas corrutinas en
+# un event loop de fondo (run_blocking) con su propio http_get.
+
+MAX_POR_HOST = 8  # requests en vuelo por tienda
+BLOCKING_WORKERS = 32  # hilos para el http_get bloqueante y las consultas SQLite
+
+BLOCKING_POOL = ThreadPoolExecutor(max_workers=BLOCKING_WORKERS, thread_name_prefix="lookup")
+
+_loop = None
+_loop_thread = None
+_loop_lock = threading.Lock()
+
+
+def background_loop():
+    """
+    Event loop compartido por los envoltorios sincronicos, en un hilo
+    daemon que se crea la primera vez.
+    """
+    global _loop, _loop_thread
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(target=_loop.run_forever, name="lookup-loop", daemon=True)
+            _loop_thread.start()
+        return _loop
+
+
+def run_blocking(coro):
+    """
+    Corre `coro` en el event loop de fondo y espera el resultado desde un
+    hilo normal. La corrutina hereda el contexto de quien llama, asi que el
+    plazo de deadline.within(...) sigue valiendo adentro.
+    """
+    loop = background_loop()
+    if threading.current_thread() is _loop_thread:
+        coro.close()
+        raise RuntimeError("run_blocking no se puede llamar desde el event loop del motor")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+class AsyncMemo:
+    """
+    Memo por pregunta para asyncio: guarda la tarea de cada URL, asi que
+    dos pasos que piden la misma URL esperan el mismo request.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+        self._failed = set()
+
+    async def fetch(self, url: str, loader):
+        task = self._tasks.get(url)
+        if task is None:
+            task = asyncio.ensure_future(loader(url))
+            self._tasks[url] = task
+        try:
+            return await asyncio.shield(task)
+        except Exception:
+            self._tasks.pop(url, None)
+            raise
+
+    def mark_failed(self, url: str):
+        self._failed.add(url)
+
+    def has_failures(self, prefix: str = "") -> bool:
+        return any(url.startswith(prefix) for url in self._failed)
+
+
+class AsyncLookup:
+    """
+    Busquedas con asyncio y concurrencia acotada por host (MAX_POR_HOST).
+
+    Con `http_get` (url -> requests.Response, ej. el de cada script) cada
+    GET corre en BLOCKING_POOL por http_pool y el memo es un ResponseMemo;
+    asi lo usan los envoltorios sincronicos. Sin `http_get` usa aiohttp (o
+    lookup_common.http_get en hilos si aiohttp no esta instalado). Con
+    aiohttp verifica contra el bundle de certifi y solo reintenta sin
+    verificar ante un error SSL si se pide ssl_fallback=True (como
+    lookup_common.http_get).
+
+        async with AsyncLookup() as engine:
+            data = await engine.summarize_store_product("metro", "7702213400181")
+    """
+
+    def __init__(self, max_per_host: int = MAX_POR_HOST, http_get=None, ssl_fallback=False):
+        self.max_per_host = max_per_host
+        if http_get is None and aiohttp is None:
+            http_get = lookup_common.http_get
+        self.blocking_get = http_get
+        self.ssl_fallback = ssl_fallback
+        self._ssl_context = None
+        self._semaphores = {}
+        self._session = None
+        self._inflight = {}  # single-flight por URL y por (tienda, codigo)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def new_memo(self):
+        """
+        Memo por pregunta del tipo que usa este motor.
+        """
+        return ResponseMemo() if self.blocking_get is not None else AsyncMemo()
+
+    def _semaphore(self, url: str) -> asyncio.Semaphore:
+        key = http_pool.host_key(url)
+        sem = self._semaphores.get(key)
+        if sem is None:
+            sem = self._semaphores[key] = asyncio.Semaphore(self.max_per_host)
+        return sem
+
+    @staticmethod
+    async def _offload(fn, *args):
+        """
+        fn(*args) bloqueante (red o SQLite) en BLOCKING_POOL, con el plazo
+        actual.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(BLOCKING_POOL, deadline.bound(fn), *args)
+
+    async def _single(self, key, factory):
+        """
+        Si ya hay una tarea en vuelo para `key` la espera; si no, la crea con
+        factory(). Resultado o excepcion se comparten entre todos. Quien
+        espera no pasa de su propio plazo, aunque la tarea tenga uno mas largo.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finished(key, t))
+        done, _ = await asyncio.wait([task], timeout=deadline.remaining())
+        if not done:
+            raise deadline.DeadlineExceeded("Se acabo el plazo esperando una consulta en vuelo")
+        return task.result()
+
+    def _finished(self, key, task):
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            # si todos los que esperaban se fueron por su plazo nadie la lee:
+            # sin esto asyncio avisa "Task exception was never retrieved"
+            task.exception()
+
+    def _verify(self):
+        if self._ssl_context is None:
+            self._ssl_context = ssl.create_default_context(cafile=certifi.where())
+        return self._ssl_context
+
+    def _client(self):
+        if self._session is None:
+            timeout = aiohttp.ClientTimeout(total=lookup_common.TIMEOUT)
+            self._session = aiohttp.ClientSession(timeout=timeout)
+        return self._session
+
+    # GET CENTRAL
+    async def http_get(self, url: str):
+        """
+        GET -> (status_code, cuerpo en bytes). Mismos reintentos, limitador
+        y circuit breaker por host, plazo (deadline), fallback SSL (solo con
+        ssl_fallback) y excepciones (requests.exceptions) que
+        http_pool.fetch. La misma URL en vuelo se pide una sola vez.
+        """
+        return await self._single(("url", url), lambda: self._http_get(url))
+
+    async def _http_get(self, url: str):
+        async with self._semaphore(url):
+            if self.blocking_get is not None:
+                r = await self._offload(self.blocking_get, url)
+                return r.status_code, r.content
+            return await self._aiohttp_get(url)
+
+    async def _aiohttp_get(self, url: str):
+        key = http_pool.host_key(url)
+        limiter = rate_limit.limiter_for(key)
+        breaker = circuit_breaker.breaker_for(key)
+        session = self._client()
+        verify = self._verify()
+        last = None  # (status, body) de la ultima respuesta reintentable
+        labels = None
+        if metrics.ENABLED:
+            labels = {"store": metrics.store_for(url), "endpoint": metrics.endpoint_for(url)}
+
+        def out_of_time():
+            if last is not None:
+                return last
+            if labels:
+                metrics.inc("deadline_exceeded_total", **labels)
+            raise deadline.DeadlineExceeded(f"Sin tiempo para pedir {url}")
+
+        async def send():
+            timeout = aiohttp.ClientTimeout(total=deadline.cap(lookup_common.TIMEOUT))
+            async with session.get(url, headers=lookup_common.HEADERS, ssl=verify, timeout=timeout) as r:
+                retry_after = rate_limit.parse_retry_after(r.headers.get("Retry-After"))
+                return r.status, retry_after, await r.read()
+
+        for attempt in range(lookup_common.RETRIES + 1):
+            wait = limiter.try_acquire()
+            while wait:
+                if not deadline.allows(wait):
+                    return out_of_time()
+                await asyncio.sleep(wait)
+                wait = limiter.try_acquire()
+            if deadline.expired():
+                return out_of_time()
+            if not breaker.allow():
+                if labels:
+                    metrics.inc("circuit_open_total", **labels)
+                raise circuit_breaker.CircuitOpen(f"{key} en pausa por fallos repetidos")
+
+            capped = deadline.cap(lookup_common.TIMEOUT) < lookup_common.TIMEOUT
+            started = time.monotonic()
+            try:
+                try:
+                    status, retry_after, body = await send()
+                except aiohttp.ClientSSLError:
+                    if not self.ssl_fallback or verify is False:
+                        raise
+                    # igual que http_pool.fetch con ssl_fallback: reintenta
+                    # sin verificar, dentro del mismo intento
+                    verify = False
+                    if labels:
+                        metrics.inc("http_ssl_fallback_total", **labels)
+                    status, retry_after, body = await send()
+            except aiohttp.ClientSSLError as e:
+                limiter.on_error()
+                breaker.release()
+                raise requests.exceptions.SSLError(f"Error SSL pidiendo {url}: {e}") from e
+            except asyncio.CancelledError:
+                breaker.release()  # cascada especulativa: otro paso gano
+                raise
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                timed_out = isinstance(e, asyncio.TimeoutError)
+                expired = deadline.expired() or (capped and timed_out)
+                if not expired:
+                    limiter.on_error()
+                if circuit_breaker.is_host_failure(e, expired):
+                    breaker.on_failure()
+                else:
+                    breaker.release()  # el corte fue nuestro
+                dns = isinstance(getattr(e, "os_error", None), socket.gaierror)
+                retrying = not dns and not expired and attempt < lookup_common.RETRIES
+                if labels:
+                    reason = ("timeout" if timed_out else type(e).__name__) if retrying else None
+                    metrics.record_request(labels, "error", time.monotonic() - started, reason, timed_out)
+                if expired:
+                    raise deadline.DeadlineExceeded(f"Se acabo el plazo pidiendo {url}") from e
+                if not retrying:
+                    # mismas excepciones que http_pool.fetch
+                    if timed_out:
+                        raise requests.exceptions.Timeout(f"Timeout pidiendo {url}") from e
+                    raise requests.exceptions.ConnectionError(f"Error de red pidiendo {url}: {e}") from e
+                delay = rate_limit.backoff_delay(attempt, lookup_common.BACKOFF)
+                if not deadline.allows(delay):
+                    raise deadline.DeadlineExceeded(f"Sin tiempo para reintentar {url}") from e
+                await asyncio.sleep(delay)
+                continue
+
+            latency = time.monotonic() - started
+            if status >= 500:
+                breaker.on_failure()
+            else:
+                breaker.on_success()
+            limiter.on_response(status, latency, retry_after)
+            done = status not in rate_limit.STATUS_REINTENTABLES or attempt >= lookup_common.RETRIES
+            if labels:
+                metrics.record_request(labels, status, latency, None if done else status)
+            if done:
+                return status, body
+            last = status, body
+            if retry_after is None:
+                delay = rate_limit.backoff_delay(attempt, lookup_common.BACKOFF)
+                if not deadline.allows(delay):
+                    return last
+                await asyncio.sleep(delay)
+        # el ultimo intento siempre devuelve o lanza; esto queda por si acaso
+        return out_of_time()
+
+    async def get_json(self, url: str, memo=None, match=None, keep_first=False):
+        """
+        Igual que lookup_common.get_json: (status_code, data) y, con `match`,
+        solo los productos que mencionan ese itemId/EAN.
+        """
+        if self.blocking_get is not None:
+            async with self._semaphore(url):
+                return await self._offload(
+                    lookup_common.get_json, url, memo, match, keep_first, self.blocking_get
+                )
+
+        async def load(_):
+            status, body = await self.http_get(url)
+            if memo is not None and status not in STATUS_CONCLUYENTES:
+                memo.mark_failed(url)
+            if status >= 400:
+                data = None
+            elif match is not None and status == 200:
+                data = json_decode.select_products(body, [match], keep_first)
+            else:
+                data = json_decode.loads(body)
+            if data and isinstance(data, list):
+                await self._offload(lookup_common.ID_INDEX.learn_products, lookup_common.store_for_url(url), data)
+            return status, data
+
+        if memo is None:
+            return await load(url)
+        key = url if match is None else (url, str(match), keep_first)
+        return await memo.fetch(key, load)
+
+    async def _local_product(self, store: str, code: str, local_first):
+        # catalogo local (lookup_common.local_product) solo si esta activo
+        if not (lookup_common.LOCAL_FIRST if local_first is None else local_first):
+            return None
+        return await self._offload(lookup_common.local_product, store, code, True)
+
+    async def get_price_vtex(self, base: str, code: str, speculative=None, memo=None, local_first=None):
+        """
+        1) skuId: fq=skuId:<code>
+        2) EAN:  fq=alternateIds_Ean:<code>
+        3) fallback: ft=<code> y valida itemId/ean
+
+        El orden de 1) y 2) lo decide STRATEGY_STATS: un GTIN valido va primero
+        por EAN, y lo aprendido por tienda y forma de codigo ajusta el resto.
+        speculative=True (o SPECULATIVE) lanza los 3 pasos a la vez y se queda
+        con el primero valido en ese mismo orden.
+
+        Los resultados quedan en PRODUCT_CACHE por (tienda, codigo) y los
+        "no encontrado" limpios en NEGATIVE_CACHE. Con local_first (o
+        LOCAL_FIRST) primero se mira el catalogo local (local_product).
+        """
+        store = lookup_common.store_for_base(base)
+        cache_key = ("price", store, str(code))
+        cached = lookup_common.PRODUCT_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+        if lookup_common.NEGATIVE_CACHE.get(cache_key):
+            return None
+        local = await self._local_product(store, code, local_first)
+        if local is not None:
+            res = lookup_common.extract_vtex(local[0], code)
+            if res and res[0] is not None:
+                return res
+        return await self._single(cache_key, lambda: self._get_price_vtex(base, code, speculative, memo))
+
+    async def _get_price_vtex(self, base: str, code: str, speculative, memo):
+        store = lookup_common.store_for_base(base)
+        cache_key = ("price", store, str(code))
+        if memo is None:
+            memo = self.new_memo()
+
+        def by_filter(fq):
+            async def step():
+                url = f"{base}/api/catalog_system/pub/products/search/?fq={fq}"
+                status, data = await self.get_json(url, memo)
+                if status == 200 and data:
+                    res = lookup_common.extract_vtex(data[0], code)
+                    if res and res[0] is not None:
+                        return res, data[0]
+                return None
+            return step
+
+        async def by_text():
+            url = f"{base}/api/catalog_system/pub/products/search/?ft={code}"
+            status, data = await self.get_json(url, memo, match=code)
+            if status == 200:
+                for p in data:
+                    res = lookup_common.extract_vtex(p, code)
+                    if res and res[0] is not None:
+                        return res, p
+            return None
+
+        steps = {
+            "sku": by_filter(f"skuId:{code}"),  # 1) skuId
+            "ean": by_filter(f"alternateIds_Ean:{code}"),  # 2) EAN
+            "ft": by_text,  # 3) fallback ft
+        }
+        order, known_item = await self._offload(lookup_common.vtex_lookup_order, store, code)
+        if known_item:
+            steps["index"] = by_filter(f"skuId:{known_item}")
+        speculative = lookup_common.SPECULATIVE if speculative is None else speculative
+        winner, found = await run_named_cascade(steps, order, speculative)
+        lookup_common.record_cascade(store, code, order, winner)
+        if found is None:
+            # solo cachea el miss si todas las respuestas fueron 200/404
+            if not memo.has_failures(base):
+                lookup_common.NEGATIVE_CACHE.put(cache_key, True)
+            return None
+
+        res, product = found
+        lookup_common.PRODUCT_CACHE.put(cache_key, res, valid_until=product_valid_until(product))
+        return res
+
+    async def get_product_vtex(self, base: str, code: str, speculative=None, memo=None):
+        """
+        Documento VTEX completo, por la misma cascada (y el mismo orden
+        aprendido) que get_price_vtex.
+        """
+        if memo is None:
+            memo = self.new_memo()
+
+        def by_filter(fq):
+            async def step():
+                url = f"{base}/api/catalog_system/pub/products/search/?fq={fq}"
+                status, data = await self.get_json(url, memo)
+                return data[0] if status == 200 and data else None
+            return step
+
+        # 3) fallback: busqueda por texto ft
+        async def by_text():
+            url = f"{base}/api/catalog_system/pub/products/search/?ft={code}"
+            status, data = await self.get_json(url, memo, match=code, keep_first=True)
+            return lookup_common.pick_text_match(data, code) if status == 200 and data else None
+
+        steps = {
+            "sku": by_filter(f"skuId:{code}"),  # 1) skuId directo
+            "ean": by_filter(f"alternateIds_Ean:{code}"),  # 2) EAN
+            "ft": by_text,
+        }
+        store = lookup_common.store_for_base(base)
+        order, known_item = await self._offload(lookup_common.vtex_lookup_order, store, code)
+        if known_item:
+            steps["index"] = by_filter(f"skuId:{known_item}")
+        speculative = lookup_common.SPECULATIVE if speculative is None else speculative
+        winner, product = await run_named_cascade(steps, order, speculative)
+        lookup_common.record_cascade(store, code, order, winner, kind="product")
+        return product
+
+    # Éxito (EAN -> itemId -> getProductBySku)
+    async def get_price_exito_by_skuid(self, skuid: str, memo=None):
+        """
+        Endpoint de Éxito por skuId interno (itemId).
+        """
+        url = f"{lookup_common.STORES['exito']['base']}/api/product/getProductBySku?skuid={skuid}"
+        status, data = await self.get_json(url, memo)
+        if status >= 400:
+            return None
+        return lookup_common.exito_price_from_sku(data)
+
+    async def get_exito_itemid_from_ean(self, ean: str, memo=None):
+        """
+        Busca en el catálogo VTEX de Éxito por EAN y devuelve el itemId (skuid interno).
+        """
+        known_item = await self._offload(lookup_common.ID_INDEX.item_for_ean, "exito", ean)
+        if known_item:
+            return known_item
+
+        base = lookup_common.STORES["exito"]["base"]
+        url = f"{base}/api/catalog_system/pub/products/search/?fq=alternateIds_Ean:{ean}"
+        status, data = await self.get_json(url, memo)
+        if status != 200:
+            return None
+        return lookup_common.exito_itemid_from_search(data, ean)
+
+    async def get_price_exito(self, code: str, memo=None):
+        """
+        - Si code parece EAN (13+ dígitos): EAN -> itemId -> getProductBySku
+        - Si code es skuId: intenta directo
+        """
+        cache_key = ("price", "exito", str(code))
+        if lookup_common.NEGATIVE_CACHE.get(cache_key):
+            return None
+        return await self._single(cache_key, lambda: self._get_price_exito(code, memo))
+
+    async def _get_price_exito(self, code: str, memo):
+        if memo is None:
+            memo = self.new_memo()
+
+        # intenta directo por si el usuario pasó skuid
+        async def direct():
+            return await self.get_price_exito_by_skuid(code, memo)
+
+        # si no, asume EAN y convierte
+        async def by_ean():
+            itemid = await self.get_exito_itemid_from_ean(code, memo)
+            return await self.get_price_exito_by_skuid(itemid, memo) if itemid else None
+
+        order = await self._offload(lookup_common.exito_lookup_order, code)
+        winner, res = await run_named_cascade({"sku": direct, "ean": by_ean}, order)
+        lookup_common.record_cascade("exito", code, order, winner)
+        if res is None and not memo.has_failures(lookup_common.STORES["exito"]["base"]):
+            lookup_common.NEGATIVE_CACHE.put(("price", "exito", str(code)), True)
+        return res
+
+    async def get_product_exito(self, code: str, memo=None):
+        """
+        Devuelve un dict con información "completa" desde:
+        - VTEX (si el code era EAN o se puede encontrar)
+        - Endpoint de Éxito getProductBySku (por itemId/skuid)
+        """
+        if memo is None:
+            memo = self.new_memo()
+        base = lookup_common.STORES["exito"]["base"]
+        search = f"{base}/api/catalog_system/pub/products/search/"
+
+        async def by_ean():
+            # itemId por EAN; el producto VTEX completo ya quedo en el memo
+            itemid = await self.get_exito_itemid_from_ean(code, memo)
+            if not itemid:
+                return None
+            status, data = await self.get_json(f"{search}?fq=alternateIds_Ean:{code}", memo)
+            return itemid, (data[0] if status == 200 and data else None)
+
+        async def by_skuid():
+            status, data = await self.get_json(f"{search}?fq=skuId:{code}", memo)
+            return code, (data[0] if status == 200 and data else None)
+
+        async def exito_sku_for(skuid):
+            status, data = await self.get_json(
+                f"{base}/api/product/getProductBySku?skuid={skuid}", memo
+            )
+            return data if status == 200 else None
+
+        # Un GTIN valido va directo al EAN; un id interno se salta esa busqueda
+        # y solo vuelve a ella si por skuId no aparece nada.
+        is_ean = classify(code) == "ean"
+        resolved = await by_ean() if is_ean else None
+        skuid, vtex_product = resolved if resolved is not None else await by_skuid()
+        exito_sku = await exito_sku_for(skuid)
+
+        if not vtex_product and not exito_sku and not is_ean:
+            resolved = await by_ean()
+            if resolved is not None:
+                skuid, vtex_product = resolved
+                exito_sku = await exito_sku_for(skuid)
+
+        lookup_common.record_exito_product(resolved is not None, bool(vtex_product or exito_sku))
+        return {"skuid": skuid, "vtex_product": vtex_product, "exito_sku": exito_sku}
+
+    async def resolve_store_product(self, store: str, code: str, memo=None):
+        """
+        Documento del producto en la tienda -> (producto VTEX, itemId o None,
+        respuesta getProductBySku o None), o None si no aparece.
+        """
+        if store == "exito":
+            data = await self.get_product_exito(code, memo)
+            if not data["vtex_product"] and not data["exito_sku"]:
+                return None
+            return data["vtex_product"] or {}, data.get("skuid", code), data.get("exito_sku")
+
+        product = await self.get_product_vtex(lookup_common.STORES[store]["base"], code, memo=memo)
+        if not product:
+            return None
+        return product, None, None
+
+    async def summarize_store_product(self, store: str, code: str, memo=None, fields=None, local_first=None):
+        """
+        Vista corta y consistente del producto en una tienda (build_summary).
+        `fields` limita las claves calculadas; None = todas. Los resueltos
+        quedan en PRODUCT_CACHE hasta CACHE_TTL o su PriceValidUntil, y los
+        "no encontrado" en NEGATIVE_CACHE (los errores de transporte no se
+        cachean). Con local_first (o LOCAL_FIRST) responde desde el catalogo
+        local si la copia esta fresca.
+        """
+        fields = summary_fields(fields)
+        full_key = ("summary", store, str(code))
+        cache_key = full_key if fields is None else full_key + (fields,)
+        cached = cached_summary(store, code, fields)
+        if cached is not None:
+            return cached
+        if lookup_common.NEGATIVE_CACHE.get(full_key):
+            return None
+        local = await self._local_product(store, code, local_first)
+        if local is not None:
+            product, item_id = local
+            return build_summary(store, code, product, skuid=item_id, fields=fields)
+        # si ya se esta buscando este (store, code), se espera ese resultado
+        return await self._single(cache_key, lambda: self._summarize(store, code, memo, fields))
+
+    async def _summarize(self, store: str, code: str, memo, fields):
+        full_key = ("summary", store, str(code))
+        cache_key = full_key if fields is None else full_key + (fields,)
+        if memo is None:
+            memo = self.new_memo()
+        found = await self.resolve_store_product(store, code, memo)
+        summary = None
+        if found is not None:
+            product, skuid, exito_sku = found
+            summary = build_summary(store, code, product, skuid=skuid, exito_sku=exito_sku, fields=fields)
+
+        if summary is not None:
+            lookup_common.PRODUCT_CACHE.put(cache_key, summary, valid_until=summary.get("PriceValidUntil"))
+        elif not memo.has_failures(lookup_common.STORES[store]["base"]):
+            lookup_common.NEGATIVE_CACHE.put(full_key, True)
+        return summary
+
+    async def summarize_stores(self, stores, code: str, memo=None, fields=None, partial=False):
+        """
+        Todas las tiendas a la vez; [(store, data)] en el orden de `stores`.
+        Con partial=True una tienda que falla (plazo, circuito abierto, red)
+        queda como degraded(...) en vez de tumbar todo el resultado.
+        """
+        stores = list(stores)
+        if memo is None:
+            memo = self.new_memo()
+
+        async def one(s):
+            try:
+                return await self.summarize_store_product(s, code, memo, fields)
+            except requests.exceptions.RequestException as e:
+                if not partial:
+                    raise
+                return degraded(s, code, e)
+
+        results = await asyncio.gather(*(one(s) for s in stores))
+        return list(zip(stores, results))
+
+
+def run(coro_factory):
+    """
+    Atajo para scripts: run(lambda e: e.summarize_store_product("metro", code)).
+    """
+    async def main():
+        async with AsyncLookup() as engine:
+            return await coro_factory(engine)
+
+    return asyncio.run(main())
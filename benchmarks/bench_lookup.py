@@ -0,0 +1,276 @@
+import argparse
+import importlib
+import json
+import os
+import random
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.dirname(BENCH_DIR), BENCH_DIR]
+
+import lookup_common  # noqa: E402
+import metrics  # noqa: E402
+import rate_limit  # noqa: E402
+import SKU  # noqa: E402
+import stub_server  # noqa: E402
+from id_index import IdIndex  # noqa: E402
+
+# Benchmark sin red: levanta un stub por tienda (stub_server.py), apunta las
+# STORES de los scripts a esos stubs y mide latencia (p50/p90/p99), requests
+# por respuesta y el throughput del crawl. Sirve para comparar antes/despues
+# de un cambio con la misma semilla y los mismos parametros.
+core = importlib.import_module("BusquedaSKU-Informacion")
+
+CATALOGO = 2000  # productos por tienda (fixtures + sinteticos)
+CONSULTAS = 100  # consultas por escenario
+MISS_RATE = 0.1  # fraccion de codigos que no existen en ninguna tienda
+SEMILLA = 7
+
+
+def percentiles(values):
+    """
+    Latencias en segundos -> {p50, p90, p99, max, mean} en milisegundos.
+    """
+    if not values:
+        return {k: None for k in ("p50", "p90", "p99", "max", "mean")}
+    ordered = sorted(values)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000
+
+    return {
+        "p50": pct(50),
+        "p90": pct(90),
+        "p99": pct(99),
+        "max": ordered[-1] * 1000,
+        "mean": sum(ordered) / len(ordered) * 1000,
+    }
+
+
+def start_stubs(size, latency, jitter, error_rate, seed=SEMILLA):
+    """
+    Un stub por tienda de STORES, con sus fixtures + sinteticos. Apunta
+    lookup_common.STORES (compartido por los scripts y SKU.py) y SKU.BASE a
+    los stubs -> {store: (server, catalog)}.
+    Los indices de ids quedan en memoria para no tocar id_index.sqlite.
+    """
+    lookup_common.ID_INDEX = IdIndex(":memory:")
+    stubs = {}
+    for n, store in enumerate(lookup_common.STORES):
+        catalog = stub_server.StubCatalog(
+            stub_server.build_catalog(store, size, seed + n),
+            latency=latency,
+            jitter=jitter,
+            error_rate=error_rate,
+            seed=seed + n,
+        )
+        server, base = stub_server.start(catalog)
+        lookup_common.STORES[store]["base"] = base
+        stubs[store] = (server, catalog)
+    SKU.BASE = lookup_common.STORES["metro"]["base"]
+    metrics.register_stores(lookup_common.STORES)
+    return stubs
+
+
+def stop_stubs(stubs):
+    for server, _ in stubs.values():
+        server.shutdown()
+        server.server_close()
+
+
+def without_rate_limit():
+    """
+    El limitador por host (pensado para las tiendas reales) dominaria los
+    numeros contra localhost; se sube el techo para medir el codigo.
+    """
+    rate_limit.RATE_INICIAL = rate_limit.RATE_MAX = 1e6
+    rate_limit.BURST = 10**6
+    rate_limit.reset()
+
+
+def reset_caches(mode):
+    """
+    "frio": sin caches ni indice de ids (primera consulta de cada codigo).
+    "indice": indice de ids caliente pero sin productos en cache (habilita la
+    simulacion de carrito de answer). "caliente": no se limpia nada.
+    """
+    if mode == "caliente":
+        return
+    lookup_common.PRODUCT_CACHE.clear()
+    lookup_common.NEGATIVE_CACHE.clear()
+    if mode == "frio":
+        lookup_common.ID_INDEX = IdIndex(":memory:")
+
+
+def workload(stubs, count, miss_rate=MISS_RATE, seed=SEMILLA):
+    """
+    `count` pares (tienda, codigo) mezclando itemIds, EANs y codigos
+    inexistentes, siempre los mismos para la misma semilla.
+    """
+    rng = random.Random(seed)
+    stores = list(stubs)
+    pairs = []
+    for _ in range(count):
+        store = rng.choice(stores)
+        if rng.random() < miss_rate:
+            pairs.append((store, str(rng.randrange(10**8, 10**9))))
+            continue
+        items, eans = stubs[store][1].codes()
+        pairs.append((store, rng.choice(eans if rng.random() < 0.5 else items)))
+    return pairs
+
+
+def total_requests(stubs):
+    return sum(catalog.requests for _, catalog in stubs.values())
+
+
+def requests_by_path(stubs):
+    counts = {}
+    for _, catalog in stubs.values():
+        for path, n in catalog.by_path.items():
+            counts[path] = counts.get(path, 0) + n
+    return counts
+
+
+def measure(name, stubs, calls, mode, warm=None):
+    """
+    Corre cada llamada (sin argumentos) de `calls` de a una, limpiando los
+    caches segun `mode` antes de cada una; `warm`, si viene, se llama una vez
+    antes de medir. Devuelve la fila del reporte.
+    """
+    if warm is not None:
+        warm()
+    latencies, errors = [], 0
+    before = total_requests(stubs)
+    paths_before = requests_by_path(stubs)
+    started = time.perf_counter()
+    for call in calls:
+        reset_caches(mode)
+        t0 = time.perf_counter()
+        try:
+            call()
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+    requests_made = total_requests(stubs) - before
+    row = {"escenario": name, "cache": mode, "consultas": len(calls), "errores": errors}
+    row.update(percentiles(latencies))
+    row["requests_por_consulta"] = requests_made / len(calls) if calls else None
+    row["consultas_por_s"] = len(calls) / elapsed if elapsed else None
+    row["rutas"] = {
+        path: n - paths_before.get(path, 0)
+        for path, n in requests_by_path(stubs).items()
+        if n - paths_before.get(path, 0)
+    }
+    return row
+
+
+def bench_lookups(stubs, count, mode):
+    pairs = workload(stubs, count)
+    vtex = [(s, c) for s, c in pairs if lookup_common.STORES[s]["type"] == "vtex"]
+    rows = []
+
+    def run_all(calls):
+        for call in calls:
+            try:
+                call()
+            except Exception:
+                pass
+
+    price_calls = [lambda s=s, c=c: core.get_price_vtex(lookup_common.STORES[s]["base"], c) for s, c in vtex]
+    answer_calls = [lambda s=s, c=c: core.answer(f"precio {s} {c}") for s, c in pairs]
+    answer_all = [lambda c=c: core.answer(f"precio {c}") for _, c in pairs]
+    full_calls = [lambda s=s, c=c: core.answer_full(f"todo {s} {c}") for s, c in pairs]
+
+    for name, calls in (
+        ("get_price_vtex", price_calls),
+        ("answer (una tienda)", answer_calls),
+        ("answer (todas)", answer_all),
+        ("answer_full", full_calls),
+    ):
+        # "indice" y "caliente" necesitan una pasada previa que llene el indice/cache
+        warm = (lambda calls=calls: run_all(calls)) if mode != "frio" else None
+        rows.append(measure(name, stubs, calls, mode, warm))
+    return rows
+
+
+def bench_crawl(stubs, page_size=50):
+    """
+    SKU.extraer_todos contra el stub de metro: productos por segundo y
+    requests hechos.
+    """
+    catalog = stubs["metro"][1]
+    before = catalog.requests
+    t0 = time.perf_counter()
+    productos = SKU.extraer_todos(page_size=page_size)
+    elapsed = time.perf_counter() - t0
+    requests_made = catalog.requests - before
+    return {
+        "escenario": "extraer_todos",
+        "productos": len(productos),
+        "segundos": elapsed,
+        "productos_por_s": len(productos) / elapsed if elapsed else None,
+        "requests": requests_made,
+    }
+
+
+def print_report(rows, crawl):
+    header = ("escenario", "cache", "consultas", "errores", "p50", "p90", "p99", "max", "req/consulta")
+    print(" | ".join(header))
+    for r in rows:
+        print(
+            f"{r['escenario']} | {r['cache']} | {r['consultas']} | {r['errores']} | "
+            f"{r['p50']:.1f} | {r['p90']:.1f} | {r['p99']:.1f} | {r['max']:.1f} | "
+            f"{r['requests_por_consulta']:.2f}"
+        )
+    if crawl:
+        print(
+            f"extraer_todos | {crawl['productos']} productos en {crawl['segundos']:.2f} s | "
+            f"{crawl['productos_por_s']:.0f} productos/s | {crawl['requests']} requests"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de busquedas contra stubs locales")
+    parser.add_argument("--catalogo", type=int, default=CATALOGO, help="productos por tienda")
+    parser.add_argument("--consultas", type=int, default=CONSULTAS, help="consultas por escenario")
+    parser.add_argument("--latencia", type=float, default=0.0, help="latencia fija del stub (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="latencia extra aleatoria (s)")
+    parser.add_argument("--errores", type=float, default=0.0, help="fraccion de respuestas 503")
+    parser.add_argument("--cache", choices=("frio", "indice", "caliente"), action="append",
+                        help="modo de cache (se puede repetir; por defecto frio)")
+    parser.add_argument("--con-limite", action="store_true",
+                        help="dejar el limitador por host con sus valores reales")
+    parser.add_argument("--sin-crawl", action="store_true", help="no medir extraer_todos")
+    parser.add_argument("--json", help="guardar las filas en este archivo")
+    parser.add_argument("--metricas", help="activar metrics y guardar su snapshot JSON en este archivo")
+    args = parser.parse_args(argv)
+
+    if not args.con_limite:
+        without_rate_limit()
+    if args.metricas:
+        metrics.enable()
+    stubs = start_stubs(args.catalogo, args.latencia, args.jitter, args.errores)
+    try:
+        rows = []
+        for mode in args.cache or ["frio"]:
+            rows.extend(bench_lookups(stubs, args.consultas, mode))
+        crawl = None if args.sin_crawl else bench_crawl(stubs)
+    finally:
+        stop_stubs(stubs)
+
+    print_report(rows, crawl)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"consultas": rows, "crawl": crawl, "parametros": vars(args)}, f, indent=2)
+    if args.metricas:
+        with open(args.metricas, "w", encoding="utf-8") as f:
+            json.dump(metrics.snapshot(), f, indent=2)
+    return rows, crawl
+
+
+if __name__ == "__main__":
+    # python benchmarks/bench_lookup.py --consultas 200 --latencia 0.02 --cache frio --cache indice
+    main()
@@ -0,0 +1,332 @@
+import copy
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Servidor local que imita lo que consultan los scripts de una tienda VTEX
+# (busqueda del catalogo, arbol de categorias, simulacion de carrito) y el
+# getProductBySku de Éxito, para medir sin salir a la red.
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = ("metro", "olimpica", "exito")  # respuestas de ejemplo en la raiz del repo
+
+CATEGORIAS = ("Despensa", "Aseo", "Bebidas", "Lacteos", "Mascotas")
+SUBCATEGORIAS = ("Basicos", "Premium", "Ofertas")
+EAN_BASE = 7709000000000
+ITEM_BASE = 900000
+
+
+def load_fixture(store: str):
+    """
+    Productos de ejemplo de la raiz del repo (metro, olimpica, exito). Los
+    items vienen sin itemId/ean, asi que se les asigna uno fijo.
+    """
+    path = os.path.join(REPO_DIR, store)
+    try:
+        with open(path, encoding="utf-8") as f:
+            products = json.load(f)
+    except (OSError, ValueError):
+        return []
+    for p in products:
+        for n, item in enumerate(p.get("items", []) or []):
+            item.setdefault("itemId", f"{p.get('productId')}{n}")
+            ean = p.get("EAN")
+            ean = ean[0] if isinstance(ean, list) and ean else ean
+            item.setdefault("ean", str(ean) if ean and n == 0 else f"{EAN_BASE // 10}{p.get('productId')}{n}")
+    return products
+
+
+def synthetic_product(n: int, template=None, rng=None):
+    """
+    Producto VTEX sintetico numero `n` (itemId ITEM_BASE+n, EAN EAN_BASE+n).
+    Si hay `template` (un fixture) copia sus especificaciones e imagenes para
+    que el tamano del JSON se parezca al real.
+    """
+    rng = rng or random
+    ci, si = n % len(CATEGORIAS), n % len(SUBCATEGORIAS)
+    cat, sub = CATEGORIAS[ci], SUBCATEGORIAS[si]
+    cat_id, sub_id = ci + 1, (ci + 1) * 100 + si + 1  # mismos ids que category_tree
+    price = rng.randrange(1_000, 300_000, 50)
+    list_price = price + (rng.randrange(0, 20_000, 50) if n % 4 == 0 else 0)
+    product = copy.deepcopy(template) if template else {}
+    item = copy.deepcopy((product.get("items") or [{}])[0])
+    item.update(
+        itemId=str(ITEM_BASE + n),
+        ean=str(EAN_BASE + n),
+        sellers=[
+            {
+                "sellerId": "1",
+                "sellerName": "Tienda",
+                "sellerDefault": True,
+                "commertialOffer": {
+                    "Price": price,
+                    "ListPrice": list_price,
+                    "PriceWithoutDiscount": price,
+                    "FullSellingPrice": price,
+                    "PriceValidUntil": "2030-01-01T00:00:00Z",
+                    "AvailableQuantity": rng.randrange(0, 500),
+                    "IsAvailable": True,
+                    "Tax": 0,
+                    "BuyTogether": [],
+                },
+            }
+        ],
+    )
+    item.setdefault("images", [{"imageUrl": f"https://img.local/{n}.jpg"}])
+    product.update(
+        productId=str(100000 + n),
+        productName=f"Producto sintetico {n} {cat} {sub}",
+        brand=f"MARCA{n % 37}",
+        productTitle=f"Producto sintetico {n}",
+        categories=[f"/{cat}/{sub}/", f"/{cat}/"],
+        categoriesIds=[f"/{cat_id}/{sub_id}/", f"/{cat_id}/"],
+        link=f"https://tienda.local/producto-{n}/p",
+        items=[item],
+    )
+    return product
+
+
+def build_catalog(store: str, size: int, seed: int = 0):
+    """
+    Fixtures de `store` + productos sinteticos hasta `size` productos.
+    """
+    rng = random.Random(seed)
+    products = load_fixture(store)
+    template = products[0] if products else None
+    for n in range(max(0, size - len(products))):
+        products.append(synthetic_product(n, template, rng))
+    return products
+
+
+class StubCatalog:
+    """
+    Catalogo en memoria con indices por itemId y EAN, mas la configuracion
+    de latencia (fija + jitter, en segundos) y la tasa de errores 503.
+    Cuenta cada request recibido en `requests` (y por ruta en `by_path`).
+    """
+
+    def __init__(self, products, latency=0.0, jitter=0.0, error_rate=0.0, seed=0):
+        self.products = products
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.by_item = {}
+        self.by_ean = {}
+        for p in products:
+            for item in p.get("items", []) or []:
+                self.by_item[str(item.get("itemId"))] = p
+                if item.get("ean"):
+                    self.by_ean[str(item["ean"])] = p
+        self.texts = [json.dumps(p, ensure_ascii=False) for p in products]
+        self.requests = 0
+        self.by_path = {}
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def codes(self):
+        """
+        (itemIds, EANs) de todo el catalogo, para armar las cargas.
+        """
+        return list(self.by_item), list(self.by_ean)
+
+    def reset_counters(self):
+        with self._lock:
+            self.requests = 0
+            self.errors = 0
+            self.by_path = {}
+
+    def hit(self, path: str) -> bool:
+        """
+        Registra un request, duerme la latencia configurada y devuelve True si
+        a este le toca un error inyectado.
+        """
+        with self._lock:
+            self.requests += 1
+            self.by_path[path] = self.by_path.get(path, 0) + 1
+            delay = self.latency + (self._rng.random() * self.jitter if self.jitter else 0)
+            fail = self.error_rate > 0 and self._rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        if delay:
+            time.sleep(delay)
+        return fail
+
+    def search(self, query: dict):
+        """
+        fq=skuId:/alternateIds_Ean: (varios se combinan como OR), fq=C:/1/2/
+        (categoriesIds), fq=P:[a TO b] (precio del primer item), ft=texto y
+        paginacion _from/_to -> (pagina, total).
+        """
+        ids, others = [], []
+        for f in query.get("fq", []):
+            key, _, value = f.partition(":")
+            if key == "skuId":
+                ids.append(self.by_item.get(value))
+            elif key == "alternateIds_Ean":
+                ids.append(self.by_ean.get(value))
+            else:
+                others.append((key, value))
+
+        if query.get("fq") and len(others) < len(query["fq"]):
+            seen, result = set(), []
+            for p in ids:
+                if p is not None and id(p) not in seen:
+                    seen.add(id(p))
+                    result.append(p)
+        else:
+            result = self.products
+
+        for key, value in others:
+            if key == "C":
+                path = "/" + value.strip("/") + "/"
+                result = [p for p in result if path in (p.get("categoriesIds") or [])]
+            elif key == "P":
+                lo, _, hi = value.strip("[]").partition(" TO ")
+                result = [p for p in result if float(lo) <= self._price(p) <= float(hi)]
+
+        if "ft" in query:
+            text = query["ft"][0]
+            wanted = {id(p) for p in result}
+            result = [p for p, t in zip(self.products, self.texts) if id(p) in wanted and text in t]
+
+        start = int(query.get("_from", ["0"])[0])
+        end = int(query.get("_to", [str(start + 9)])[0])
+        return result[start:end + 1], len(result)
+
+    def category_tree(self):
+        tree = []
+        for i, cat in enumerate(CATEGORIAS, start=1):
+            children = [
+                {"id": i * 100 + j, "name": sub, "children": []}
+                for j, sub in enumerate(SUBCATEGORIAS, start=1)
+            ]
+            tree.append({"id": i, "name": cat, "children": children})
+        return tree
+
+    def simulate(self, items):
+        """
+        Respuesta de orderForms/simulation (precios en centavos).
+        """
+        result = []
+        for i, it in enumerate(items):
+            p = self.by_item.get(str(it.get("id")))
+            if p is None:
+                continue
+            offer = p["items"][0]["sellers"][0]["commertialOffer"]
+            result.append(
+                {
+                    "id": str(it["id"]),
+                    "requestIndex": i,
+                    "price": int(round(offer["Price"] * 100)),
+                    "listPrice": int(round(offer["ListPrice"] * 100)),
+                    "sellingPrice": int(round(offer["Price"] * 100)),
+                    "priceValidUntil": offer.get("PriceValidUntil"),
+                    "availability": "available",
+                }
+            )
+        return {"items": result}
+
+    @staticmethod
+    def _price(product):
+        try:
+            return float(product["items"][0]["sellers"][0]["commertialOffer"]["Price"])
+        except (KeyError, IndexError, TypeError, ValueError):
+            return 0.0
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers y cuerpo salen en dos writes: sin esto Nagle + delayed ACK
+    # suman ~40 ms por respuesta con keep-alive
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # el cliente corto por timeout/plazo
+
+    def _fail(self):
+        self._send(503, {"error": "inyectado"}, {"Retry-After": "0"})
+
+    def do_GET(self):
+        catalog = self.server.catalog
+        url = urlsplit(self.path)
+        if catalog.hit(url.path):
+            return self._fail()
+        query = parse_qs(url.query)
+
+        if url.path.startswith("/api/product/getProductBySku"):
+            p = catalog.by_item.get((query.get("skuid") or [""])[0])
+            return self._send(200, [p] if p else [])
+        if url.path.startswith("/api/catalog_system/pub/category/tree"):
+            return self._send(200, catalog.category_tree())
+        if url.path.startswith("/api/catalog_system/pub/products/search"):
+            page, total = catalog.search(query)
+            start = int(query.get("_from", ["0"])[0])
+            resources = f"{start}-{start + max(len(page) - 1, 0)}/{total}"
+            return self._send(200, page, {"resources": resources})
+        self._send(404, {"error": f"Ruta desconocida: {url.path}"})
+
+    def do_POST(self):
+        catalog = self.server.catalog
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        data = self.rfile.read(length)
+        if catalog.hit(url.path):
+            return self._fail()
+        if not url.path.startswith("/api/checkout/pub/orderForms/simulation"):
+            return self._send(404, {"error": f"Ruta desconocida: {url.path}"})
+        try:
+            payload = json.loads(data or b"{}")
+        except ValueError:
+            return self._send(400, {"error": "JSON invalido"})
+        self._send(200, catalog.simulate(payload.get("items") or []))
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, catalog):
+        super().__init__(address, StubHandler)
+        self.catalog = catalog
+
+
+def start(catalog, host="127.0.0.1", port=0):
+    """
+    Levanta el stub en un hilo -> (servidor, base_url). Con port=0 elige un
+    puerto libre; cerrar con servidor.shutdown().
+    """
+    server = StubServer((host, port), catalog)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    # python benchmarks/stub_server.py [tienda] [productos] [puerto]
+    import sys
+
+    store = sys.argv[1] if len(sys.argv) > 1 else "metro"
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    port = int(sys.argv[3]) if len(sys.argv) > 3 else 8780
+    server, base = start(StubCatalog(build_catalog(store, size)), port=port)
+    print(f"{store}: {size} productos en {base}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,65 @@
+import asyncio
+
+import deadline
+
+
+async def run_cascade(steps, speculative: bool = False):
+    """
+    Ejecuta una cascada de busquedas (skuId -> EAN -> ft ...) y devuelve el
+    primer resultado distinto de None, respetando el orden de `steps`. Cada
+    paso es una funcion sin argumentos que devuelve una corrutina.
+
+    - speculative=False: paso por paso, como siempre.
+    - speculative=True: lanza todos los pasos a la vez y espera en orden de
+      prioridad; en cuanto uno gana, los que siguen corriendo se cancelan.
+
+    Dentro de un deadline.within(...), paso por paso el primero tiene todo
+    lo que queda y los siguientes lo que dejen los anteriores (sin repartir:
+    una tienda sana pero lenta no se corta antes de tiempo). Si un paso se
+    queda sin tiempo para reintentar pero el plazo no vencio, se sigue con
+    el proximo, y si al final nadie encontro nada se relanza ese
+    DeadlineExceeded (no es un "no existe").
+    """
+    steps = list(steps)
+    if not speculative or len(steps) <= 1:
+        timed_out = None
+        for step in steps:
+            try:
+                res = await step()
+            except deadline.DeadlineExceeded as e:
+                if deadline.expired():
+                    raise
+                timed_out = e
+                continue
+            if res is not None:
+                return res
+        if timed_out is not None:
+            raise timed_out
+        return None
+
+    tasks = [asyncio.ensure_future(step()) for step in steps]
+    try:
+        for task in tasks:
+            res = await task
+            if res is not None:
+                return res
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def run_named_cascade(steps: dict, order, speculative: bool = False):
+    """
+    Igual que run_cascade pero con pasos con nombre ("sku", "ean", "ft") y
+    un orden decidido por quien llama. Devuelve (nombre_ganador, resultado)
+    o (None, None) si ningun paso encontro nada.
+    """
+    def tagged(name):
+        async def step():
+            res = await steps[name]()
+            return None if res is None else (name, res)
+        return step
+
+    found = await run_cascade([tagged(name) for name in order], speculative)
+    return found if found is not None else (None, None)
@@ -0,0 +1,156 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import json_decode
+from product_cache import product_valid_until
+
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalogo.sqlite")
+
+
+class CatalogStore:
+    """
+    Copia local (SQLite) de los catalogos crawleados por SKU.py /
+    sync_catalogo.py: el documento VTEX de cada producto, con indices por
+    productId, itemId y EAN, para responder sin ir a la red.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS products ("
+                " store TEXT NOT NULL,"
+                " product_id TEXT NOT NULL,"
+                " doc TEXT NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " PRIMARY KEY (store, product_id))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS items ("
+                " store TEXT NOT NULL,"
+                " item_id TEXT NOT NULL,"
+                " ean TEXT,"
+                " product_id TEXT NOT NULL,"
+                " PRIMARY KEY (store, item_id))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS items_ean ON items (store, ean)")
+            conn.execute("CREATE INDEX IF NOT EXISTS items_product ON items (store, product_id)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def save_products(self, store: str, products, updated_at=None) -> int:
+        """
+        Guarda (o reemplaza) productos VTEX; acepta dicts o records.Product.
+        Devuelve cuantos productos se guardaron.
+        """
+        now = time.time() if updated_at is None else updated_at
+        rows, items = [], []
+        for product in products or []:
+            if hasattr(product, "to_dict"):
+                product = product.to_dict()
+            if not isinstance(product, dict) or not product.get("productId"):
+                continue
+            product_id = str(product["productId"])
+            rows.append((store, product_id, json.dumps(product, ensure_ascii=False), now))
+            for item in product.get("items", []) or []:
+                if item.get("itemId"):
+                    ean = str(item.get("ean") or "").strip() or None
+                    items.append((store, str(item["itemId"]), ean, product_id))
+        if not rows:
+            return 0
+
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "DELETE FROM items WHERE store = ? AND product_id = ?",
+                    [(r[0], r[1]) for r in rows],
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO products (store, product_id, doc, updated_at)"
+                    " VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO items (store, item_id, ean, product_id)"
+                    " VALUES (?, ?, ?, ?)",
+                    items,
+                )
+        return len(rows)
+
+    def remove_products(self, store: str, product_ids) -> int:
+        keys = [(store, str(pid)) for pid in product_ids or []]
+        if not keys:
+            return 0
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany("DELETE FROM items WHERE store = ? AND product_id = ?", keys)
+                conn.executemany("DELETE FROM products WHERE store = ? AND product_id = ?", keys)
+        return len(keys)
+
+    def find(self, store: str, code: str, max_age=None):
+        """
+        Producto que tiene un item con itemId o EAN = `code` ->
+        (documento VTEX, itemId). None si no esta, si la copia tiene mas de
+        `max_age` segundos o si el PriceValidUntil de la oferta de ese item
+        ya paso (el precio guardado ya no vale). Nunca lanza: sin copia
+        local se va a la red.
+        """
+        code = str(code).strip()
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT p.doc, p.updated_at, i.item_id FROM items i"
+                    " JOIN products p ON p.store = i.store AND p.product_id = i.product_id"
+                    " WHERE i.store = ? AND (i.item_id = ? OR i.ean = ?)"
+                    " ORDER BY (i.item_id = ?) DESC LIMIT 1",
+                    (store, code, code, code),
+                ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        doc, updated_at, item_id = row
+        now = time.time()
+        if max_age is not None and now - updated_at > max_age:
+            return None
+        try:
+            product = json_decode.loads(doc)
+        except ValueError:
+            return None
+        if _price_expired(product, item_id, now):
+            return None
+        return product, item_id
+
+    def count(self, store=None) -> int:
+        sql, params = "SELECT COUNT(*) FROM products", ()
+        if store is not None:
+            sql, params = sql + " WHERE store = ?", (store,)
+        with self._lock:
+            return self._connect().execute(sql, params).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def _price_expired(product: dict, item_id: str, now: float) -> bool:
+    """
+    True si alguna oferta del item tiene un PriceValidUntil ya vencido.
+    """
+    items = [i for i in product.get("items", []) or [] if str(i.get("itemId", "")) == item_id]
+    valid_until = product_valid_until({"items": items})
+    return valid_until is not None and valid_until <= now
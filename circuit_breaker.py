@@ -0,0 +1,119 @@
+import threading
+import time
+
+import requests
+
+
+# Circuit breaker por host: despues de FALLOS_PARA_ABRIR fallos seguidos
+# (timeouts, cortes, 5xx) el host queda "abierto" y los requests fallan de
+# inmediato durante ENFRIAMIENTO segundos; despues se deja pasar uno de
+# prueba ("medio") y si responde bien se vuelve a cerrar.
+FALLOS_PARA_ABRIR = 3
+ENFRIAMIENTO = 30.0  # segundos
+
+CERRADO = "cerrado"
+ABIERTO = "abierto"
+MEDIO = "medio"
+
+
+class CircuitOpen(requests.exceptions.ConnectionError):
+    """
+    El host esta en pausa por fallos repetidos; no se intento el request.
+    """
+
+
+class HostBreaker:
+    def __init__(self, threshold=None, cooldown=None):
+        self.threshold = FALLOS_PARA_ABRIR if threshold is None else threshold
+        self.cooldown = ENFRIAMIENTO if cooldown is None else cooldown
+        self.state = CERRADO
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        True si el request puede salir. Con el circuito abierto, pasado el
+        enfriamiento deja salir uno solo de prueba.
+        """
+        with self._lock:
+            if self.state == CERRADO:
+                return True
+            if self.state == ABIERTO:
+                if time.monotonic() - self.opened_at < self.cooldown:
+                    return False
+                self.state = MEDIO
+                self._probing = False
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def on_success(self):
+        with self._lock:
+            self.state = CERRADO
+            self.failures = 0
+            self._probing = False
+
+    def on_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == MEDIO or self.failures >= self.threshold:
+                self.state = ABIERTO
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+    def release(self):
+        """
+        El request de prueba no llego a decir nada del host (ej. se acabo el
+        plazo de la respuesta): el siguiente puede probar.
+        """
+        with self._lock:
+            self._probing = False
+
+    def retry_in(self) -> float:
+        """
+        Segundos hasta que se deje pasar el request de prueba.
+        """
+        with self._lock:
+            if self.state != ABIERTO:
+                return 0.0
+            return max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+
+
+def is_host_failure(err: Exception, cut_by_deadline: bool) -> bool:
+    """
+    Si una excepcion del request dice algo de la salud del host. Un request
+    cortado por el plazo de la respuesta nunca cuenta: el corte fue nuestro
+    (un host sano que tarda 2 s no tiene por que abrir el circuito).
+    """
+    if cut_by_deadline:
+        return False
+    return isinstance(err, (requests.exceptions.RequestException, OSError, TimeoutError))
+
+
+_breakers = {}
+_lock = threading.Lock()
+
+
+def breaker_for(key: str) -> HostBreaker:
+    breaker = _breakers.get(key)
+    if breaker is None:
+        with _lock:
+            breaker = _breakers.setdefault(key, HostBreaker())
+    return breaker
+
+
+def reset():
+    with _lock:
+        _breakers.clear()
+
+
+def snapshot() -> dict:
+    """
+    {host: {"state", "failures"}} para /health.
+    """
+    with _lock:
+        breakers = list(_breakers.items())
+    return {key: {"state": b.state, "failures": b.failures} for key, b in breakers}
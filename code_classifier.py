@@ -0,0 +1,87 @@
+import threading
+
+
+GTIN_LENGTHS = (8, 12, 13, 14)
+
+
+def gtin_is_valid(code: str) -> bool:
+    """
+    Valida largo y digito de control GTIN-8/12/13/14 (modulo 10).
+    """
+    code = str(code).strip()
+    if not code.isdigit() or len(code) not in GTIN_LENGTHS:
+        return False
+
+    digits = [int(ch) for ch in code]
+    body, check = digits[:-1], digits[-1]
+    # pesos 3,1,3,1... desde el digito mas cercano al de control
+    total = sum(d * (3 if i % 2 == 0 else 1) for i, d in enumerate(reversed(body)))
+    return (10 - total % 10) % 10 == check
+
+
+def code_shape(code: str) -> str:
+    """
+    Forma del codigo para las estadisticas: "gtin13", "gtin8", "d6", "d10"...
+    """
+    code = str(code).strip()
+    if gtin_is_valid(code):
+        return f"gtin{len(code)}"
+    return f"d{len(code)}"
+
+
+def classify(code: str) -> str:
+    """
+    "ean" si el codigo es un GTIN valido, "sku" si parece un id interno.
+    """
+    return "ean" if gtin_is_valid(code) else "sku"
+
+
+class StrategyStats:
+    """
+    Aprende que estrategia (sku / ean / ...) gana por tienda y forma de
+    codigo, y ordena la cascada de cada request segun esa tasa de exito.
+    El tipo detectado por classify() cuenta como una victoria a priori.
+    """
+
+    def __init__(self, learn: bool = True):
+        self.learn = learn
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def order(self, store: str, code: str, strategies):
+        strategies = list(strategies)
+        preferred = classify(code)
+        shape = code_shape(code)
+
+        def score(name):
+            prior = 1 if name == preferred else 0
+            wins, attempts = (0, 0)
+            if self.learn:
+                with self._lock:
+                    wins, attempts = self._counts.get((store, shape, name), (0, 0))
+            return (wins + prior + 1) / (attempts + prior + 2)
+
+        # sorted es estable: a igual puntaje se respeta el orden recibido
+        return sorted(strategies, key=score, reverse=True)
+
+    def record(self, store: str, code: str, tried, winner=None):
+        """
+        Registra el resultado de una cascada: `tried` en el orden en que se
+        intentaron y `winner` la que resolvio (None si ninguna).
+        """
+        if not self.learn:
+            return
+        shape = code_shape(code)
+        with self._lock:
+            for name in tried:
+                wins, attempts = self._counts.get((store, shape, name), (0, 0))
+                self._counts[(store, shape, name)] = (wins + (name == winner), attempts + 1)
+                if name == winner:
+                    break
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                f"{store}|{shape}|{name}": {"wins": w, "attempts": a}
+                for (store, shape, name), (w, a) in self._counts.items()
+            }
@@ -0,0 +1,85 @@
+import contextvars
+import time
+from contextlib import contextmanager
+
+import requests
+
+
+# Plazo total de una respuesta. Se guarda como instante absoluto
+# (time.monotonic) en un contextvar: http_pool acota cada timeout, espera y
+# reintento a lo que queda, y los pasos de la cascada usan lo que dejan los
+# anteriores.
+_deadline = contextvars.ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """
+    Se acabo el plazo de la respuesta.
+    """
+
+
+@contextmanager
+def within(seconds):
+    """
+    with deadline.within(5): ... -> todo lo de adentro termina en 5 s. Si ya
+    hay un plazo mas corto, queda ese. seconds=None no cambia nada.
+    """
+    if seconds is None:
+        yield
+        return
+    limit = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(limit if current is None else min(current, limit))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining():
+    """
+    Segundos que quedan (puede ser negativo), o None si no hay plazo.
+    """
+    limit = _deadline.get()
+    return None if limit is None else limit - time.monotonic()
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def check(what: str = "la respuesta"):
+    if expired():
+        raise DeadlineExceeded(f"Se acabo el plazo de {what}")
+
+
+def cap(timeout):
+    """
+    Timeout de un request acotado a lo que queda del plazo.
+    """
+    left = remaining()
+    if left is None:
+        return timeout
+    return max(0.001, min(timeout, left))
+
+
+def allows(seconds: float) -> bool:
+    """
+    True si esperar `seconds` todavia deja tiempo para algo mas.
+    """
+    left = remaining()
+    return left is None or seconds < left
+
+
+def bound(fn):
+    """
+    fn para correr en otro hilo (ThreadPoolExecutor) con el plazo actual:
+    los hilos del pool no heredan el contextvar por su cuenta.
+    """
+    ctx = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return ctx.copy().run(fn, *args, **kwargs)
+
+    return run
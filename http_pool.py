@@ -0,0 +1,209 @@
+import http.cookiejar
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import circuit_breaker
+import deadline
+import metrics
+import rate_limit
+
+
+# Sesiones HTTP compartidas: una por tienda (scheme + host), con pool de
+# conexiones keep-alive para no pagar TCP + TLS en cada request.
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 16
+POOL_BLOCK = False
+
+_sessions = {}
+_lock = threading.Lock()
+
+
+def host_key(url: str) -> str:
+    """
+    Clave del pool para una URL: "https://www.exito.com".
+    """
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def configure(pool_connections=None, pool_maxsize=None, pool_block=None):
+    """
+    Cambia el tamano de los pools. Cierra las sesiones abiertas para que
+    las siguientes se creen con la nueva configuracion.
+    """
+    global POOL_CONNECTIONS, POOL_MAXSIZE, POOL_BLOCK
+    if pool_connections is not None:
+        POOL_CONNECTIONS = pool_connections
+    if pool_maxsize is not None:
+        POOL_MAXSIZE = pool_maxsize
+    if pool_block is not None:
+        POOL_BLOCK = pool_block
+    close_sessions()
+
+
+def _new_session() -> requests.Session:
+    session = requests.Session()
+    # Los reintentos los maneja http_get (RETRIES / BACKOFF), no urllib3.
+    adapter = HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        pool_block=POOL_BLOCK,
+        max_retries=0,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    # La sesion la comparten todos los scripts e hilos: un Set-Cookie de una
+    # respuesta (carrito, region, sesion de la tienda) no debe viajar en las
+    # siguientes de otros.
+    session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+def get_session(url: str) -> requests.Session:
+    """
+    Devuelve la sesion (y su pool) del host de la URL, creandola si no existe.
+    Las conexiones TLS quedan abiertas y se reutilizan entre requests. La
+    sesion es compartida por todos los scripts: los headers van en cada
+    request (fetch), no en la sesion.
+    """
+    key = host_key(url)
+    session = _sessions.get(key)
+    if session is not None:
+        return session
+
+    with _lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _new_session()
+            _sessions[key] = session
+    return session
+
+
+def warm_up(bases):
+    """
+    Crea de una vez las sesiones de las tiendas (ej. las bases de STORES).
+    """
+    for base in bases:
+        get_session(base)
+
+
+def close_sessions():
+    with _lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
+
+
+def fetch(url: str, headers=None, timeout=30, retries=2, backoff=1.2, verify=True, ssl_fallback=False,
+          payload=None):
+    """
+    GET (o POST con `payload` como JSON, para endpoints sin efectos como la
+    simulacion de carrito) por la sesion del host, pasando por su
+    limitador (rate_limit) y su circuit breaker (circuit_breaker):
+    - 429/502/503/504: respeta Retry-After y reintenta con backoff con jitter
+    - timeouts / cortes de conexion: reintenta con backoff con jitter
+    - DNS u otros errores no reintentables: se lanzan de una
+    - ssl_fallback=True: ante SSLError reintenta enseguida con verify=False
+    - host con el circuito abierto: CircuitOpen sin salir a la red
+    - dentro de deadline.within(...): timeouts, esperas y reintentos se
+      acotan a lo que queda; si no alcanza, DeadlineExceeded
+    Si se acaban los reintentos (o el plazo) con un status reintentable,
+    devuelve esa respuesta; si fue una excepcion, la lanza.
+    Con metrics.ENABLED cuenta requests, latencias, reintentos, timeouts,
+    fallbacks SSL y circuitos abiertos por tienda y endpoint.
+    """
+    key = host_key(url)
+    session = get_session(url)
+    limiter = rate_limit.limiter_for(key)
+    breaker = circuit_breaker.breaker_for(key)
+    last_err = None
+    last_response = None
+    labels = None
+    if metrics.ENABLED:
+        labels = {"store": metrics.store_for(url), "endpoint": metrics.endpoint_for(url)}
+
+    def send(verify):
+        request_timeout = deadline.cap(timeout)
+        if payload is not None:
+            return session.post(url, json=payload, headers=headers, timeout=request_timeout, verify=verify)
+        return session.get(url, headers=headers, timeout=request_timeout, verify=verify)
+
+    def pause(seconds):
+        # espera antes de reintentar; False si ya no alcanza el plazo
+        if not deadline.allows(seconds):
+            return False
+        time.sleep(seconds)
+        return True
+
+    for attempt in range(retries + 1):
+        if deadline.expired() or not limiter.acquire(deadline.remaining()):
+            if last_response is not None:
+                return last_response
+            if labels:
+                metrics.inc("deadline_exceeded_total", **labels)
+            raise deadline.DeadlineExceeded(f"Sin tiempo para pedir {url}")
+        if not breaker.allow():
+            if labels:
+                metrics.inc("circuit_open_total", **labels)
+            raise circuit_breaker.CircuitOpen(
+                f"{key} en pausa por fallos repetidos (reintenta en {breaker.retry_in():.0f} s)"
+            )
+        capped = deadline.cap(timeout) < timeout  # el plazo acorta este request
+        started = time.monotonic()
+        try:
+            try:
+                r = send(verify)
+            except requests.exceptions.SSLError:
+                if not ssl_fallback:
+                    raise
+                if labels:
+                    metrics.inc("http_ssl_fallback_total", **labels)
+                r = send(False)
+        except Exception as e:
+            last_err = e
+            out_of_time = deadline.expired() or (capped and isinstance(e, requests.exceptions.Timeout))
+            if not out_of_time:
+                limiter.on_error()
+            if circuit_breaker.is_host_failure(e, out_of_time):
+                breaker.on_failure()
+            else:
+                breaker.release()  # el corte fue nuestro, no dice nada del host
+            retryable = rate_limit.is_retryable_error(e) and attempt < retries and not out_of_time
+            if labels:
+                timed_out = isinstance(e, requests.exceptions.Timeout)
+                reason = ("timeout" if timed_out else type(e).__name__) if retryable else None
+                metrics.record_request(labels, "error", time.monotonic() - started, reason, timed_out)
+            if out_of_time:
+                if labels:
+                    metrics.inc("deadline_exceeded_total", **labels)
+                raise deadline.DeadlineExceeded(f"Se acabo el plazo pidiendo {url}") from e
+            if not retryable:
+                raise
+            if not pause(rate_limit.backoff_delay(attempt, backoff)):
+                raise deadline.DeadlineExceeded(f"Sin tiempo para reintentar {url}") from e
+            continue
+
+        latency = time.monotonic() - started
+        if r.status_code >= 500:
+            breaker.on_failure()
+        else:
+            breaker.on_success()
+        retry_after = rate_limit.parse_retry_after(r.headers.get("Retry-After"))
+        limiter.on_response(r.status_code, latency, retry_after)
+        done = r.status_code not in rate_limit.STATUS_REINTENTABLES or attempt >= retries
+        if labels:
+            metrics.record_request(labels, r.status_code, latency, None if done else r.status_code)
+        if done:
+            return r
+        last_response = r
+        # el limitador ya bloquea el host durante Retry-After
+        if retry_after is None and not pause(rate_limit.backoff_delay(attempt, backoff)):
+            return r
+
+    raise last_err
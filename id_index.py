@@ -0,0 +1,123 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "id_index.sqlite")
+
+
+class IdIndex:
+    """
+    Indice persistente (SQLite) de identificadores por tienda:
+    EAN -> itemId -> productId (y el nombre del producto). Se alimenta de cualquier respuesta de
+    catalogo (busquedas, getProductBySku, crawl de SKU.py) y se consulta
+    antes de ir a la red.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ids ("
+                " store TEXT NOT NULL,"
+                " item_id TEXT NOT NULL,"
+                " ean TEXT,"
+                " product_id TEXT,"
+                " name TEXT,"
+                " updated_at REAL,"
+                " PRIMARY KEY (store, item_id))"
+            )
+            # los indices creados por versiones anteriores no tienen `name`
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(ids)")}
+            if "name" not in columns:
+                conn.execute("ALTER TABLE ids ADD COLUMN name TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS ids_ean ON ids (store, ean)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ids_product ON ids (store, product_id)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def learn_products(self, store: str, products) -> int:
+        """
+        Registra los items de una lista de productos VTEX. Devuelve cuantos
+        items se guardaron. Nunca lanza: el indice es solo un atajo.
+        """
+        rows = []
+        now = time.time()
+        for product in products or []:
+            if not isinstance(product, dict):
+                continue
+            product_id = product.get("productId")
+            name = product.get("productName") or None
+            for item in product.get("items", []) or []:
+                item_id = item.get("itemId")
+                if not item_id:
+                    continue
+                ean = str(item.get("ean") or "").strip() or None
+                rows.append(
+                    (store, str(item_id), ean, str(product_id) if product_id else None, name, now)
+                )
+        if not rows:
+            return 0
+
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.executemany(
+                    "INSERT INTO ids (store, item_id, ean, product_id, name, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (store, item_id) DO UPDATE SET"
+                    " ean = COALESCE(excluded.ean, ids.ean),"
+                    " product_id = COALESCE(excluded.product_id, ids.product_id),"
+                    " name = COALESCE(excluded.name, ids.name),"
+                    " updated_at = excluded.updated_at",
+                    rows,
+                )
+                conn.commit()
+        except sqlite3.Error:
+            return 0
+        return len(rows)
+
+    def _one(self, sql: str, params):
+        try:
+            with self._lock:
+                row = self._connect().execute(sql, params).fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    def item_for_ean(self, store: str, ean: str):
+        return self._one(
+            "SELECT item_id FROM ids WHERE store = ? AND ean = ? ORDER BY updated_at DESC",
+            (store, str(ean).strip()),
+        )
+
+    def product_for_item(self, store: str, item_id: str):
+        return self._one(
+            "SELECT product_id FROM ids WHERE store = ? AND item_id = ?",
+            (store, str(item_id)),
+        )
+
+    def name_for_item(self, store: str, item_id: str):
+        return self._one(
+            "SELECT name FROM ids WHERE store = ? AND item_id = ?",
+            (store, str(item_id)),
+        )
+
+    def is_item(self, store: str, code: str) -> bool:
+        found = self._one(
+            "SELECT 1 FROM ids WHERE store = ? AND item_id = ?", (store, str(code))
+        )
+        return found is not None
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
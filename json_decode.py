@@ -0,0 +1,109 @@
+import bisect
+import json
+import re
+
+import requests
+
+import metrics
+
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
+
+
+# Decodificacion de respuestas JSON: orjson si esta instalado (bastante mas
+# rapido con los arreglos grandes de VTEX), si no la libreria estandar.
+BACKEND = "orjson" if orjson is not None else "json"
+
+# cada producto de una busqueda VTEX empieza con "productId"
+PRODUCT_START = re.compile(rb'\{\s*"productId"\s*:')
+
+
+def _loads(body):
+    """
+    Decodifica con el backend. Un cuerpo que no es JSON (ej. una pagina de
+    error HTML con status 200) sale como requests.exceptions.JSONDecodeError,
+    igual que r.json(): es un RequestException, asi que los caminos que
+    degradan una tienda por fallas de red tambien lo atrapan.
+    """
+    try:
+        if orjson is not None:
+            return orjson.loads(body)
+        return json.loads(body)
+    except json.JSONDecodeError as e:  # orjson.JSONDecodeError hereda de este
+        raise requests.exceptions.JSONDecodeError(e.msg, _as_text(e.doc), e.pos) from e
+    except UnicodeDecodeError as e:
+        raise requests.exceptions.JSONDecodeError(e.reason, _as_text(body), e.start) from e
+
+
+def _as_text(doc):
+    if isinstance(doc, (bytes, bytearray, memoryview)):
+        return bytes(doc).decode("utf-8", "replace")
+    return doc if isinstance(doc, str) else ""
+
+
+def loads(body):
+    if not metrics.ENABLED:
+        return _loads(body)
+    with metrics.timer("json_decode_seconds", mode="full", backend=BACKEND):
+        return _loads(body)
+
+
+def response_json(r):
+    """
+    Reemplazo de r.json(): decodifica r.content una vez con el backend; si
+    no es JSON lanza requests.exceptions.JSONDecodeError como r.json().
+    """
+    return loads(r.content)
+
+
+def select_products(body, codes, keep_first=False):
+    """
+    Decodifica de un arreglo de busqueda VTEX solo los productos cuyo JSON
+    crudo menciona alguno de `codes` como string ("itemId": "123",
+    "ean": "770..."). Si ningun codigo aparece no decodifica nada.
+    keep_first=True agrega siempre el primer producto (para los que usan
+    "el primero" como respaldo). Devuelve candidatos en el orden original
+    (el llamador igual verifica el item); si el cuerpo no tiene la forma
+    esperada, decodifica todo y devuelve la lista entera. Un cuerpo que no
+    es JSON lanza requests.exceptions.JSONDecodeError.
+    """
+    if not metrics.ENABLED:
+        return _select_products(body, codes, keep_first)
+    with metrics.timer("json_decode_seconds", mode="select", backend=BACKEND):
+        return _select_products(body, codes, keep_first)
+
+
+def _select_products(body, codes, keep_first):
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    needles = [b'"' + str(c).encode("utf-8") + b'"' for c in codes if c]
+    if not keep_first and not any(n in body for n in needles):
+        return []
+
+    starts = [m.start() for m in PRODUCT_START.finditer(body)]
+    if not starts or not body.lstrip().startswith(b"["):
+        data = _loads(body)
+        return data if isinstance(data, list) else []
+
+    # en que productos cae cada mencion (sin recorrer producto por producto)
+    wanted = {0} if keep_first else set()
+    for needle in needles:
+        pos = body.find(needle)
+        while pos != -1:
+            wanted.add(bisect.bisect_right(starts, pos) - 1)
+            pos = body.find(needle, pos + 1)
+
+    selected = []
+    for i in sorted(wanted):
+        if i < 0:
+            continue
+        end = starts[i + 1] if i + 1 < len(starts) else len(body)
+        try:
+            selected.append(_loads(body[starts[i]:end].rstrip(b" \t\r\n,]")))
+        except requests.exceptions.JSONDecodeError:
+            # "productId" anidado u otra forma rara: mejor decodificar todo
+            data = _loads(body)
+            return data if isinstance(data, list) else []
+    return selected
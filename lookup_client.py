@@ -0,0 +1,69 @@
+import json
+import sys
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+# Cliente liviano de lookup_server.py: solo libreria estandar, asi que
+# arranca al instante (nada de requests/urllib3/certifi por pregunta).
+SERVER_URL = "http://127.0.0.1:8765"
+TIMEOUT = 120
+
+
+class ServiceError(Exception):
+    pass
+
+
+def call(path, server=None, **params):
+    """
+    GET al servicio -> dict de la respuesta. Lanza ServiceError con el
+    mensaje del servidor si responde con error o no esta corriendo.
+    """
+    url = f"{server or SERVER_URL}{path}?{urlencode(params)}"
+    try:
+        with urlopen(url, timeout=TIMEOUT) as r:
+            return json.loads(r.read())
+    except HTTPError as e:
+        try:
+            detail = json.loads(e.read()).get("error")
+        except ValueError:
+            detail = None
+        raise ServiceError(detail or f"HTTP {e.code}") from e
+    except URLError as e:
+        raise ServiceError(f"Servicio no disponible en {server or SERVER_URL} ({e.reason})") from e
+
+
+def ask(question, server=None):
+    return call("/ask", server, q=question)["answer"]
+
+
+def answer(question, server=None):
+    return call("/answer", server, q=question)["answer"]
+
+
+def answer_full(question, server=None):
+    return call("/answer_full", server, q=question)["answer"]
+
+
+def product(store, code, fields=None, server=None):
+    params = {"store": store, "code": code}
+    if fields:
+        params["fields"] = ",".join(fields)
+    return call("/product", server, **params)["product"]
+
+
+def metrics(server=None):
+    """
+    Snapshot JSON de las metricas del servicio (ver metrics.snapshot).
+    """
+    return call("/metrics", server, format="json")
+
+
+if __name__ == "__main__":
+    # python lookup_client.py "precio metro 7702213400181"
+    question = " ".join(sys.argv[1:]).strip() or input("Pregunta: ").strip()
+    try:
+        print(ask(question))
+    except ServiceError as e:
+        print("Error:", e)
+        sys.exit(1)
@@ -0,0 +1,241 @@
+import requests
+
+import http_pool
+import json_decode
+import metrics
+from catalog_store import CatalogStore
+from code_classifier import StrategyStats
+from id_index import IdIndex
+from product_cache import ProductCache
+from response_memo import STATUS_CONCLUYENTES
+from single_flight import SingleFlight
+
+
+# Lo que comparten BusquedaSKU.py, BusquedaSKU-Informacion.py, SKU.py y
+# async_lookup.py: tiendas, configuracion de las busquedas, caches, indice
+# de ids, catalogo local y las funciones de apoyo de la cascada. El estado
+# (caches, ID_INDEX, CATALOG) se usa siempre como lookup_common.X, asi que
+# se puede reemplazar en un solo lugar (ej. indices en memoria en los
+# benchmarks).
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+    ),
+    "Accept": "application/json,text/html;q=0.9,*/*;q=0.8",
+    "Accept-Language": "es-CO,es;q=0.9,en;q=0.8",
+}
+
+STORES = {
+    "metro": {"type": "vtex", "base": "https://www.tiendasmetro.co"},
+    "olimpica": {"type": "vtex", "base": "https://www.olimpica.com"},
+    "exito": {"type": "exito", "base": "https://www.exito.com"},
+}
+metrics.register_stores(STORES)  # labels por tienda en las metricas de http_pool
+
+TIMEOUT = 30
+RETRIES = 2
+BACKOFF = 1.2
+SPECULATIVE = False  # cascada skuId/EAN/ft en paralelo (ver cascade.py)
+CACHE_TTL = 300  # segundos; nunca mas alla del PriceValidUntil de la oferta
+CACHE_MAXSIZE = 2048
+NEGATIVE_CACHE_TTL = 60  # "no existe en la tienda" se recuerda menos tiempo
+NEGATIVE_CACHE_MAXSIZE = 4096
+LOCAL_FIRST = False  # responder desde catalogo.sqlite (crawl de SKU.py) si esta fresco
+LOCAL_MAX_AGE = 24 * 3600  # segundos; una copia mas vieja se ignora y se va a la red
+
+PRODUCT_CACHE = ProductCache(maxsize=CACHE_MAXSIZE, ttl=CACHE_TTL)
+NEGATIVE_CACHE = ProductCache(maxsize=NEGATIVE_CACHE_MAXSIZE, ttl=NEGATIVE_CACHE_TTL)
+STRATEGY_STATS = StrategyStats()  # orden sku/ean aprendido por tienda y forma de codigo
+ID_INDEX = IdIndex()  # EAN -> itemId -> productId persistente (id_index.sqlite)
+CATALOG = CatalogStore()  # snapshot local del catalogo (catalogo.sqlite)
+# la misma URL pedida a la vez por varios hilos sale una sola vez (las
+# busquedas por (tienda, codigo) las junta AsyncLookup._single)
+URL_FLIGHTS = SingleFlight()
+
+
+def http_get(url: str, verify=True, ssl_fallback=False) -> requests.Response:
+    """
+    GET por la sesion keep-alive de la tienda (http_pool), con su limitador,
+    reintentos con backoff y circuit breaker. La misma URL pedida a la vez
+    por varios hilos con la misma verificacion SSL sale una sola vez. Cada
+    script decide verify (ej. el bundle de certifi) y si ante un SSLError
+    reintenta sin verificar.
+    """
+    # verify va en la clave: quien pide verificar no recibe una respuesta
+    # que otro trajo sin verificar
+    return URL_FLIGHTS.do(
+        (url, verify, ssl_fallback),
+        http_pool.fetch,
+        url,
+        headers=HEADERS,
+        timeout=TIMEOUT,
+        retries=RETRIES,
+        backoff=BACKOFF,
+        verify=verify,
+        ssl_fallback=ssl_fallback,
+    )
+
+
+def get_json(url: str, memo=None, match=None, keep_first=False, get=None):
+    """
+    GET + json() una sola vez. Devuelve (status_code, data); data es None si
+    la respuesta fue >= 400. Con `memo` (ResponseMemo) cada URL se pide y se
+    decodifica una sola vez por pregunta.
+    Con `match` (itemId/EAN) solo se decodifican los productos que lo
+    mencionan (json_decode.select_products), para busquedas ft= grandes.
+    `get` es el http_get del script (por defecto el de este modulo).
+    """
+    def load(_):
+        r = (get or http_get)(url)
+        if memo is not None and r.status_code not in STATUS_CONCLUYENTES:
+            memo.mark_failed(url)
+        if r.status_code >= 400:
+            data = None
+        elif match is not None and r.status_code == 200:
+            data = json_decode.select_products(r.content, [match], keep_first)
+        else:
+            data = json_decode.response_json(r)
+        if data and isinstance(data, list):
+            ID_INDEX.learn_products(store_for_url(url), data)
+        return r.status_code, data
+
+    if memo is None:
+        return load(url)
+    key = url if match is None else (url, str(match), keep_first)
+    return memo.fetch(key, load)
+
+
+def store_for_base(base: str) -> str:
+    """
+    Nombre de la tienda en STORES para una base ("metro"), o la base misma.
+    """
+    for name, info in STORES.items():
+        if info["base"] == base:
+            return name
+    return base
+
+
+def store_for_url(url: str) -> str:
+    for name, info in STORES.items():
+        if url.startswith(info["base"]):
+            return name
+    return url
+
+
+def vtex_lookup_order(store: str, code: str):
+    """
+    Orden de la cascada VTEX -> (orden, itemId conocido).
+    Si ID_INDEX ya sabe el itemId de este EAN va primero "index" (skuId del
+    item); si sabe que el codigo es un itemId va primero "sku".
+    """
+    known_item = ID_INDEX.item_for_ean(store, code)
+    if known_item:
+        order = ["index"] + STRATEGY_STATS.order(store, code, ["ean", "sku"])
+    elif ID_INDEX.is_item(store, code):
+        order = ["sku", "ean"]
+    else:
+        order = STRATEGY_STATS.order(store, code, ["sku", "ean"])
+    return order + ["ft"], known_item
+
+
+def exito_lookup_order(code: str):
+    """
+    Orden de la cascada de precio de Éxito: un GTIN valido (o un EAN ya
+    conocido en ID_INDEX) va primero por EAN -> itemId (ver code_classifier).
+    """
+    if ID_INDEX.item_for_ean("exito", code):
+        return ["ean", "sku"]
+    return STRATEGY_STATS.order("exito", code, ["sku", "ean"])
+
+
+def record_cascade(store: str, code: str, order, winner, kind: str = "price"):
+    """
+    Registra el resultado de una cascada en STRATEGY_STATS y cuenta en
+    metrics que rama la resolvio (sku, ean, index, ft o miss).
+    """
+    STRATEGY_STATS.record(store, code, order, winner)
+    metrics.inc("lookup_branch_total", store=store, kind=kind, branch=winner or "miss")
+
+
+def record_exito_product(by_ean: bool, found: bool):
+    """
+    Rama que resolvio get_product_exito (ean: EAN -> itemId, sku: directo).
+    """
+    branch = ("ean" if by_ean else "sku") if found else "miss"
+    metrics.inc("lookup_branch_total", store="exito", kind="product", branch=branch)
+
+
+def local_product(store: str, code: str, local_first=None):
+    """
+    (documento, itemId) desde el catalogo local si local_first (o
+    LOCAL_FIRST) esta activo, la copia tiene menos de LOCAL_MAX_AGE y el
+    PriceValidUntil de la oferta no paso; si no, None y se sigue por la red.
+    """
+    if not (LOCAL_FIRST if local_first is None else local_first):
+        return None
+    return CATALOG.find(store, code, max_age=LOCAL_MAX_AGE)
+
+
+def extract_vtex(product: dict, code: str):
+    """
+    Devuelve (price, list_price, name) si algún item coincide por itemId o ean
+    """
+    name = product.get("productName", "Producto")
+    for item in product.get("items", []):
+        if str(item.get("itemId", "")) == str(code) or str(item.get("ean", "")) == str(code):
+            offer = item["sellers"][0]["commertialOffer"]
+            return offer.get("Price"), offer.get("ListPrice"), name
+    return None
+
+
+def pick_text_match(data, code: str):
+    """
+    De una busqueda ft: el producto con un item que matchee exacto por
+    itemId/ean o, si no hay, el primero como fallback.
+    """
+    for p in data:
+        for item in p.get("items", []):
+            if str(item.get("itemId", "")) == str(code) or str(item.get("ean", "")) == str(code):
+                return p
+    return data[0] if data else None
+
+
+def exito_price_from_sku(data):
+    """
+    (price, list_price, name) desde la respuesta de getProductBySku.
+    """
+    if not data:
+        return None
+
+    p = data[0]
+    name = p.get("productName", "Producto")
+
+    try:
+        offer = p["items"][0]["sellers"][0]["commertialOffer"]
+        price = offer.get("Price")
+        list_price = offer.get("ListPrice")
+        if price is None:
+            return None
+        return price, list_price, name
+    except Exception:
+        return None
+
+
+def exito_itemid_from_search(data, ean: str):
+    """
+    itemId del item con ese EAN en una busqueda VTEX (o el del primer item).
+    """
+    if not data:
+        return None
+
+    p = data[0]
+    for item in p.get("items", []):
+        if str(item.get("ean", "")).strip() == str(ean).strip():
+            return str(item.get("itemId"))
+
+    # fallback: si no matchea exacto, intenta el primero
+    if p.get("items"):
+        return str(p["items"][0].get("itemId"))
+
+    return None
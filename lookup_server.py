@@ -0,0 +1,170 @@
+import importlib
+import json
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+import circuit_breaker
+import http_pool
+import lookup_common
+import metrics
+
+# Servicio residente: un solo proceso con las sesiones HTTP, los caches y
+# el indice de ids calientes entre preguntas (ver lookup_client.py).
+core = importlib.import_module("BusquedaSKU-Informacion")
+
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+METRICS = True  # el servicio residente mide siempre; /metrics las expone
+
+
+def handle_ask(params):
+    """
+    /ask?q=... decide como el script interactivo (wants_full_info).
+    """
+    q = _param(params, "q")
+    if core.wants_full_info(q):
+        return {"answer": core.answer_full(q), "full": True}
+    return {"answer": core.answer(q), "full": False}
+
+
+def handle_answer(params):
+    return {"answer": core.answer(_param(params, "q"))}
+
+
+def handle_answer_full(params):
+    return {"answer": core.answer_full(_param(params, "q"))}
+
+
+def handle_product(params):
+    """
+    /product?store=metro&code=7702...[&fields=nombre,precio]
+    """
+    store = _param(params, "store")
+    if store not in lookup_common.STORES:
+        raise ValueError(f"Tienda desconocida: {store}")
+    fields = params.get("fields", [None])[0]
+    fields = [f for f in fields.split(",") if f] if fields else None
+    summary = core.summarize_store_product(store, _param(params, "code"), fields=fields)
+    return {"store": store, "product": summary}
+
+
+def handle_health(params):
+    return {
+        "ok": True,
+        "product_cache": lookup_common.PRODUCT_CACHE.stats(),
+        "negative_cache": lookup_common.NEGATIVE_CACHE.stats(),
+        "circuits": circuit_breaker.snapshot(),
+    }
+
+
+def handle_metrics(params):
+    """
+    /metrics en texto Prometheus; /metrics?format=json como JSON.
+    """
+    if (params.get("format") or [""])[0] == "json":
+        return metrics.snapshot()
+    return metrics.prometheus_text()
+
+
+ROUTES = {
+    "/ask": handle_ask,
+    "/answer": handle_answer,
+    "/answer_full": handle_answer_full,
+    "/product": handle_product,
+    "/health": handle_health,
+    "/metrics": handle_metrics,
+}
+
+
+def _param(params, name):
+    value = (params.get(name) or [""])[0].strip()
+    if not value:
+        raise ValueError(f"Falta el parametro '{name}'.")
+    return value
+
+
+class LookupHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive con el cliente
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload):
+        if isinstance(payload, str):
+            # texto plano (formato de exposicion de Prometheus)
+            body = payload.encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+            content_type = "application/json; charset=utf-8"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _dispatch(self, params):
+        path = urlsplit(self.path).path.rstrip("/") or "/"
+        handler = ROUTES.get(path)
+        if handler is None:
+            return self._send(404, {"error": f"Ruta desconocida: {path}"})
+        try:
+            return self._send(200, handler(params))
+        except requests.exceptions.RequestException as e:
+            # antes que ValueError: un JSONDecodeError de la tienda es ambos
+            return self._send(502, {"error": f"La tienda no respondio: {e}"})
+        except ValueError as e:
+            return self._send(400, {"error": str(e)})
+        except Exception as e:
+            return self._send(500, {"error": str(e)})
+
+    def do_GET(self):
+        self._dispatch(parse_qs(urlsplit(self.path).query))
+
+    def do_POST(self):
+        # mismo formato que GET pero con los parametros en un JSON:
+        # {"q": "..."} o {"store": "metro", "code": "...", "fields": [...]}
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            data = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._send(400, {"error": "JSON invalido"})
+        if not isinstance(data, dict):
+            return self._send(400, {"error": "Se esperaba un objeto JSON"})
+        params = {}
+        for key, value in data.items():
+            if isinstance(value, (list, tuple)):
+                value = ",".join(str(v) for v in value)
+            params[key] = [str(value)]
+        self._dispatch(params)
+
+
+class LookupServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+def serve(host=SERVER_HOST, port=SERVER_PORT):
+    """
+    Levanta el servicio y atiende hasta Ctrl+C. Cada request corre en su
+    hilo; las sesiones por tienda (http_pool) se crean de entrada.
+    """
+    metrics.enable(METRICS)
+    http_pool.warm_up([s["base"] for s in lookup_common.STORES.values()])
+    server = LookupServer((host, port), LookupHandler)
+    print(f"Escuchando en http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        http_pool.close_sessions()
+        lookup_common.ID_INDEX.close()
+
+
+if __name__ == "__main__":
+    # python lookup_server.py [puerto]
+    serve(port=int(sys.argv[1]) if len(sys.argv) > 1 else SERVER_PORT)
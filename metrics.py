@@ -0,0 +1,219 @@
+import functools
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+# Metricas del camino caliente (requests, reintentos, rama de la cascada,
+# decodificacion JSON, armado del resumen). Apagadas por defecto: cada
+# punto de medicion solo mira ENABLED y sigue. Se exportan como texto
+# Prometheus (prometheus_text) o JSON (snapshot).
+ENABLED = False
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)  # segundos
+PREFIX = "compshop_"
+
+# "https://www.exito.com" -> "exito" (ver register_stores)
+STORE_HOSTS = {}
+
+_counters = {}  # (nombre, labels) -> valor
+_histograms = {}  # (nombre, labels) -> [cuenta por bucket..., +Inf, suma]
+_lock = threading.Lock()
+
+
+def enable(on: bool = True):
+    global ENABLED
+    ENABLED = bool(on)
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def register_stores(stores: dict):
+    """
+    Nombres de tienda para las labels de los requests, desde STORES.
+    """
+    for store, cfg in stores.items():
+        parts = urlsplit(cfg["base"])
+        STORE_HOSTS[f"{parts.scheme}://{parts.netloc}".lower()] = store
+
+
+def store_for(url: str) -> str:
+    parts = urlsplit(url)
+    host = f"{parts.scheme}://{parts.netloc}".lower()
+    return STORE_HOSTS.get(host, parts.netloc or "desconocido")
+
+
+def endpoint_for(url: str) -> str:
+    """
+    Endpoint (sin ids) de una URL de tienda, para no explotar las labels.
+    """
+    path = urlsplit(url).path
+    if "/products/search" in path:
+        return "search"
+    if "getProductBySku" in path:
+        return "getProductBySku"
+    if "orderForms/simulation" in path:
+        return "simulation"
+    if "/category/tree" in path:
+        return "category_tree"
+    return "otro"
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name: str, value=1, **labels):
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name: str, seconds: float, **labels):
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        counts = _histograms.get(key)
+        if counts is None:
+            counts = _histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[len(BUCKETS)] += 1
+        counts[-1] += seconds
+
+
+class _Timer:
+    __slots__ = ("name", "labels", "started")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+        self.started = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class _NoTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_TIMER = _NoTimer()
+
+
+def timer(name: str, **labels):
+    """
+    with metrics.timer("json_decode_seconds", mode="full"): ...
+    """
+    if not ENABLED:
+        return _NO_TIMER
+    return _Timer(name, labels)
+
+
+def timed(name: str, **labels):
+    """
+    Decorador: histograma `name` con la duracion de cada llamada.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            with _Timer(name, labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def record_request(labels: dict, status, latency: float, retry_reason=None, timeout=False):
+    """
+    Un intento HTTP (http_pool.fetch / async_lookup): status ("error" si no
+    hubo respuesta), latencia, timeout y, si se va a reintentar, el motivo.
+    """
+    inc("http_requests_total", status=status, **labels)
+    observe("http_request_seconds", latency, **labels)
+    if timeout:
+        inc("http_timeouts_total", **labels)
+    if retry_reason is not None:
+        inc("http_retries_total", reason=retry_reason, **labels)
+
+
+def snapshot() -> dict:
+    """
+    {"counters": [{name, labels, value}], "histograms": [{name, labels,
+    buckets: {le: acumulado}, count, sum}]}
+    """
+    with _lock:
+        counters = list(_counters.items())
+        histograms = [(key, list(counts)) for key, counts in _histograms.items()]
+
+    result = {"enabled": ENABLED, "counters": [], "histograms": []}
+    for (name, labels), value in sorted(counters):
+        result["counters"].append({"name": name, "labels": dict(labels), "value": value})
+    for (name, labels), counts in sorted(histograms, key=lambda h: h[0]):
+        cumulative, buckets = 0, {}
+        for bound, n in zip(BUCKETS, counts):
+            cumulative += n
+            buckets[str(bound)] = cumulative
+        cumulative += counts[len(BUCKETS)]
+        buckets["+Inf"] = cumulative
+        result["histograms"].append(
+            {"name": name, "labels": dict(labels), "buckets": buckets, "count": cumulative, "sum": counts[-1]}
+        )
+    return result
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels_text(labels: dict, extra=None) -> str:
+    items = list(labels.items()) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def prometheus_text() -> str:
+    """
+    Formato de exposicion de texto de Prometheus (version 0.0.4).
+    """
+    data = snapshot()
+    lines = []
+    typed = set()
+    for c in data["counters"]:
+        name = PREFIX + c["name"]
+        if name not in typed:
+            lines.append(f"# TYPE {name} counter")
+            typed.add(name)
+        lines.append(f"{name}{_labels_text(c['labels'])} {c['value']}")
+    for h in data["histograms"]:
+        name = PREFIX + h["name"]
+        if name not in typed:
+            lines.append(f"# TYPE {name} histogram")
+            typed.add(name)
+        for le, n in h["buckets"].items():
+            lines.append(f"{name}_bucket{_labels_text(h['labels'], ('le', le))} {n}")
+        lines.append(f"{name}_sum{_labels_text(h['labels'])} {h['sum']}")
+        lines.append(f"{name}_count{_labels_text(h['labels'])} {h['count']}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+
+def parse_valid_until(value):
+    """
+    "2027-02-25T21:51:47Z" -> epoch (float). None si no se puede leer.
+    """
+    if not value:
+        return None
+    try:
+        text = str(value).strip().replace("Z", "+00:00")
+        return datetime.fromisoformat(text).timestamp()
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+def product_valid_until(product: dict):
+    """
+    El PriceValidUntil mas cercano entre todas las ofertas del producto.
+    """
+    soonest = None
+    for item in (product or {}).get("items", []) or []:
+        for seller in item.get("sellers", []) or []:
+            offer = seller.get("commertialOffer") or {}
+            ts = parse_valid_until(offer.get("PriceValidUntil"))
+            if ts is not None and (soonest is None or ts < soonest):
+                soonest = ts
+    return soonest
+
+
+class ProductCache:
+    """
+    Cache LRU acotado con TTL para productos ya resueltos.
+    Las claves son tuplas (tipo, tienda, codigo); una entrada nunca vive
+    mas alla del PriceValidUntil de su oferta.
+    """
+
+    def __init__(self, maxsize: int = 2048, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, valid_until=None, ttl=None):
+        """
+        Guarda `value`. `valid_until` (epoch o texto PriceValidUntil) recorta
+        el TTL; si ya vencio no se guarda nada.
+        """
+        if self.maxsize <= 0:
+            return
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        if isinstance(valid_until, str):
+            valid_until = parse_valid_until(valid_until)
+        if valid_until is not None:
+            expires_at = min(expires_at, valid_until)
+        if expires_at <= now:
+            return
+
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, store=None, code=None) -> int:
+        """
+        Borra las entradas de una tienda y/o codigo (None = cualquiera).
+        Devuelve cuantas se borraron.
+        """
+        with self._lock:
+            keys = [
+                k
+                for k in self._data
+                if (store is None or k[1] == store) and (code is None or k[2] == str(code))
+            ]
+            for k in keys:
+                del self._data[k]
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,374 @@
+import unicodedata
+from functools import lru_cache
+
+import circuit_breaker
+import deadline
+import lookup_common
+import metrics
+from records import Offer, Product, ProductSummary
+
+# Vista corta de un producto (build_summary / summary_record) a partir del
+# documento VTEX ya descargado, sin nada de red: la usan el motor de
+# busquedas (async_lookup.py) y los lotes de BusquedaSKU-Informacion.py.
+SPEC_KEY_CACHE = 4096  # nombres de especificacion normalizados en memoria
+
+
+def money_cop(v):
+    try:
+        return f"$ {float(v):,.0f}".replace(",", ".")
+    except Exception:
+        return str(v)
+
+
+def extract_item_and_offer(product: dict, code: str):
+    """
+    Intenta encontrar el item por itemId/ean y su oferta.
+    Si no coincide exacto, usa el primer item disponible.
+    """
+    items = product.get("items", []) if product else []
+    if not items:
+        return None, None
+
+    selected = None
+    for item in items:
+        if str(item.get("itemId", "")) == str(code) or str(item.get("ean", "")) == str(code):
+            selected = item
+            break
+
+    if selected is None:
+        selected = items[0]
+
+    offer = None
+    sellers = selected.get("sellers", [])
+    if sellers and sellers[0].get("commertialOffer"):
+        offer = sellers[0]["commertialOffer"]
+
+    return selected, offer
+
+
+def _fix_mojibake(text: str) -> str:
+    # "TamaÃ±o" (UTF-8 leido como latin-1/cp1252) -> "Tamaño"
+    if "Ã" not in text and "Â" not in text:
+        return text
+    for encoding in ("cp1252", "latin-1"):
+        try:
+            return text.encode(encoding).decode("utf-8")
+        except UnicodeError:
+            continue
+    return text
+
+
+@lru_cache(maxsize=SPEC_KEY_CACHE)
+def _normalize_spec_key(text: str) -> str:
+    normalized = unicodedata.normalize("NFKD", _fix_mojibake(text).lower())
+    normalized = "".join(ch for ch in normalized if not unicodedata.combining(ch))
+    return " ".join(normalized.split())
+
+
+def normalize_spec_key(text: str) -> str:
+    """
+    Clave comparable de un nombre de especificacion: sin mayusculas, tildes
+    ni mojibake. Los nombres se repiten en todo el catalogo, asi que el
+    resultado queda memorizado (SPEC_KEY_CACHE).
+    """
+    if text is None:
+        return ""
+    return _normalize_spec_key(str(text))
+
+
+def spec_index(mapping: dict, skip_none: bool = False) -> dict:
+    """
+    {clave normalizada: valor} de un producto (o de un specifications_map),
+    armado una sola vez. Si dos claves normalizan igual gana la primera.
+    """
+    index = {}
+    for key, value in mapping.items():
+        if skip_none and value is None:
+            continue
+        index.setdefault(normalize_spec_key(key), value)
+    return index
+
+
+def resolve_spec_value(product: dict, spec_name: str, index=None):
+    """
+    Busca el valor de una especificacion tolerando cambios de mayusculas/tildes.
+    `index` (spec_index del producto) evita recorrer el producto en cada spec.
+    """
+    if spec_name in product:
+        return product.get(spec_name)
+
+    if index is None:
+        index = spec_index(product)
+    return index.get(normalize_spec_key(spec_name))
+
+
+def spec_values(product: dict) -> dict:
+    """
+    {spec: valor} para todo allSpecifications. El indice normalizado se arma
+    solo si alguna spec no esta con su nombre exacto, y una sola vez.
+    """
+    values = {}
+    index = None
+    for spec_name in product.get("allSpecifications", []) or []:
+        if spec_name in product:
+            values[spec_name] = product.get(spec_name)
+            continue
+        if index is None:
+            index = spec_index(product)
+        values[spec_name] = index.get(normalize_spec_key(spec_name))
+    return values
+
+
+def sanitize_items(items):
+    """
+    Normaliza items al formato solicitado y evita campos extra (ej. metodos de pago).
+    """
+    cleaned = []
+    for product_item in items or []:
+        images_clean = []
+        for img in product_item.get("images", []) or []:
+            images_clean.append(
+                {
+                    "imageUrl": img.get("imageUrl"),
+                    "imageLastModified": img.get("imageLastModified"),
+                }
+            )
+
+        sellers_clean = []
+        for seller in product_item.get("sellers", []) or []:
+            offer = seller.get("commertialOffer") or {}
+            sellers_clean.append(
+                {
+                    "sellerId": seller.get("sellerId"),
+                    "sellerName": seller.get("sellerName"),
+                    "addToCartLink": seller.get("addToCartLink"),
+                    "sellerDefault": seller.get("sellerDefault"),
+                    "commertialOffer": {
+                        "BuyTogether": offer.get("BuyTogether"),
+                        "Price": offer.get("Price"),
+                        "ListPrice": offer.get("ListPrice"),
+                        "PriceWithoutDiscount": offer.get("PriceWithoutDiscount"),
+                        "FullSellingPrice": offer.get("FullSellingPrice"),
+                        "PriceValidUntil": offer.get("PriceValidUntil"),
+                        "AvailableQuantity": offer.get("AvailableQuantity"),
+                        "IsAvailable": offer.get("IsAvailable"),
+                        "Tax": offer.get("Tax"),
+                    },
+                }
+            )
+
+        cleaned.append(
+            {
+                "isKit": product_item.get("isKit"),
+                "images": images_clean,
+                "sellers": sellers_clean,
+                "Videos": product_item.get("Videos", []),
+                "estimatedDateArrival": product_item.get("estimatedDateArrival"),
+            }
+        )
+    return cleaned
+
+
+def summary_fields(fields):
+    """
+    Normaliza una proyeccion de campos del resumen: None = todos. Siempre
+    incluye PriceValidUntil (con eso se decide cuanto vive en cache).
+    """
+    if fields is None:
+        return None
+    return tuple(sorted(set(fields) | {"PriceValidUntil"}))
+
+
+def cached_summary(store: str, code: str, fields=None):
+    """
+    Resumen en PRODUCT_CACHE: el completo (recortado a `fields`) o uno ya
+    armado con esa misma proyeccion. None si no hay.
+    """
+    fields = summary_fields(fields)
+    full_key = ("summary", store, str(code))
+    cached = lookup_common.PRODUCT_CACHE.get(full_key)
+    if cached is not None:
+        return cached if fields is None else {k: cached[k] for k in fields if k in cached}
+    if fields is None:
+        return None
+    return lookup_common.PRODUCT_CACHE.get(full_key + (fields,))
+
+
+@metrics.timed("summary_seconds", kind="dict")
+def build_summary(store: str, code: str, product: dict, skuid=None, exito_sku=None, fields=None):
+    """
+    Arma la vista corta del producto a partir del documento VTEX ya
+    descargado. En Éxito `skuid` es el itemId resuelto y `exito_sku` la
+    respuesta de getProductBySku (respaldo de precio, nombre e imagen).
+    Con `fields` solo se calculan esas claves (items, specs y formatos de
+    precio se arman solo si se piden); None = todas.
+    """
+    match = skuid if skuid is not None else code
+    item, offer = extract_item_and_offer(product, match)
+
+    # Fallback de precio desde getProductBySku cuando no llega por VTEX.
+    if offer is None and exito_sku:
+        try:
+            offer = exito_sku[0]["items"][0]["sellers"][0]["commertialOffer"]
+        except Exception:
+            offer = None
+
+    price = offer.get("Price") if offer else None
+    list_price = offer.get("ListPrice") if offer else None
+
+    if exito_sku is None:
+        name = product.get("productName", "Producto")
+    else:
+        name = product.get("productName")
+        if not name and exito_sku:
+            name = exito_sku[0].get("productName")
+
+    def product_id():
+        return str(product.get("productId")) if product.get("productId") else None
+
+    def sku():
+        value = item.get("itemId") if item else match
+        return str(value) if value else None
+
+    def ean():
+        value = item.get("ean") if item else None
+        return str(value) if value else None
+
+    def image():
+        if item and item.get("images"):
+            return item["images"][0].get("imageUrl")
+        if exito_sku:
+            try:
+                return exito_sku[0]["items"][0]["images"][0]["imageUrl"]
+            except Exception:
+                return None
+        return None
+
+    def has_discount():
+        return (
+            isinstance(price, (int, float))
+            and isinstance(list_price, (int, float))
+            and list_price > price
+            and list_price > 0
+        )
+
+    def descuento():
+        if not has_discount():
+            return None
+        pct = round((1 - (price / list_price)) * 100)
+        return f"{pct}%"
+
+    def ahorro():
+        return money_cop(list_price - price) if has_discount() else None
+
+    def offer_money(key):
+        def get():
+            value = offer.get(key) if offer else None
+            return money_cop(value) if value is not None else None
+        return get
+
+    def specifications_map():
+        return spec_values(product)
+
+    getters = {
+        "tienda": lambda: store,
+        "sku_consultado": lambda: code,
+        "id": product_id,
+        "sku": sku,
+        "ean": ean,
+        "productId": product_id,
+        "productName": lambda: name or "Producto",
+        "brand": lambda: product.get("brand"),
+        "productTitle": lambda: product.get("productTitle"),
+        "metaTagDescription": lambda: product.get("metaTagDescription"),
+        "releaseDate": lambda: product.get("releaseDate"),
+        "categories": lambda: product.get("categories"),
+        "Maximum_units_to_sell": lambda: product.get("Maximum_units_to_sell"),
+        "allSpecifications": lambda: product.get("allSpecifications"),
+        "specifications_map": specifications_map,
+        "items": lambda: sanitize_items(product.get("items", [])),
+        "nombre": lambda: name or "Producto",
+        "descripcion": lambda: product.get("metaTagDescription"),
+        "categoria": lambda: product.get("categories")[0] if product.get("categories") else None,
+        "marca": lambda: product.get("brand"),
+        "precio": offer_money("Price"),
+        "precio_lista": offer_money("ListPrice"),
+        "descuento": descuento,
+        "ahorro": ahorro,
+        "price": offer_money("Price"),
+        "last_price": offer_money("ListPrice"),
+        "PriceWithoutDiscount": offer_money("PriceWithoutDiscount"),
+        "FullSellingPrice": offer_money("FullSellingPrice"),
+        "PriceValidUntil": lambda: offer.get("PriceValidUntil") if offer else None,
+        "link": lambda: product.get("link"),
+        "link_imagen": image,
+    }
+    if fields is None:
+        return {key: get() for key, get in getters.items()}
+    wanted = set(fields)
+    return {key: get() for key, get in getters.items() if key in wanted}
+
+
+@metrics.timed("summary_seconds", kind="record")
+def summary_record(store: str, code: str, product: dict, skuid=None, exito_sku=None):
+    """
+    Lo mismo que build_summary pero como ProductSummary (records.py): precios
+    enteros en centavos, sin valores repetidos ni textos ya formateados.
+    record.to_dict(fields) devuelve exactamente el dict de build_summary.
+    """
+    match = skuid if skuid is not None else code
+    raw_item, raw_offer = extract_item_and_offer(product, match)
+    specs = spec_values(product or {})
+    compact = Product.from_vtex(product or {}, lambda p, name: specs.get(name))
+
+    item = None
+    for raw, rec in zip(product.get("items", []) if product else [], compact.items):
+        if raw is raw_item:
+            item = rec
+            break
+    offer = item.offer if item is not None and raw_offer is not None else None
+
+    # mismos respaldos de Éxito que build_summary
+    if raw_offer is None and exito_sku:
+        try:
+            offer = Offer.from_vtex(exito_sku[0]["items"][0]["sellers"][0])
+        except Exception:
+            offer = None
+
+    if exito_sku is None:
+        name = product.get("productName", "Producto")
+    else:
+        name = product.get("productName")
+        if not name and exito_sku:
+            name = exito_sku[0].get("productName")
+
+    image = None
+    if exito_sku:
+        try:
+            image = exito_sku[0]["items"][0]["images"][0]["imageUrl"]
+        except Exception:
+            image = None
+
+    return ProductSummary(
+        store, code, compact, item=item, offer=offer, name=name,
+        fallback_image=image, fallback_sku=match,
+    )
+
+
+def degraded(store: str, code: str, err: Exception) -> dict:
+    """
+    Resultado de una tienda que no contesto (plazo vencido, circuito
+    abierto o error de red), para devolver respuestas parciales.
+    """
+    if isinstance(err, deadline.DeadlineExceeded):
+        reason = "sin respuesta a tiempo"
+    elif isinstance(err, circuit_breaker.CircuitOpen):
+        reason = "tienda en pausa por fallos repetidos"
+    else:
+        reason = "error de red"
+    metrics.inc("degraded_results_total", store=store, reason=type(err).__name__)
+    return {"tienda": store, "sku_consultado": code, "degradado": True, "motivo": reason}
+
+
+def is_degraded(data) -> bool:
+    return isinstance(data, dict) and data.get("degradado") is True
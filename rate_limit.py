@@ -0,0 +1,135 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+
+# Limitador por host (token bucket) que se adapta con AIMD: sube de a poco
+# mientras la tienda responde bien y baja a la mitad con 429/503.
+RATE_INICIAL = 5.0  # requests por segundo
+RATE_MIN = 0.5
+RATE_MAX = 50.0
+BURST = 10
+INCREMENTO = 0.5
+FACTOR_BAJA = 0.5
+LATENCIA_LENTA = 5.0  # segundos; por encima se baja el ritmo suavemente
+
+STATUS_REINTENTABLES = {429, 502, 503, 504}
+
+
+class HostLimiter:
+    def __init__(self, rate=None, burst=None, rate_min=None, rate_max=None):
+        self.rate = RATE_INICIAL if rate is None else rate
+        self.burst = BURST if burst is None else burst
+        self.rate_min = RATE_MIN if rate_min is None else rate_min
+        self.rate_max = RATE_MAX if rate_max is None else rate_max
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> float:
+        """
+        Toma un token si hay y devuelve 0; si no, devuelve cuantos segundos
+        esperar antes de volver a intentar (sirve igual para hilos y asyncio).
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if now >= self.blocked_until and self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+
+    def acquire(self, timeout=None) -> bool:
+        """
+        Bloquea hasta que haya un token y el host no este en pausa por
+        Retry-After. Con `timeout` (segundos) devuelve False si para eso
+        habria que esperar mas que eso.
+        """
+        limit = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return True
+            if limit is not None and time.monotonic() + wait >= limit:
+                return False
+            time.sleep(wait)
+
+    def on_response(self, status: int, latency: float, retry_after=None):
+        with self._lock:
+            if status in (429, 503):
+                self.rate = max(self.rate_min, self.rate * FACTOR_BAJA)
+                if retry_after:
+                    self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+            elif latency > LATENCIA_LENTA:
+                self.rate = max(self.rate_min, self.rate * 0.9)
+            elif status < 400:
+                self.rate = min(self.rate_max, self.rate + INCREMENTO)
+
+    def on_error(self):
+        with self._lock:
+            self.rate = max(self.rate_min, self.rate * FACTOR_BAJA)
+
+
+_limiters = {}
+_lock = threading.Lock()
+
+
+def limiter_for(key: str) -> HostLimiter:
+    limiter = _limiters.get(key)
+    if limiter is None:
+        with _lock:
+            limiter = _limiters.setdefault(key, HostLimiter())
+    return limiter
+
+
+def reset():
+    with _lock:
+        _limiters.clear()
+
+
+def parse_retry_after(value):
+    """
+    Retry-After en segundos ("120") o fecha HTTP. None si no viene.
+    """
+    if not value:
+        return None
+    value = str(value).strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def backoff_delay(attempt: int, backoff: float, cap: float = 30.0) -> float:
+    """
+    Espera con jitter completo: uniforme entre 0 y backoff * 2^attempt.
+    """
+    return random.uniform(0, min(cap, backoff * (2 ** attempt)))
+
+
+def is_retryable_error(err: Exception) -> bool:
+    """
+    Timeouts y cortes de conexion se reintentan; DNS que no resuelve, URLs
+    invalidas y demas errores del lado nuestro no.
+    """
+    if isinstance(err, (requests.exceptions.InvalidURL, requests.exceptions.MissingSchema)):
+        return False
+    if isinstance(err, requests.exceptions.Timeout):
+        return True
+    if isinstance(err, requests.exceptions.ConnectionError):
+        texto = repr(err)
+        dns = (
+            "NameResolutionError",
+            "Name or service not known",
+            "getaddrinfo failed",
+            "nodename nor servname",
+        )
+        return not any(marca in texto for marca in dns)
+    return False
@@ -0,0 +1,363 @@
+import sys
+
+
+# Registros compactos (con __slots__) para producto, item y oferta VTEX.
+# Los precios se guardan como enteros en centavos y solo se formatean al
+# mostrar; to_dict() devuelve la misma forma de dict que usaba el codigo.
+
+
+def to_cents(value):
+    if value is None:
+        return None
+    try:
+        return int(round(float(value) * 100))
+    except (TypeError, ValueError):
+        return None
+
+
+def from_cents(cents):
+    """
+    Centavos -> pesos como los manda VTEX (int si no hay fraccion).
+    """
+    if cents is None:
+        return None
+    return cents // 100 if cents % 100 == 0 else cents / 100
+
+
+def format_cop(cents):
+    """
+    Igual que money_cop pero desde centavos: 123450 -> "$ 1.234".
+    """
+    if cents is None:
+        return None
+    return f"$ {cents / 100:,.0f}".replace(",", ".")
+
+
+def _intern(value):
+    # marcas, vendedores y categorias se repiten en todo el catalogo
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _tuple(values):
+    return tuple(values) if values is not None else None
+
+
+class Offer:
+    __slots__ = (
+        "seller_id",
+        "seller_name",
+        "add_to_cart_link",
+        "seller_default",
+        "price",
+        "list_price",
+        "price_without_discount",
+        "full_selling_price",
+        "valid_until",
+        "available_quantity",
+        "is_available",
+        "tax",
+        "buy_together",
+    )
+
+    def __init__(self, seller_id=None, seller_name=None, add_to_cart_link=None, seller_default=None,
+                 price=None, list_price=None, price_without_discount=None, full_selling_price=None,
+                 valid_until=None, available_quantity=None, is_available=None, tax=None,
+                 buy_together=None):
+        self.seller_id = _intern(seller_id)
+        self.seller_name = _intern(seller_name)
+        self.add_to_cart_link = add_to_cart_link
+        self.seller_default = seller_default
+        self.price = price
+        self.list_price = list_price
+        self.price_without_discount = price_without_discount
+        self.full_selling_price = full_selling_price
+        self.valid_until = _intern(valid_until)
+        self.available_quantity = available_quantity
+        self.is_available = is_available
+        self.tax = tax
+        self.buy_together = buy_together
+
+    @classmethod
+    def from_vtex(cls, seller: dict):
+        offer = seller.get("commertialOffer") or {}
+        return cls(
+            seller_id=seller.get("sellerId"),
+            seller_name=seller.get("sellerName"),
+            add_to_cart_link=seller.get("addToCartLink"),
+            seller_default=seller.get("sellerDefault"),
+            price=to_cents(offer.get("Price")),
+            list_price=to_cents(offer.get("ListPrice")),
+            price_without_discount=to_cents(offer.get("PriceWithoutDiscount")),
+            full_selling_price=to_cents(offer.get("FullSellingPrice")),
+            valid_until=offer.get("PriceValidUntil"),
+            available_quantity=offer.get("AvailableQuantity"),
+            is_available=offer.get("IsAvailable"),
+            tax=offer.get("Tax"),
+            buy_together=_tuple(offer.get("BuyTogether")),
+        )
+
+    def commertial_offer(self) -> dict:
+        return {
+            "BuyTogether": list(self.buy_together) if self.buy_together is not None else None,
+            "Price": from_cents(self.price),
+            "ListPrice": from_cents(self.list_price),
+            "PriceWithoutDiscount": from_cents(self.price_without_discount),
+            "FullSellingPrice": from_cents(self.full_selling_price),
+            "PriceValidUntil": self.valid_until,
+            "AvailableQuantity": self.available_quantity,
+            "IsAvailable": self.is_available,
+            "Tax": self.tax,
+        }
+
+    def to_dict(self) -> dict:
+        """
+        Mismo formato que un seller de sanitize_items.
+        """
+        return {
+            "sellerId": self.seller_id,
+            "sellerName": self.seller_name,
+            "addToCartLink": self.add_to_cart_link,
+            "sellerDefault": self.seller_default,
+            "commertialOffer": self.commertial_offer(),
+        }
+
+
+class Item:
+    __slots__ = ("item_id", "ean", "is_kit", "images", "videos", "estimated_date_arrival", "offers")
+
+    def __init__(self, item_id=None, ean=None, is_kit=None, images=(), videos=(),
+                 estimated_date_arrival=None, offers=()):
+        self.item_id = item_id
+        self.ean = ean
+        self.is_kit = is_kit
+        self.images = images  # ((imageUrl, imageLastModified), ...)
+        self.videos = videos
+        self.estimated_date_arrival = estimated_date_arrival
+        self.offers = offers
+
+    @classmethod
+    def from_vtex(cls, item: dict):
+        return cls(
+            item_id=item.get("itemId"),
+            ean=item.get("ean"),
+            is_kit=item.get("isKit"),
+            images=tuple(
+                (img.get("imageUrl"), img.get("imageLastModified"))
+                for img in item.get("images", []) or []
+            ),
+            videos=_tuple(item.get("Videos", [])),
+            estimated_date_arrival=item.get("estimatedDateArrival"),
+            offers=tuple(Offer.from_vtex(s) for s in item.get("sellers", []) or []),
+        )
+
+    @property
+    def offer(self):
+        """
+        Oferta del primer vendedor (la que se muestra), o None.
+        """
+        return self.offers[0] if self.offers else None
+
+    @property
+    def image(self):
+        return self.images[0][0] if self.images else None
+
+    def to_dict(self) -> dict:
+        """
+        Mismo formato que un item de sanitize_items.
+        """
+        return {
+            "isKit": self.is_kit,
+            "images": [{"imageUrl": u, "imageLastModified": m} for u, m in self.images],
+            "sellers": [o.to_dict() for o in self.offers],
+            "Videos": list(self.videos) if self.videos is not None else None,
+            "estimatedDateArrival": self.estimated_date_arrival,
+        }
+
+
+class Product:
+    __slots__ = (
+        "product_id",
+        "name",
+        "brand",
+        "title",
+        "description",
+        "release_date",
+        "categories",
+        "link",
+        "max_units",
+        "specifications",
+        "items",
+    )
+
+    def __init__(self, product_id=None, name=None, brand=None, title=None, description=None,
+                 release_date=None, categories=None, link=None, max_units=None,
+                 specifications=None, items=()):
+        self.product_id = product_id
+        self.name = name
+        self.brand = _intern(brand)
+        self.title = title
+        self.description = description
+        self.release_date = release_date
+        self.categories = tuple(_intern(c) for c in categories) if categories is not None else None
+        self.link = link
+        self.max_units = max_units
+        self.specifications = specifications  # ((nombre, valor), ...) o None
+        self.items = items
+
+    @classmethod
+    def from_vtex(cls, product: dict, resolve_spec=None):
+        """
+        Registro desde un documento del catalogo VTEX. `resolve_spec(product,
+        nombre)` busca el valor de cada especificacion (por defecto la clave
+        exacta).
+        """
+        names = product.get("allSpecifications")
+        specifications = None
+        if names is not None:
+            resolve = resolve_spec or (lambda p, name: p.get(name))
+            specifications = tuple((_intern(n), resolve(product, n)) for n in names)
+        return cls(
+            product_id=product.get("productId"),
+            name=product.get("productName"),
+            brand=product.get("brand"),
+            title=product.get("productTitle"),
+            description=product.get("metaTagDescription"),
+            release_date=product.get("releaseDate"),
+            categories=product.get("categories"),
+            link=product.get("link"),
+            max_units=product.get("Maximum_units_to_sell"),
+            specifications=specifications,
+            items=tuple(Item.from_vtex(i) for i in product.get("items", []) or []),
+        )
+
+    def find_item(self, code):
+        """
+        Item por itemId o EAN; si ninguno coincide, el primero (o None).
+        """
+        code = str(code)
+        for item in self.items:
+            if str(item.item_id or "") == code or str(item.ean or "") == code:
+                return item
+        return self.items[0] if self.items else None
+
+    def to_dict(self) -> dict:
+        """
+        Documento estilo VTEX con los campos guardados (lo que leen
+        sync_catalogo, el indice de ids y build_summary).
+        """
+        doc = {
+            "productId": self.product_id,
+            "productName": self.name,
+            "brand": self.brand,
+            "productTitle": self.title,
+            "metaTagDescription": self.description,
+            "releaseDate": self.release_date,
+            "categories": list(self.categories) if self.categories is not None else None,
+            "link": self.link,
+            "Maximum_units_to_sell": self.max_units,
+        }
+        if self.specifications is not None:
+            doc["allSpecifications"] = [name for name, _ in self.specifications]
+            for name, value in self.specifications:
+                doc.setdefault(name, value)
+        items = []
+        for item in self.items:
+            data = item.to_dict()
+            data["itemId"] = item.item_id
+            data["ean"] = item.ean
+            items.append(data)
+        doc["items"] = items
+        return doc
+
+
+class ProductSummary:
+    """
+    Resumen de un producto en una tienda (lo mismo que build_summary) sin
+    duplicar valores ni formatear precios; to_dict() arma el dict de siempre.
+    """
+
+    __slots__ = ("store", "code", "product", "item", "offer", "name", "fallback_image", "fallback_sku")
+
+    def __init__(self, store, code, product, item=None, offer=None, name=None,
+                 fallback_image=None, fallback_sku=None):
+        self.store = store
+        self.code = code
+        self.product = product
+        self.item = item
+        self.offer = offer
+        self.name = name
+        self.fallback_image = fallback_image
+        self.fallback_sku = fallback_sku
+
+    @property
+    def price(self):
+        return self.offer.price if self.offer else None
+
+    @property
+    def list_price(self):
+        return self.offer.list_price if self.offer else None
+
+    @property
+    def valid_until(self):
+        return self.offer.valid_until if self.offer else None
+
+    def to_dict(self, fields=None) -> dict:
+        p = self.product
+        item = self.item
+        offer = self.offer
+        price = self.price
+        list_price = self.list_price
+        name = self.name or "Producto"
+        product_id = str(p.product_id) if p.product_id else None
+        has_discount = (
+            price is not None and list_price is not None and list_price > price and list_price > 0
+        )
+
+        def specifications_map():
+            return {name: value for name, value in p.specifications or ()}
+
+        def sku():
+            value = item.item_id if item else self.fallback_sku
+            return str(value) if value else None
+
+        getters = {
+            "tienda": lambda: self.store,
+            "sku_consultado": lambda: self.code,
+            "id": lambda: product_id,
+            "sku": sku,
+            "ean": lambda: str(item.ean) if item and item.ean else None,
+            "productId": lambda: product_id,
+            "productName": lambda: name,
+            "brand": lambda: p.brand,
+            "productTitle": lambda: p.title,
+            "metaTagDescription": lambda: p.description,
+            "releaseDate": lambda: p.release_date,
+            "categories": lambda: list(p.categories) if p.categories is not None else None,
+            "Maximum_units_to_sell": lambda: p.max_units,
+            "allSpecifications": lambda: (
+                [n for n, _ in p.specifications] if p.specifications is not None else None
+            ),
+            "specifications_map": specifications_map,
+            "items": lambda: [i.to_dict() for i in p.items],
+            "nombre": lambda: name,
+            "descripcion": lambda: p.description,
+            "categoria": lambda: p.categories[0] if p.categories else None,
+            "marca": lambda: p.brand,
+            "precio": lambda: format_cop(price),
+            "precio_lista": lambda: format_cop(list_price),
+            "descuento": lambda: (
+                f"{round((1 - (price / list_price)) * 100)}%" if has_discount else None
+            ),
+            "ahorro": lambda: format_cop(list_price - price) if has_discount else None,
+            "price": lambda: format_cop(price),
+            "last_price": lambda: format_cop(list_price),
+            "PriceWithoutDiscount": lambda: format_cop(offer.price_without_discount) if offer else None,
+            "FullSellingPrice": lambda: format_cop(offer.full_selling_price) if offer else None,
+            "PriceValidUntil": lambda: self.valid_until,
+            "link": lambda: p.link,
+            "link_imagen": lambda: (item.image if item and item.images else self.fallback_image),
+        }
+        if fields is None:
+            return {key: get() for key, get in getters.items()}
+        wanted = set(fields)
+        return {key: get() for key, get in getters.items() if key in wanted}
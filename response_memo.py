@@ -0,0 +1,57 @@
+import threading
+
+# Solo con estas respuestas un "no encontrado" es confiable; 403 (bloqueo /
+# WAF), 429, 5xx y demas marcan la URL como fallida (mark_failed).
+STATUS_CONCLUYENTES = frozenset({200, 404})
+
+
+class ResponseMemo:
+    """
+    Memo de respuestas ya parseadas, por URL, que vive lo que dura una
+    pregunta. Cada URL distinta se pide y se decodifica una sola vez.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+        self._failed = set()
+        self.hits = 0
+        self.misses = 0
+
+    def fetch(self, url: str, loader):
+        """
+        Devuelve lo memorizado para `url` (o cualquier clave, ej. (url,
+        codigo)) o llama loader(url) y lo guarda.
+        Si loader lanza excepcion no se guarda nada (se puede reintentar).
+        """
+        with self._lock:
+            if url in self._data:
+                self.hits += 1
+                return self._data[url]
+            self.misses += 1
+
+        value = loader(url)
+        with self._lock:
+            return self._data.setdefault(url, value)
+
+    def mark_failed(self, url: str):
+        """
+        Registra una respuesta no concluyente (fuera de STATUS_CONCLUYENTES)
+        para esta URL.
+        """
+        with self._lock:
+            self._failed.add(url)
+
+    def has_failures(self, prefix: str = "") -> bool:
+        """
+        True si alguna URL que empieza por `prefix` fallo en esta pregunta;
+        en ese caso un "no encontrado" no es confiable.
+        """
+        with self._lock:
+            return any(url.startswith(prefix) for url in self._failed)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,59 @@
+import threading
+
+import deadline
+
+
+class _Call:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Junta llamadas concurrentes con la misma clave: la primera hace el
+    trabajo y las demas esperan y reciben el mismo resultado (o la misma
+    excepcion). Nada queda guardado despues; para eso estan los caches.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.shared = 0  # llamadas que se ahorraron
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.shared += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            # quien espera no pasa de su propio plazo (deadline), aunque el
+            # que hace el trabajo tenga uno mas largo
+            if not call.done.wait(deadline.remaining()):
+                raise deadline.DeadlineExceeded("Se acabo el plazo esperando una consulta en vuelo")
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.value
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
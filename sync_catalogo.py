@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import sys
+import time
+
+import SKU
+import lookup_common
+
+
+# Campos de la oferta que cuentan como "cambio" entre corridas.
+CAMPOS_OFERTA = ("Price", "ListPrice", "AvailableQuantity", "IsAvailable", "PriceValidUntil")
+CAMPOS_PRODUCTO = ("productName", "brand", "link")
+
+
+def _huella(valores) -> str:
+    texto = json.dumps(valores, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.blake2b(texto.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def huella_item(item: dict) -> str:
+    ofertas = []
+    for seller in item.get("sellers", []) or []:
+        offer = seller.get("commertialOffer") or {}
+        ofertas.append([seller.get("sellerId")] + [offer.get(c) for c in CAMPOS_OFERTA])
+    return _huella(ofertas)
+
+
+def huellas_producto(product: dict):
+    """
+    (huella del producto, {itemId: huella del item}).
+    """
+    items = {
+        str(item.get("itemId")): huella_item(item)
+        for item in product.get("items", []) or []
+        if item.get("itemId")
+    }
+    base = [product.get(c) for c in CAMPOS_PRODUCTO]
+    return _huella([base, sorted(items.items())]), items
+
+
+def cargar_estado(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"productos": {}, "particiones": {}}
+
+
+def guardar_estado(path: str, estado: dict):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(estado, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def ordenar_particiones(particiones, estado: dict):
+    """
+    Primero las que nunca se sincronizaron, luego las que cambiaron mas
+    recientemente.
+    """
+    info = estado.get("particiones", {})
+
+    def clave(fq):
+        p = info.get(fq)
+        if p is None:
+            return (0, 0)
+        return (1, -(p.get("cambio") or 0))
+
+    return sorted(particiones, key=clave)
+
+
+def sync_tienda(store, estado_path=None, max_particiones=None, workers=SKU.CRAWL_WORKERS,
+                page_size=50, pausa=0):
+    """
+    Sincronizacion incremental de una tienda contra la corrida anterior.
+    Guarda en `estado_path` la huella de cada producto e item (Price,
+    ListPrice, AvailableQuantity, IsAvailable, PriceValidUntil) y devuelve
+    solo lo que cambio:
+    {"insertados": [...], "actualizados": [...], "eliminados": [productId],
+     "cobertura": [...]}
+
+    Con `max_particiones` solo se recorren las N particiones mas "calientes"
+    (las que cambiaron mas recientemente); un producto se da por eliminado
+    solo si su particion se recorrio completa.
+    Las particiones son las de SKU.crawl_tienda: una sola sin filtro si el
+    arbol viene vacio y la resto si las hojas no alcanzan el total.
+    """
+    estado_path = estado_path or f"sync_{store}.json"
+    estado = cargar_estado(estado_path)
+    previos = estado.setdefault("productos", {})
+    info_part = estado.setdefault("particiones", {})
+
+    base = SKU.STORES[store]["base"]
+    todas = SKU.particiones_tienda(base)
+    particiones = ordenar_particiones(todas, estado)
+    if max_particiones is not None:
+        particiones = particiones[:max_particiones]
+
+    insertados, actualizados, eliminados = [], [], []
+    cobertura = []
+    vistos = set()
+    completas = set()
+    cambios = {}
+    ahora = time.time()
+
+    def procesar(eventos):
+        for fq, cursor, productos, reportes in eventos:
+            if cursor is None:
+                cobertura.extend(reportes)
+                if not any(r["truncado"] for r in reportes):
+                    completas.add(fq)
+                continue
+            for p in productos:
+                pid = str(p.get("productId") or "")
+                if not pid or pid in vistos:
+                    continue
+                vistos.add(pid)
+                huella, items = huellas_producto(p)
+                previo = previos.get(pid)
+                if previo is None:
+                    insertados.append(p)
+                    cambios[fq] = cambios.get(fq, 0) + 1
+                elif previo["h"] != huella:
+                    cambiados = [i for i, h in items.items() if previo["items"].get(i) != h]
+                    actualizados.append({"product": p, "items_cambiados": cambiados})
+                    cambios[fq] = cambios.get(fq, 0) + 1
+                previos[pid] = {"h": huella, "items": items, "p": fq}
+
+    procesar(SKU.iter_particiones(base, particiones, workers, page_size, pausa))
+    # la particion resto, como en SKU.crawl_tienda, solo en una corrida
+    # completa: con max_particiones no se sabe cuantos faltan de verdad
+    if len(particiones) == len(todas) and SKU.falta_resto(todas, SKU.total_reportado(base), len(vistos)):
+        particiones.append(SKU.PARTICION_RESTO)
+        procesar(SKU.iter_particiones(base, [SKU.PARTICION_RESTO], 1, page_size, pausa))
+
+    # Eliminados: al final, por si un producto solo se cambio de particion.
+    for pid, previo in list(previos.items()):
+        if pid not in vistos and previo.get("p") in completas:
+            eliminados.append(pid)
+            cambios[previo["p"]] = cambios.get(previo["p"], 0) + 1
+            del previos[pid]
+
+    for fq in particiones:
+        p_info = info_part.setdefault(fq, {})
+        p_info["sync"] = ahora
+        if cambios.get(fq):
+            p_info["cambio"] = ahora
+            p_info["cambios"] = cambios[fq]
+
+    guardar_estado(estado_path, estado)
+    return {
+        "insertados": insertados,
+        "actualizados": actualizados,
+        "eliminados": eliminados,
+        "cobertura": cobertura,
+    }
+
+
+def escribir_delta(delta: dict, path: str):
+    """
+    Escribe el delta como NDJSON: {"op": "insert"|"update"|"delete", ...}.
+    """
+    lineas = []
+    for p in delta["insertados"]:
+        lineas.append({"op": "insert", "productId": p.get("productId"), "record": p})
+    for u in delta["actualizados"]:
+        p = u["product"]
+        lineas.append(
+            {"op": "update", "productId": p.get("productId"), "items": u["items_cambiados"], "record": p}
+        )
+    for pid in delta["eliminados"]:
+        lineas.append({"op": "delete", "productId": pid})
+
+    with open(path, "a", encoding="utf-8") as out:
+        for linea in lineas:
+            out.write(json.dumps(linea, ensure_ascii=False) + "\n")
+
+
+def aplicar_delta(store, delta: dict, catalogo=None):
+    """
+    Lleva el delta al catalogo local (lookup_common.CATALOG por defecto): guarda
+    insertados y actualizados, borra los eliminados.
+    """
+    catalogo = catalogo or lookup_common.CATALOG
+    guardados = list(delta["insertados"]) + [u["product"] for u in delta["actualizados"]]
+    catalogo.save_products(store, guardados)
+    catalogo.remove_products(store, delta["eliminados"])
+
+
+if __name__ == "__main__":
+    # python sync_catalogo.py metro [delta.ndjson]
+    tienda = sys.argv[1] if len(sys.argv) > 1 else "metro"
+    delta = sync_tienda(tienda)
+    aplicar_delta(tienda, delta)
+    if len(sys.argv) > 2:
+        escribir_delta(delta, sys.argv[2])
+    print(
+        f"{tienda}: {len(delta['insertados'])} nuevos, "
+        f"{len(delta['actualizados'])} actualizados, {len(delta['eliminados'])} eliminados"
+    )
@@ -0,0 +1,48 @@
+import os
+import sys
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(TESTS_DIR)
+sys.path[:0] = [REPO_DIR, os.path.join(REPO_DIR, "benchmarks")]
+
+import circuit_breaker  # noqa: E402
+import lookup_common  # noqa: E402
+import rate_limit  # noqa: E402
+import stub_server  # noqa: E402
+from id_index import IdIndex  # noqa: E402
+
+
+@pytest.fixture
+def tiendas(monkeypatch):
+    """
+    Un stub_server por tienda de lookup_common.STORES, con caches, indice de
+    ids, limitador y circuit breakers limpios -> {store: StubCatalog}.
+    """
+    monkeypatch.setattr(lookup_common, "ID_INDEX", IdIndex(":memory:"))
+    monkeypatch.setattr(lookup_common, "BACKOFF", 0)
+    monkeypatch.setattr(rate_limit, "RATE_INICIAL", 1e6)
+    monkeypatch.setattr(rate_limit, "RATE_MAX", 1e6)
+    monkeypatch.setattr(rate_limit, "BURST", 10**6)
+    rate_limit.reset()
+    circuit_breaker.reset()
+    lookup_common.PRODUCT_CACHE.clear()
+    lookup_common.NEGATIVE_CACHE.clear()
+
+    catalogs, servers = {}, []
+    for n, store in enumerate(lookup_common.STORES):
+        catalog = stub_server.StubCatalog(stub_server.build_catalog(store, 50, seed=n))
+        server, base = stub_server.start(catalog)
+        monkeypatch.setitem(lookup_common.STORES[store], "base", base)
+        catalogs[store] = catalog
+        servers.append(server)
+    yield catalogs
+
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+    lookup_common.PRODUCT_CACHE.clear()
+    lookup_common.NEGATIVE_CACHE.clear()
+    rate_limit.reset()
+    circuit_breaker.reset()
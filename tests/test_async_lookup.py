@@ -0,0 +1,147 @@
+import asyncio
+import importlib
+import shutil
+import socket
+import ssl
+import subprocess
+import threading
+
+import pytest
+import requests
+
+import async_lookup
+import deadline
+import lookup_common
+import stub_server
+
+aiohttp = pytest.importorskip("aiohttp")
+
+
+def run(coro_factory):
+    return async_lookup.run(coro_factory)
+
+
+def test_aiohttp_price_by_item_and_ean(tiendas):
+    items, eans = tiendas["metro"].codes()
+    base = lookup_common.STORES["metro"]["base"]
+
+    by_item = run(lambda e: e.get_price_vtex(base, items[-1]))
+    by_ean = run(lambda e: e.get_price_vtex(base, eans[-1]))
+
+    assert by_item is not None and by_item[0] is not None
+    assert by_ean is not None and by_ean[0] is not None
+
+
+def test_aiohttp_summary_matches_sync_wrapper(tiendas):
+    core = importlib.import_module("BusquedaSKU-Informacion")
+    ean = tiendas["exito"].codes()[1][-1]
+
+    engine_summary = run(lambda e: e.summarize_store_product("exito", ean))
+    lookup_common.PRODUCT_CACHE.clear()
+    sync_summary = core.summarize_store_product("exito", ean)
+
+    assert engine_summary["ean"] == ean
+    assert engine_summary == sync_summary
+
+
+def test_aiohttp_miss_is_negative_cached(tiendas):
+    base = lookup_common.STORES["olimpica"]["base"]
+
+    assert run(lambda e: e.get_price_vtex(base, "123456789")) is None
+    assert lookup_common.NEGATIVE_CACHE.get(("price", "olimpica", "123456789"))
+
+
+def test_aiohttp_returns_last_retryable_response(tiendas):
+    tiendas["metro"].error_rate = 1.0
+    url = f"{lookup_common.STORES['metro']['base']}/api/catalog_system/pub/products/search/?ft=x"
+
+    status, body = run(lambda e: e.http_get(url))
+
+    assert status == 503
+    assert b"inyectado" in body
+    assert tiendas["metro"].requests == lookup_common.RETRIES + 1
+
+
+def test_aiohttp_connection_error_is_requests_exception(tiendas):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    url = f"http://127.0.0.1:{port}/api/catalog_system/pub/products/search/?ft=x"
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        run(lambda e: e.http_get(url))
+
+
+@pytest.fixture
+def tienda_tls(tiendas, tmp_path):
+    """
+    El catalogo de metro servido por HTTPS con un certificado autofirmado
+    -> url de busqueda.
+    """
+    if shutil.which("openssl") is None:
+        pytest.skip("sin openssl para el certificado de prueba")
+    cert, key = tmp_path / "cert.pem", tmp_path / "key.pem"
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=127.0.0.1", "-keyout", str(key), "-out", str(cert)],
+        check=True,
+        capture_output=True,
+    )
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    server = stub_server.StubServer(("127.0.0.1", 0), tiendas["metro"])
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"https://127.0.0.1:{server.server_address[1]}/api/catalog_system/pub/products/search/?ft=x"
+    server.shutdown()
+    server.server_close()
+
+
+def test_aiohttp_verifies_certificate_by_default(tienda_tls):
+    with pytest.raises(requests.exceptions.SSLError):
+        run(lambda e: e.http_get(tienda_tls))
+
+
+def test_aiohttp_ssl_fallback_is_opt_in(tienda_tls):
+    async def main():
+        async with async_lookup.AsyncLookup(ssl_fallback=True) as engine:
+            return await engine.http_get(tienda_tls)
+
+    status, _ = asyncio.run(main())
+
+    assert status == 200
+
+
+def test_aiohttp_partial_results_degrade_failed_store(tiendas):
+    tiendas["metro"].error_rate = 1.0
+    code = tiendas["olimpica"].codes()[0][-1]
+
+    async def both(engine):
+        with deadline.within(5):
+            return await engine.summarize_stores(["metro", "olimpica"], code, partial=True)
+
+    results = dict(run(both))
+
+    # los 503 seguidos abren el circuito: la tienda queda degradada, no "no existe"
+    assert results["metro"]["degradado"] is True
+    assert not lookup_common.NEGATIVE_CACHE.get(("summary", "metro", code))
+    assert results["olimpica"]["sku"] == code
+
+
+def test_sync_wrapper_keeps_caller_deadline(tiendas, monkeypatch):
+    busqueda = importlib.import_module("BusquedaSKU")
+    tiendas["metro"].latency = 0.5
+    monkeypatch.setattr(busqueda, "ANSWER_DEADLINE", 0.2)
+    code = tiendas["metro"].codes()[0][-1]
+
+    answer = busqueda.answer(f"precio metro {code}")
+
+    assert "sin respuesta a tiempo" in answer
+
+
+def test_run_blocking_rejects_engine_loop():
+    async def nested():
+        return async_lookup.run_blocking(asyncio.sleep(0))
+
+    with pytest.raises(RuntimeError):
+        async_lookup.run_blocking(nested())
@@ -0,0 +1,68 @@
+import importlib
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+import lookup_common
+from catalog_store import CatalogStore
+
+
+def product(item_id, ean, price, valid_until):
+    offer = {"Price": price, "ListPrice": price, "PriceValidUntil": valid_until}
+    return {
+        "productId": f"p{item_id}",
+        "productName": f"Producto {item_id}",
+        "items": [{"itemId": item_id, "ean": ean, "sellers": [{"commertialOffer": offer}]}],
+    }
+
+
+def iso(ts):
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+@pytest.fixture
+def store():
+    catalog = CatalogStore(":memory:")
+    yield catalog
+    catalog.close()
+
+
+def test_find_serves_fresh_copy(store):
+    store.save_products("metro", [product("1", "7701", 1000, iso(time.time() + 3600))])
+
+    doc, item_id = store.find("metro", "7701", max_age=60)
+
+    assert item_id == "1"
+    assert doc["items"][0]["sellers"][0]["commertialOffer"]["Price"] == 1000
+
+
+def test_find_skips_expired_price(store):
+    store.save_products("metro", [product("1", "7701", 1000, iso(time.time() - 60))])
+
+    assert store.find("metro", "1") is None
+    assert store.find("metro", "7701", max_age=3600) is None
+
+
+def test_find_skips_copy_older_than_max_age(store):
+    store.save_products(
+        "metro",
+        [product("1", "7701", 1000, iso(time.time() + 3600))],
+        updated_at=time.time() - 120,
+    )
+
+    assert store.find("metro", "1", max_age=60) is None
+    assert store.find("metro", "1", max_age=300) is not None
+
+
+def test_local_first_goes_to_network_when_price_expired(tiendas, store, monkeypatch):
+    monkeypatch.setattr(lookup_common, "CATALOG", store)
+    item_id = tiendas["metro"].codes()[0][-1]
+    store.save_products("metro", [product(item_id, "", 1, iso(time.time() - 60))])
+    base = lookup_common.STORES["metro"]["base"]
+    busqueda = importlib.import_module("BusquedaSKU")
+
+    res = busqueda.get_price_vtex(base, item_id, local_first=True)
+
+    assert res is not None and res[0] != 1
+    assert tiendas["metro"].requests > 0
@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+import pytest
+
+import circuit_breaker
+from circuit_breaker import ABIERTO, CERRADO, MEDIO, HostBreaker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(circuit_breaker, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def test_opens_after_threshold_and_rejects_during_cooldown(clock):
+    breaker = HostBreaker(threshold=3, cooldown=30)
+    for _ in range(2):
+        breaker.on_failure()
+    assert breaker.state == CERRADO and breaker.allow()
+
+    breaker.on_failure()
+    assert breaker.state == ABIERTO
+    assert not breaker.allow()
+    clock.now += 29
+    assert not breaker.allow()
+    assert breaker.retry_in() == pytest.approx(1)
+
+
+def test_half_open_lets_one_probe_and_success_closes(clock):
+    breaker = HostBreaker(threshold=1, cooldown=30)
+    breaker.on_failure()
+    clock.now += 30
+
+    assert breaker.allow()
+    assert breaker.state == MEDIO
+    assert not breaker.allow()  # una sola prueba a la vez
+
+    breaker.on_success()
+    assert breaker.state == CERRADO and breaker.failures == 0
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens(clock):
+    breaker = HostBreaker(threshold=3, cooldown=30)
+    for _ in range(3):
+        breaker.on_failure()
+    clock.now += 30
+    assert breaker.allow()
+
+    breaker.on_failure()
+    assert breaker.state == ABIERTO
+    assert not breaker.allow()
+    clock.now += 30
+    assert breaker.allow()
+
+
+def test_released_probe_lets_the_next_one_try(clock):
+    breaker = HostBreaker(threshold=1, cooldown=30)
+    breaker.on_failure()
+    clock.now += 30
+    assert breaker.allow()
+
+    breaker.release()
+
+    assert breaker.state == MEDIO
+    assert breaker.allow()
@@ -0,0 +1,67 @@
+import pytest
+
+from code_classifier import StrategyStats, classify, code_shape, gtin_is_valid
+
+
+@pytest.mark.parametrize(
+    "code, valid",
+    [
+        ("4006381333931", True),  # EAN-13
+        ("7702213400181", True),
+        ("4006381333932", False),  # digito de control cambiado
+        ("7702213400180", False),
+        ("96385074", True),  # EAN-8
+        ("73513537", True),
+        ("96385075", False),
+        ("036000291452", True),  # UPC-A
+        ("036000291453", False),
+        ("00012345600012", True),  # GTIN-14
+        ("40063813339", False),  # largo que no es GTIN
+        ("123456", False),
+        ("4006381a33931", False),
+        (" 4006381333931 ", True),
+    ],
+)
+def test_gtin_checksum(code, valid):
+    assert gtin_is_valid(code) is valid
+    assert classify(code) == ("ean" if valid else "sku")
+
+
+def test_code_shape():
+    assert code_shape("4006381333931") == "gtin13"
+    assert code_shape("96385074") == "gtin8"
+    assert code_shape("4006381333932") == "d13"
+    assert code_shape("123456") == "d6"
+
+
+def test_prior_follows_classifier():
+    stats = StrategyStats()
+
+    assert stats.order("metro", "4006381333931", ["sku", "ean"]) == ["ean", "sku"]
+    assert stats.order("metro", "123456", ["ean", "sku"]) == ["sku", "ean"]
+
+
+def test_order_adapts_to_recorded_wins():
+    stats = StrategyStats()
+    code = "4006381333931"
+    for _ in range(5):
+        stats.record("metro", code, ["ean", "sku"], winner="sku")
+
+    assert stats.order("metro", code, ["sku", "ean"]) == ["sku", "ean"]
+    # lo aprendido es por tienda y por forma de codigo
+    assert stats.order("olimpica", code, ["sku", "ean"]) == ["ean", "sku"]
+    assert stats.order("metro", "96385074", ["sku", "ean"]) == ["ean", "sku"]
+    assert stats.snapshot()["metro|gtin13|ean"] == {"wins": 0, "attempts": 5}
+    assert stats.snapshot()["metro|gtin13|sku"] == {"wins": 5, "attempts": 5}
+
+
+def test_record_stops_at_winner_and_learn_false_ignores():
+    stats = StrategyStats()
+    stats.record("metro", "123456", ["sku", "ean"], winner="sku")
+    assert "metro|d6|ean" not in stats.snapshot()
+
+    frozen = StrategyStats(learn=False)
+    for _ in range(5):
+        frozen.record("metro", "4006381333931", ["ean", "sku"], winner="sku")
+    assert frozen.snapshot() == {}
+    assert frozen.order("metro", "4006381333931", ["sku", "ean"]) == ["ean", "sku"]
@@ -0,0 +1,57 @@
+import importlib
+
+import pytest
+
+import async_lookup
+import circuit_breaker
+import deadline
+import http_pool
+import lookup_common
+import rate_limit
+
+
+def host_state(store):
+    key = http_pool.host_key(lookup_common.STORES[store]["base"])
+    return circuit_breaker.breaker_for(key), rate_limit.limiter_for(key).rate
+
+
+def test_slow_store_answers_within_deadline(tiendas):
+    # con el plazo repartido en partes iguales, cada paso tenia menos de lo
+    # que tarda la tienda y se cortaba siempre
+    busqueda = importlib.import_module("BusquedaSKU")
+    tiendas["metro"].latency = 0.4
+    base = lookup_common.STORES["metro"]["base"]
+    ean = tiendas["metro"].codes()[1][-1]
+
+    with deadline.within(1.0):
+        res = busqueda.get_price_vtex(base, ean)
+
+    assert res is not None and res[0] is not None
+    breaker, _ = host_state("metro")
+    assert breaker.failures == 0
+
+
+@pytest.mark.parametrize("engine", ["requests", "aiohttp"])
+def test_deadline_cut_is_not_a_host_failure(tiendas, engine):
+    tiendas["metro"].latency = 0.5
+    base = lookup_common.STORES["metro"]["base"]
+    _, rate_before = host_state("metro")
+
+    if engine == "requests":
+        busqueda = importlib.import_module("BusquedaSKU")
+        lookup = busqueda.get_price_vtex
+    else:
+        pytest.importorskip("aiohttp")
+
+        def lookup(base, code):
+            return async_lookup.run(lambda e: e.get_price_vtex(base, code))
+
+    for code in tiendas["metro"].codes()[0][:circuit_breaker.FALLOS_PARA_ABRIR + 2]:
+        with pytest.raises(deadline.DeadlineExceeded):
+            with deadline.within(0.2):
+                lookup(base, code)
+
+    breaker, rate_after = host_state("metro")
+    assert breaker.state == circuit_breaker.CERRADO
+    assert breaker.failures == 0
+    assert rate_after >= rate_before
@@ -0,0 +1,119 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import circuit_breaker
+import http_pool
+import rate_limit
+
+
+class CookieHandler(BaseHTTPRequestHandler):
+    # pone una cookie y devuelve la que recibio
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        body = json.dumps({"cookie": self.headers.get("Cookie")}).encode()
+        self.send_response(200)
+        self.send_header("Set-Cookie", "sesion=abc; Path=/")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def cookie_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CookieHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+    http_pool.close_sessions()
+
+
+def test_shared_session_does_not_keep_cookies(cookie_server):
+    http_pool.fetch(cookie_server)
+    r = http_pool.fetch(cookie_server)
+
+    assert r.json()["cookie"] is None
+    assert not http_pool.get_session(cookie_server).cookies
+
+
+class FakeSession:
+    # responde (o lanza) lo que se le diga, en orden
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        r = requests.Response()
+        r.status_code = outcome
+        return r
+
+
+@pytest.fixture
+def backoffs(monkeypatch):
+    """
+    Intentos con los que fetch pidio esperar (backoff_delay), sin dormir.
+    """
+    rate_limit.reset()
+    circuit_breaker.reset()
+    calls = []
+    monkeypatch.setattr(rate_limit, "backoff_delay", lambda attempt, backoff, cap=30.0: calls.append(attempt) or 0)
+    yield calls
+    rate_limit.reset()
+    circuit_breaker.reset()
+
+
+def fetch_with(monkeypatch, outcomes):
+    session = FakeSession(outcomes)
+    monkeypatch.setattr(http_pool, "get_session", lambda url: session)
+    return session
+
+
+@pytest.mark.parametrize(
+    "error",
+    [requests.exceptions.ConnectTimeout("lento"), requests.exceptions.ConnectionError("corte")],
+)
+def test_retryable_errors_back_off_and_retry(monkeypatch, backoffs, error):
+    session = fetch_with(monkeypatch, [error, error, 200])
+
+    r = http_pool.fetch("http://tienda.test/x", retries=2)
+
+    assert r.status_code == 200
+    assert session.calls == 3
+    assert backoffs == [0, 1]
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        requests.exceptions.ConnectionError("NameResolutionError: no existe"),
+        requests.exceptions.InvalidURL("url rara"),
+    ],
+)
+def test_non_retryable_errors_raise_without_backoff(monkeypatch, backoffs, error):
+    session = fetch_with(monkeypatch, [error, 200])
+
+    with pytest.raises(type(error)):
+        http_pool.fetch("http://tienda.test/x", retries=2)
+
+    assert session.calls == 1
+    assert backoffs == []
+
+
+def test_retryable_status_backs_off_other_status_does_not(monkeypatch, backoffs):
+    session = fetch_with(monkeypatch, [503, 404])
+
+    r = http_pool.fetch("http://tienda.test/x", retries=2)
+
+    assert r.status_code == 404
+    assert session.calls == 2
+    assert backoffs == [0]
@@ -0,0 +1,71 @@
+import importlib
+
+import pytest
+import requests
+
+import async_lookup
+import deadline
+import json_decode
+import lookup_common
+import stub_server
+
+HTML = b"<html><body>Estamos en mantenimiento</body></html>"
+
+
+@pytest.fixture
+def metro_html(tiendas, monkeypatch):
+    """
+    El stub de metro contesta 200 con una pagina HTML en vez de JSON.
+    """
+    send = stub_server.StubHandler._send
+
+    def _send(self, status, payload, headers=None):
+        if self.server.catalog is not tiendas["metro"] or status != 200:
+            return send(self, status, payload, headers)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(HTML)))
+        self.end_headers()
+        self.wfile.write(HTML)
+
+    monkeypatch.setattr(stub_server.StubHandler, "_send", _send)
+    return tiendas
+
+
+@pytest.mark.parametrize("backend", ["orjson", "json"])
+def test_non_json_body_raises_requests_error(backend, monkeypatch):
+    if backend == "json":
+        monkeypatch.setattr(json_decode, "orjson", None)
+    elif json_decode.orjson is None:
+        pytest.skip("orjson no esta instalado")
+
+    with pytest.raises(requests.exceptions.JSONDecodeError):
+        json_decode.loads(HTML)
+    with pytest.raises(requests.exceptions.JSONDecodeError):
+        json_decode.select_products(HTML, ["123"], keep_first=True)
+
+
+def test_partial_summary_degrades_store_with_non_json_body(metro_html):
+    core = importlib.import_module("BusquedaSKU-Informacion")
+    code = metro_html["olimpica"].codes()[0][-1]
+
+    with deadline.within(5):
+        results = dict(core.summarize_stores(["metro", "olimpica"], code, partial=True))
+
+    assert results["metro"]["degradado"] is True
+    assert not lookup_common.NEGATIVE_CACHE.get(("summary", "metro", code))
+    assert results["olimpica"]["sku"] == code
+
+
+def test_aiohttp_partial_summary_degrades_store_with_non_json_body(metro_html):
+    pytest.importorskip("aiohttp")
+    code = metro_html["olimpica"].codes()[0][-1]
+
+    async def both(engine):
+        with deadline.within(5):
+            return await engine.summarize_stores(["metro", "olimpica"], code, partial=True)
+
+    results = dict(async_lookup.run(both))
+
+    assert results["metro"]["degradado"] is True
+    assert results["olimpica"]["sku"] == code
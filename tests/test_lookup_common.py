@@ -0,0 +1,29 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import lookup_common
+
+
+def search_url(store):
+    return f"{lookup_common.STORES[store]['base']}/api/catalog_system/pub/products/search/?ft=x"
+
+
+def test_same_url_in_flight_goes_out_once(tiendas):
+    tiendas["metro"].latency = 0.3
+    url = search_url("metro")
+
+    with ThreadPoolExecutor(4) as pool:
+        codes = list(pool.map(lambda _: lookup_common.http_get(url).status_code, range(4)))
+
+    assert codes == [200] * 4
+    assert tiendas["metro"].requests == 1
+
+
+def test_flight_is_not_shared_across_ssl_settings(tiendas):
+    tiendas["metro"].latency = 0.3
+    url = search_url("metro")
+    settings = [(True, False), (False, False), (True, True)]
+
+    with ThreadPoolExecutor(len(settings)) as pool:
+        list(pool.map(lambda s: lookup_common.http_get(url, verify=s[0], ssl_fallback=s[1]), settings))
+
+    assert tiendas["metro"].requests == len(settings)
@@ -0,0 +1,27 @@
+import threading
+
+import pytest
+
+import lookup_client
+import lookup_server
+
+
+@pytest.fixture
+def servicio(tiendas):
+    server = lookup_server.LookupServer(("127.0.0.1", 0), lookup_server.LookupHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_client_round_trip(tiendas, servicio):
+    ean = tiendas["metro"].codes()[1][-1]
+
+    product = lookup_client.product("metro", ean, fields=["nombre", "precio"], server=servicio)
+
+    assert product == lookup_server.core.summarize_store_product("metro", ean, fields=["nombre", "precio"])
+    assert product["nombre"] and product["precio"]
+    assert lookup_client.call("/health", servicio)["ok"] is True
+    with pytest.raises(lookup_client.ServiceError, match="Tienda desconocida"):
+        lookup_client.product("carulla", ean, server=servicio)
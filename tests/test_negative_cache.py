@@ -0,0 +1,52 @@
+import contextlib
+import importlib
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+import circuit_breaker
+import lookup_common
+import product_cache
+
+busqueda = importlib.import_module("BusquedaSKU")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1_000_000.0)
+    monkeypatch.setattr(product_cache, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def test_miss_is_cached_until_negative_ttl(tiendas, clock):
+    metro = tiendas["metro"]
+    base = lookup_common.STORES["metro"]["base"]
+
+    assert busqueda.get_price_vtex(base, "123456789") is None
+    sent = metro.requests
+    assert sent > 0
+
+    clock.now += lookup_common.NEGATIVE_CACHE.ttl - 1
+    assert busqueda.get_price_vtex(base, "123456789") is None
+    assert metro.requests == sent
+
+    clock.now += 1
+    assert busqueda.get_price_vtex(base, "123456789") is None
+    assert metro.requests > sent
+
+
+def test_transport_errors_are_not_negative_cached(tiendas):
+    metro = tiendas["metro"]
+    base = lookup_common.STORES["metro"]["base"]
+    item_id = metro.codes()[0][-1]
+
+    metro.error_rate = 1.0
+    with contextlib.suppress(requests.exceptions.RequestException):
+        assert busqueda.get_price_vtex(base, item_id) is None
+    assert not lookup_common.NEGATIVE_CACHE.get(("price", "metro", item_id))
+
+    metro.error_rate = 0.0
+    circuit_breaker.reset()
+    res = busqueda.get_price_vtex(base, item_id)
+    assert res is not None and res[0] is not None
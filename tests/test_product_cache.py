@@ -0,0 +1,71 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+import product_cache
+from product_cache import ProductCache
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(product_cache, "time", SimpleNamespace(time=clock))
+    return clock
+
+
+def iso(ts):
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def test_entry_lives_ttl_when_price_valid_longer(clock):
+    cache = ProductCache(ttl=300)
+    cache.put(("price", "metro", "1"), "v", valid_until=iso(clock.now + 3600))
+
+    clock.now += 299
+    assert cache.get(("price", "metro", "1")) == "v"
+    clock.now += 1
+    assert cache.get(("price", "metro", "1")) is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_entry_expires_at_price_valid_until(clock):
+    cache = ProductCache(ttl=300)
+    cache.put(("price", "metro", "1"), "v", valid_until=clock.now + 60)
+    cache.put(("price", "metro", "2"), "v", valid_until=iso(clock.now + 60))
+
+    clock.now += 59
+    assert cache.get(("price", "metro", "1")) == "v"
+    assert cache.get(("price", "metro", "2")) == "v"
+    clock.now += 1
+    assert cache.get(("price", "metro", "1")) is None
+    assert cache.get(("price", "metro", "2")) is None
+
+
+def test_expired_price_is_not_stored(clock):
+    cache = ProductCache(ttl=300)
+    cache.put(("price", "metro", "1"), "v", valid_until=clock.now - 1)
+
+    assert len(cache) == 0
+
+
+def test_lru_eviction_respects_maxsize(clock):
+    cache = ProductCache(maxsize=3, ttl=300)
+    for code in "abc":
+        cache.put(("price", "metro", code), code)
+    cache.get(("price", "metro", "a"))  # "a" pasa a ser la mas reciente
+
+    cache.put(("price", "metro", "d"), "d")
+
+    assert len(cache) == 3
+    assert cache.get(("price", "metro", "b")) is None
+    assert [cache.get(("price", "metro", c)) for c in "acd"] == ["a", "c", "d"]
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,23 @@
+import pytest
+
+import stub_server
+from product_summary import build_summary, summary_record
+
+
+def fixture_cases():
+    cases = []
+    for store in stub_server.FIXTURES:
+        for product in stub_server.load_fixture(store):
+            for item in product.get("items", []) or []:
+                for code in (item["itemId"], item["ean"]):
+                    cases.append(pytest.param(store, code, product, id=f"{store}-{code}"))
+    return cases
+
+
+@pytest.mark.parametrize("store, code, product", fixture_cases())
+def test_record_matches_build_summary(store, code, product):
+    record = summary_record(store, code, product)
+
+    assert record.to_dict() == build_summary(store, code, product)
+    fields = ("nombre", "precio", "precio_lista", "PriceValidUntil")
+    assert record.to_dict(fields) == build_summary(store, code, product, fields=fields)
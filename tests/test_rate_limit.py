@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+import pytest
+
+import rate_limit
+from rate_limit import HostLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(monotonic=lambda: clock.now, time=lambda: clock.now))
+    return clock
+
+
+def test_bucket_spends_burst_then_refills_at_rate(clock):
+    limiter = HostLimiter(rate=2.0, burst=3)
+
+    assert [limiter.try_acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.try_acquire() == pytest.approx(0.5)
+
+    clock.now += 0.5
+    assert limiter.try_acquire() == 0.0
+    assert limiter.try_acquire() == pytest.approx(0.5)
+
+    # nunca junta mas que el burst
+    clock.now += 60
+    assert [limiter.try_acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.try_acquire() > 0
+
+
+def test_retry_after_blocks_the_host(clock):
+    limiter = HostLimiter(rate=10.0, burst=10)
+
+    limiter.on_response(429, 0.1, retry_after=5)
+
+    assert limiter.try_acquire() == pytest.approx(5)
+    clock.now += 5
+    assert limiter.try_acquire() == 0.0
+
+
+def test_aimd_adds_on_success_and_halves_on_throttle(clock):
+    limiter = HostLimiter(rate=4.0, rate_min=1.0, rate_max=5.0)
+
+    limiter.on_response(200, 0.1)
+    assert limiter.rate == 4.0 + rate_limit.INCREMENTO
+    limiter.on_response(200, 0.1)
+    limiter.on_response(200, 0.1)
+    assert limiter.rate == 5.0  # tope rate_max
+
+    limiter.on_response(503, 0.1)
+    assert limiter.rate == 5.0 * rate_limit.FACTOR_BAJA
+    limiter.on_error()
+    limiter.on_error()
+    assert limiter.rate == 1.0  # piso rate_min
+
+    limiter.on_response(200, rate_limit.LATENCIA_LENTA + 1)
+    assert limiter.rate == 1.0
+    limiter.on_response(404, 0.1)
+    assert limiter.rate == 1.0
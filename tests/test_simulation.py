@@ -0,0 +1,89 @@
+import importlib
+
+import pytest
+import requests
+
+import lookup_common
+from product_summary import is_degraded, money_cop
+
+core = importlib.import_module("BusquedaSKU-Informacion")
+
+
+@pytest.fixture
+def metro(tiendas):
+    """
+    Catalogo de metro con precios con decimales, ya aprendido por ID_INDEX
+    (itemId y nombre), para que quote_many use la simulacion de carrito.
+    """
+    catalog = tiendas["metro"]
+    for i, p in enumerate(catalog.products):
+        p["items"][0]["sellers"][0]["commertialOffer"].update(Price=1000 + i + 0.5, ListPrice=2000 + i + 0.25)
+    lookup_common.ID_INDEX.learn_products("metro", catalog.products)
+    return catalog
+
+
+def offer(catalog, item_id):
+    return catalog.by_item[item_id]["items"][0]["sellers"][0]["commertialOffer"]
+
+
+def test_simulate_prices_posts_items_and_converts_cents(metro, monkeypatch):
+    item_ids = metro.codes()[0][-3:]
+    posted = []
+    http_post = core.http_post
+
+    def spy(url, payload):
+        posted.append((url, payload))
+        return http_post(url, payload)
+
+    monkeypatch.setattr(core, "http_post", spy)
+    prices = core.simulate_prices(lookup_common.STORES["metro"]["base"], item_ids + item_ids[:1])
+
+    (url, payload), = posted
+    assert url.endswith(core.SIMULATION_PATH)
+    assert payload == {
+        "items": [{"id": i, "quantity": 1, "seller": core.SIMULATION_SELLER} for i in item_ids],
+        "country": core.SIMULATION_COUNTRY,
+    }
+    for i in item_ids:
+        o = offer(metro, i)
+        assert prices[i] == (o["Price"], o["ListPrice"], o["PriceValidUntil"])
+
+
+def test_quote_many_prices_known_items_by_simulation(metro):
+    item_ids = metro.codes()[0][-3:]
+
+    quotes = core.quote_many([("metro", i) for i in item_ids])
+
+    for i in item_ids:
+        assert quotes[("metro", i)]["precio"] == money_cop(offer(metro, i)["Price"])
+    assert metro.by_path == {core.SIMULATION_PATH: 1}
+
+
+def test_quote_many_falls_back_to_search_when_simulation_fails(metro, monkeypatch):
+    item_ids = metro.codes()[0][-3:]
+    expected = {i: core.quote_view(core.summarize_store_product("metro", i)) for i in item_ids}
+    lookup_common.PRODUCT_CACHE.clear()
+
+    def caida(url, payload):
+        raise requests.exceptions.ConnectionError("simulacion caida")
+
+    monkeypatch.setattr(core, "http_post", caida)
+    quotes = core.quote_many([("metro", i) for i in item_ids])
+
+    assert {i: quotes[("metro", i)] for i in item_ids} == expected
+
+
+def test_quote_many_partial_degrades_failed_store(metro, monkeypatch):
+    item_id = metro.codes()[0][-1]
+
+    def caida(url, payload):
+        raise requests.exceptions.ConnectionError("simulacion caida")
+
+    monkeypatch.setattr(core, "http_post", caida)
+    metro.error_rate = 1.0
+
+    with pytest.raises(requests.exceptions.RequestException):
+        core.quote_many([("metro", item_id)])
+    quotes = core.quote_many([("metro", item_id)], partial=True)
+
+    assert is_degraded(quotes[("metro", item_id)])
@@ -0,0 +1,74 @@
+import json
+import warnings
+
+import pytest
+import requests
+
+import SKU
+
+
+@pytest.fixture
+def metro_fraccionario(tiendas, monkeypatch):
+    """
+    Catalogo de metro con precios con decimales, sin arbol de categorias
+    (todo cae en una sola particion) y un techo de paginacion chico, para
+    que el crawl tenga que partir por precio.
+    """
+    catalog = tiendas["metro"]
+    for i, p in enumerate(catalog.products):
+        p["items"][0]["sellers"][0]["commertialOffer"]["Price"] = 1000 + i + 0.5
+    monkeypatch.setattr(SKU, "MAX_FROM", 10)
+    monkeypatch.setattr(SKU, "arbol_categorias", lambda base, niveles=SKU.NIVELES_ARBOL: [])
+    return catalog
+
+
+def test_price_split_keeps_fractional_prices(metro_fraccionario):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        productos, cobertura, faltantes = SKU.crawl_tienda("metro", workers=2, page_size=5)
+
+    ids = {p["productId"] for p in productos}
+    assert ids == {p["productId"] for p in metro_fraccionario.products}
+    assert len(productos) == len(ids)
+    assert faltantes == 0
+    assert len(cobertura) > 1 and not any(c["truncado"] for c in cobertura)
+
+
+def test_crawl_tienda_warns_when_products_are_missing(metro_fraccionario, monkeypatch):
+    monkeypatch.setattr(SKU, "MAX_DIVISIONES", 0)
+
+    with pytest.warns(UserWarning, match="faltan"):
+        productos, _, faltantes = SKU.crawl_tienda("metro", workers=2, page_size=5)
+
+    assert faltantes == len(metro_fraccionario.products) - len(productos) > 0
+
+
+def test_export_resumes_from_partition_cursor(metro_fraccionario, monkeypatch, tmp_path):
+    path = str(tmp_path / "metro.ndjson")
+    pagina = SKU._pagina
+    llamadas = []
+
+    def se_cae(base, inicio, fin, fq=()):
+        llamadas.append(inicio)
+        if len(llamadas) > 6:
+            raise requests.ConnectionError("caida")
+        return pagina(base, inicio, fin, fq)
+
+    monkeypatch.setattr(SKU, "_pagina", se_cae)
+    with pytest.raises(requests.ConnectionError):
+        SKU.exportar_ndjson(path, page_size=5, workers=2)
+
+    estado = json.loads((tmp_path / "metro.ndjson.ckpt").read_text())
+    assert estado["cursores"] and not estado["completo"]
+    escritos = len((tmp_path / "metro.ndjson").read_text().splitlines())
+    assert escritos > 0
+
+    monkeypatch.setattr(SKU, "_pagina", pagina)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        exportados = SKU.exportar_ndjson(path, page_size=5, workers=2)
+
+    ids = [json.loads(linea)["productId"] for linea in (tmp_path / "metro.ndjson").read_text().splitlines()]
+    assert exportados == len(ids) == len(set(ids)) == len(metro_fraccionario.products)
+    estado = json.loads((tmp_path / "metro.ndjson.ckpt").read_text())
+    assert estado["completo"] and not estado["cursores"]
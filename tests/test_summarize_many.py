@@ -0,0 +1,51 @@
+import importlib
+
+import pytest
+import requests
+
+import lookup_common
+from product_summary import is_degraded
+
+core = importlib.import_module("BusquedaSKU-Informacion")
+
+
+def fixture_pairs(tiendas):
+    pairs = []
+    for store, catalog in tiendas.items():
+        items, eans = catalog.codes()
+        pairs += [(store, c) for c in items[:3] + items[-2:] + eans[:3] + eans[-2:]]
+        pairs.append((store, "123456789"))
+    return pairs
+
+
+def test_batch_matches_single_path(tiendas):
+    pairs = fixture_pairs(tiendas)
+
+    batch = core.summarize_many(pairs)
+    lookup_common.PRODUCT_CACHE.clear()
+    lookup_common.NEGATIVE_CACHE.clear()
+    single = {(store, code): core.summarize_store_product(store, code) for store, code in pairs}
+
+    assert batch == single
+
+
+def test_failed_fallback_degrades_only_that_item(tiendas, monkeypatch):
+    pairs = fixture_pairs(tiendas)
+    summarize = core.summarize_store_product
+
+    def falla_olimpica(store, code, *args, **kwargs):
+        if store == "olimpica":
+            raise requests.exceptions.ConnectionError("caida")
+        return summarize(store, code, *args, **kwargs)
+
+    # sin batch todo va por el fallback individual
+    monkeypatch.setattr(core, "search_many", lambda *args, **kwargs: [])
+    monkeypatch.setattr(core, "summarize_store_product", falla_olimpica)
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        core.summarize_many(pairs)
+    results = core.summarize_many(pairs, partial=True)
+
+    for (store, code), summary in results.items():
+        assert is_degraded(summary) == (store == "olimpica")
+    assert any(s is not None and not is_degraded(s) for s in results.values())
@@ -0,0 +1,34 @@
+import pytest
+
+import SKU
+import sync_catalogo
+
+
+@pytest.fixture
+def estado(tmp_path):
+    return str(tmp_path / "sync_metro.json")
+
+
+def test_empty_tree_syncs_whole_catalog(tiendas, estado, monkeypatch):
+    monkeypatch.setattr(SKU, "arbol_categorias", lambda base, niveles=SKU.NIVELES_ARBOL: [])
+    catalog = tiendas["metro"]
+
+    delta = sync_catalogo.sync_tienda("metro", estado, workers=2, page_size=10)
+
+    assert {p["productId"] for p in delta["insertados"]} == {p["productId"] for p in catalog.products}
+    assert sync_catalogo.sync_tienda("metro", estado, workers=2, page_size=10)["insertados"] == []
+
+
+def test_products_outside_leaf_categories_come_from_resto(tiendas, estado):
+    catalog = tiendas["metro"]
+    sueltos = catalog.products[:3]
+    for p in sueltos:
+        p["categoriesIds"] = []
+
+    delta = sync_catalogo.sync_tienda("metro", estado, workers=2, page_size=10)
+
+    assert {p["productId"] for p in delta["insertados"]} == {p["productId"] for p in catalog.products}
+    assert any(c["particion"] == SKU.PARTICION_RESTO for c in delta["cobertura"])
+
+    # en la siguiente corrida no se dan por eliminados
+    assert sync_catalogo.sync_tienda("metro", estado, workers=2, page_size=10)["eliminados"] == []